@@ -0,0 +1,127 @@
+"""Mede o custo de CPU de montar e serializar as respostas de listagem.
+
+Compara o caminho antigo (objetos do ORM validados pelo response_model do
+FastAPI e codificados com JSONResponse) com o caminho rápido das rotas
+(dicionários lidos do ORM ou modelo montado uma vez, codificados com orjson).
+Os objetos são montados em memória: só o trabalho de serialização é medido,
+sem banco nem HTTP.
+
+Uso:
+    python benchmarks/serialization.py
+    python benchmarks/serialization.py --rows 1000 --items 50 --rounds 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List
+
+ROOT = Path(__file__).resolve().parent.parent
+
+def build_data(rows: int, items: int):
+    """Produtos e vendas transitórios, como viriam de uma consulta"""
+    from src.models import Product, Sale, SaleItem, User
+
+    now = datetime(2024, 6, 1, 12, 0, 0, 123456)
+    seller = User(id=1, nome="Vendedor", email="vendedor@bench.com", perfil="vendedor", ativo=True)
+    products = [
+        Product(
+            id=n, nome=f"Produto {n}", codigo_barras=f"789{n:010d}", preco=1.0 + n % 50,
+            estoque=100.0, ativo=True, criado_em=now, atualizado_em=now
+        )
+        for n in range(1, rows + 1)
+    ]
+    sales = [
+        Sale(
+            id=n, data_hora=now - timedelta(minutes=n), usuario_id=1, usuario=seller,
+            total=10.0 + n, metodo_pagamento="pix", status="concluida"
+        )
+        for n in range(1, rows + 1)
+    ]
+    detail = Sale(
+        id=1, data_hora=now, usuario_id=1, usuario=seller, total=float(items),
+        metodo_pagamento="pix", status="concluida",
+        itens=[
+            SaleItem(
+                id=n, produto_id=products[n % rows].id, produto=products[n % rows],
+                quantidade=1.0, preco_unitario=1.0, subtotal=1.0
+            )
+            for n in range(items)
+        ]
+    )
+    return products, sales, detail
+
+def cpu_per_call(fn, rounds: int) -> dict:
+    """Tempo de CPU por chamada (mediana de 5 séries) e tamanho da resposta"""
+    body = fn()
+    series = []
+    for _ in range(5):
+        started = time.process_time()
+        for _ in range(rounds):
+            fn()
+        series.append((time.process_time() - started) / rounds)
+    return {"cpu_ms": round(statistics.median(series) * 1000, 3), "bytes": len(body)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000, help="Linhas das listagens")
+    parser.add_argument("--items", type=int, default=50, help="Itens da venda detalhada")
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    os.environ.setdefault("DATABASE_URL", "sqlite://")
+    sys.path.insert(0, str(ROOT))
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_response_field
+    from src.responses import json_response, orm_rows
+    from src.schemas import ProductResponse, SaleResponse, SaleSummary
+    from src.services import format_sale_response, format_sale_summaries, format_sale_summary
+
+    products, sales, detail = build_data(args.rows, args.items)
+    loop = asyncio.new_event_loop()
+
+    def validated(response_type, content):
+        """Caminho do response_model: valida, converte com jsonable_encoder e codifica"""
+        field = create_response_field(name="response", type_=response_type)
+        def render():
+            data = loop.run_until_complete(serialize_response(field=field, response_content=content()))
+            return JSONResponse(data).body
+        return render
+
+    cases = {
+        f"GET /produtos/ ({args.rows} linhas)": (
+            validated(List[ProductResponse], lambda: products),
+            lambda: json_response(orm_rows(ProductResponse, products)).body
+        ),
+        f"GET /vendas/ ({args.rows} linhas)": (
+            validated(List[SaleSummary], lambda: [format_sale_summary(sale) for sale in sales]),
+            lambda: json_response(format_sale_summaries(sales)).body
+        ),
+        f"GET /vendas/{{id}} ({args.items} itens)": (
+            validated(SaleResponse, lambda: format_sale_response(detail)),
+            lambda: json_response(format_sale_response(detail)).body
+        )
+    }
+
+    result = {}
+    for label, (before, after) in cases.items():
+        assert json.loads(before()) == json.loads(after()), f"Respostas diferentes em {label}"
+        antes = cpu_per_call(before, args.rounds)
+        depois = cpu_per_call(after, args.rounds)
+        result[label] = {
+            "antes": antes,
+            "depois": depois,
+            "aceleracao": round(antes["cpu_ms"] / depois["cpu_ms"], 2) if depois["cpu_ms"] else None
+        }
+    loop.close()
+
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
@@ -17,10 +17,14 @@ CREATE TABLE IF NOT EXISTS usuarios (
 CREATE INDEX IF NOT EXISTS idx_usuarios_email ON usuarios(email);
 CREATE INDEX IF NOT EXISTS idx_usuarios_id ON usuarios(id);
 
+-- Busca de produtos por trecho do nome (índice de trigramas)
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
 -- Tabela de produtos
 CREATE TABLE IF NOT EXISTS produtos (
     id SERIAL PRIMARY KEY,
     nome VARCHAR NOT NULL,
+    nome_busca VARCHAR,
     codigo_barras VARCHAR UNIQUE,
     preco DECIMAL(10,2) NOT NULL CHECK (preco >= 0),
     estoque DECIMAL(10,2) DEFAULT 0.0 CHECK (estoque >= 0),
@@ -32,6 +36,8 @@ CREATE TABLE IF NOT EXISTS produtos (
 -- Índices para tabela produtos
 CREATE INDEX IF NOT EXISTS idx_produtos_codigo_barras ON produtos(codigo_barras);
 CREATE INDEX IF NOT EXISTS idx_produtos_id ON produtos(id);
+CREATE INDEX IF NOT EXISTS ix_produtos_nome_busca_trgm ON produtos USING gin (nome_busca gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS ix_produtos_ativos_id ON produtos(id) WHERE ativo = true;
 
 -- Tabela de vendas
 CREATE TABLE IF NOT EXISTS vendas (
@@ -40,13 +46,18 @@ CREATE TABLE IF NOT EXISTS vendas (
     usuario_id INTEGER NOT NULL REFERENCES usuarios(id),
     total DECIMAL(10,2) NOT NULL CHECK (total >= 0),
     metodo_pagamento VARCHAR NOT NULL CHECK (metodo_pagamento IN ('dinheiro', 'cartao', 'pix')),
-    status VARCHAR DEFAULT 'finalizada' CHECK (status IN ('finalizada', 'cancelada'))
+    status VARCHAR DEFAULT 'finalizada' CHECK (status IN ('finalizada', 'cancelada')),
+    id_cliente VARCHAR,
+    UNIQUE (usuario_id, id_cliente)
 );
 
 -- Índices para tabela vendas
 CREATE INDEX IF NOT EXISTS idx_vendas_usuario_id ON vendas(usuario_id);
 CREATE INDEX IF NOT EXISTS idx_vendas_data_hora ON vendas(data_hora);
 CREATE INDEX IF NOT EXISTS idx_vendas_id ON vendas(id);
+CREATE INDEX IF NOT EXISTS ix_vendas_status_data_hora ON vendas(status, data_hora);
+CREATE INDEX IF NOT EXISTS ix_vendas_usuario_data_hora ON vendas(usuario_id, data_hora DESC, id DESC);
+CREATE INDEX IF NOT EXISTS ix_vendas_data_hora_id ON vendas(data_hora, id);
 
 -- Tabela de itens de venda
 CREATE TABLE IF NOT EXISTS itens_venda (
@@ -63,6 +74,36 @@ CREATE INDEX IF NOT EXISTS idx_itens_venda_venda_id ON itens_venda(venda_id);
 CREATE INDEX IF NOT EXISTS idx_itens_venda_produto_id ON itens_venda(produto_id);
 CREATE INDEX IF NOT EXISTS idx_itens_venda_id ON itens_venda(id);
 
+-- Resumo diário de vendas finalizadas por método de pagamento e vendedor
+CREATE TABLE IF NOT EXISTS resumo_vendas_dia (
+    dia DATE NOT NULL,
+    metodo_pagamento VARCHAR NOT NULL,
+    usuario_id INTEGER NOT NULL REFERENCES usuarios(id),
+    vendas INTEGER NOT NULL DEFAULT 0,
+    total DECIMAL(12,2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (dia, metodo_pagamento, usuario_id)
+);
+
+-- Resumo diário de quantidade vendida por produto
+CREATE TABLE IF NOT EXISTS resumo_produtos_dia (
+    dia DATE NOT NULL,
+    produto_id INTEGER NOT NULL REFERENCES produtos(id),
+    quantidade DECIMAL(12,2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (dia, produto_id)
+);
+
+-- Chaves Idempotency-Key de POST /vendas/ (retentativas do caixa não duplicam a venda)
+CREATE TABLE IF NOT EXISTS chaves_idempotencia (
+    usuario_id INTEGER NOT NULL REFERENCES usuarios(id),
+    chave VARCHAR(255) NOT NULL,
+    hash_requisicao VARCHAR(64) NOT NULL,
+    venda_id INTEGER REFERENCES vendas(id),
+    criado_em TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (usuario_id, chave)
+);
+
+CREATE INDEX IF NOT EXISTS idx_chaves_idempotencia_criado_em ON chaves_idempotencia(criado_em);
+
 -- Function para atualizar o campo atualizado_em automaticamente
 CREATE OR REPLACE FUNCTION update_atualizado_em()
 RETURNS TRIGGER AS $$
@@ -88,10 +129,14 @@ COMMENT ON TABLE usuarios IS 'Tabela de usuários do sistema (vendedores e geren
 COMMENT ON TABLE produtos IS 'Tabela de produtos disponíveis para venda';
 COMMENT ON TABLE vendas IS 'Tabela de vendas realizadas';
 COMMENT ON TABLE itens_venda IS 'Tabela de itens de cada venda';
+COMMENT ON TABLE resumo_vendas_dia IS 'Resumo diário de vendas mantido junto com cada venda (relatórios)';
+COMMENT ON TABLE resumo_produtos_dia IS 'Resumo diário de produtos vendidos mantido junto com cada venda (relatórios)';
+COMMENT ON TABLE chaves_idempotencia IS 'Chaves Idempotency-Key já usadas em POST /vendas/ e a venda gerada';
 
 -- Comentários nas colunas importantes
 COMMENT ON COLUMN usuarios.perfil IS 'Perfil do usuário: vendedor ou gerente';
 COMMENT ON COLUMN vendas.metodo_pagamento IS 'Método de pagamento: dinheiro, cartao ou pix';
 COMMENT ON COLUMN vendas.status IS 'Status da venda: finalizada ou cancelada';
+COMMENT ON COLUMN produtos.nome_busca IS 'Nome em minúsculas e sem acentos, mantido pela aplicação (GET /produtos/busca)';
 COMMENT ON COLUMN produtos.estoque IS 'Quantidade em estoque (pode ser fracionária)';
 
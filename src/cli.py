@@ -0,0 +1,134 @@
+"""Comandos de manutenção.
+
+Uso:
+    python -m src.cli init-db
+    python -m src.cli rebuild-rollups [--inicio AAAA-MM-DD] [--fim AAAA-MM-DD]
+    python -m src.cli purge-idempotency [--dias N]
+    python -m src.cli reindex-search
+    python -m src.cli archive-sales [--meses N]
+"""
+import argparse
+from datetime import date
+from pathlib import Path
+from .database import SessionLocal, get_engine
+
+ALEMBIC_INI = Path(__file__).resolve().parent.parent / "alembic.ini"
+
+def _legacy_revision(inspector) -> str:
+    """Revisão de um banco criado pelo create_all da inicialização (antes das migrações).
+
+    Cada revisão é reconhecida pelas tabelas, colunas e índices que criou, na
+    ordem em que entraram nos modelos; vale a última presente sem lacunas.
+    """
+    tables = set(inspector.get_table_names())
+    columns = {table: {column["name"] for column in inspector.get_columns(table)} for table in ("vendas", "produtos")}
+    indexes = {index["name"] for index in inspector.get_indexes("vendas")}
+    pieces = [
+        ("0002", {"resumo_vendas_dia", "resumo_produtos_dia"} <= tables),
+        ("0003", "id_cliente" in columns["vendas"]),
+        ("0004", "chaves_idempotencia" in tables),
+        ("0005", "nome_busca" in columns["produtos"]),
+        ("0006", "ix_vendas_status_data_hora" in indexes),
+        # 0007 só normaliza dados do SQLite: bancos do create_all sempre passam por ela
+    ]
+    revision = "0001"
+    for candidate, present in pieces:
+        if not present:
+            break
+        revision = candidate
+    return revision
+
+def init_db_command(args):
+    """Cria ou atualiza o esquema do banco (uma vez por deploy, não a cada worker)"""
+    from alembic import command
+    from alembic.config import Config
+    from sqlalchemy import inspect
+
+    config = Config(str(ALEMBIC_INI))
+    engine = get_engine()
+    tables = set(inspect(engine).get_table_names())
+    if tables and "alembic_version" not in tables:
+        # Banco criado pelo create_all da inicialização antiga: marca a revisão que ele já tem
+        revision = _legacy_revision(inspect(engine))
+        command.stamp(config, revision)
+        print(f"Banco existente marcado na revisão {revision}")
+    command.upgrade(config, "head")
+    print("Esquema do banco atualizado")
+
+def rebuild_rollups_command(args):
+    """Recalcula os resumos diários de vendas"""
+    from .services import rebuild_rollups
+
+    db = SessionLocal()
+    try:
+        days = rebuild_rollups(db, args.inicio, args.fim)
+    finally:
+        db.close()
+    print(f"Resumos recalculados para {days} dia(s) com vendas")
+
+def purge_idempotency_command(args):
+    """Apaga chaves Idempotency-Key antigas"""
+    from .services import purge_idempotency_keys
+
+    db = SessionLocal()
+    try:
+        removed = purge_idempotency_keys(db, args.dias)
+    finally:
+        db.close()
+    print(f"{removed} chave(s) de idempotência removida(s)")
+
+def reindex_search_command(args):
+    """Preenche o nome de busca dos produtos antigos"""
+    from .services import reindex_product_search
+
+    db = SessionLocal()
+    try:
+        updated = reindex_product_search(db)
+    finally:
+        db.close()
+    print(f"{updated} produto(s) indexado(s) para busca")
+
+def archive_sales_command(args):
+    """Move as vendas de meses antigos para o arquivo comprimido"""
+    from .services import archive_sales, sales_archive
+
+    db = SessionLocal()
+    try:
+        archived = archive_sales(db) if args.meses is None else archive_sales(db, args.meses)
+    finally:
+        db.close()
+    for month, count in archived.items():
+        print(f"{month:%Y-%m}: {count} venda(s) arquivada(s)")
+    print(f"{sum(archived.values())} venda(s) arquivada(s) em {sales_archive.directory}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m src.cli", description="Comandos de manutenção do PDV")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    init_db = subparsers.add_parser("init-db", help="Cria ou atualiza o esquema do banco (migrações)")
+    init_db.set_defaults(func=init_db_command)
+
+    rebuild = subparsers.add_parser("rebuild-rollups", help="Recalcula os resumos diários usados pelos relatórios")
+    rebuild.add_argument("--inicio", type=date.fromisoformat, help="Data inicial (padrão: desde a primeira venda)")
+    rebuild.add_argument("--fim", type=date.fromisoformat, help="Data final (padrão: até a última venda)")
+    rebuild.set_defaults(func=rebuild_rollups_command)
+
+    purge = subparsers.add_parser("purge-idempotency", help="Apaga chaves Idempotency-Key antigas")
+    purge.add_argument("--dias", type=int, default=7, help="Manter chaves dos últimos N dias (padrão: 7)")
+    purge.set_defaults(func=purge_idempotency_command)
+
+    reindex = subparsers.add_parser("reindex-search", help="Preenche o nome de busca dos produtos antigos")
+    reindex.set_defaults(func=reindex_search_command)
+
+    archive = subparsers.add_parser("archive-sales", help="Move vendas antigas para arquivos mensais comprimidos")
+    archive.add_argument(
+        "--meses", type=int, default=None,
+        help="Meses fechados mantidos nas tabelas, além do atual (padrão: SALES_ARCHIVE_MONTHS)"
+    )
+    archive.set_defaults(func=archive_sales_command)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
@@ -1,41 +1,130 @@
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-from .database import engine, Base
-from .routes import auth_router, products_router, sales_router, reports_router
-
-# Criar aplicação FastAPI
-app = FastAPI(
-    title="PDV Web - API",
-    description="API para sistema de ponto de venda web",
-    version="1.0.0"
-)
-
-@app.on_event("startup")
-def create_tables():
-    """Criar tabelas no banco de dados na inicialização"""
-    Base.metadata.create_all(bind=engine)
-
-# Configurar CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # Em produção, especificar origens permitidas
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Incluir rotas
-app.include_router(auth_router)
-app.include_router(products_router)
-app.include_router(sales_router)
-app.include_router(reports_router)
-
-@app.get("/")
-def read_root():
-    """Endpoint raiz"""
-    return {"message": "PDV Web API", "version": "1.0.0"}
-
-@app.get("/health")
-def health_check():
-    """Verificação de saúde da API"""
-    return {"status": "healthy"}
+"""Aplicação FastAPI.
+
+`create_app()` monta a aplicação; `src.main:app` a cria no primeiro acesso.
+A subida do worker não toca o banco: o esquema é criado/atualizado uma vez
+por `python -m src.cli init-db`, e a engine só conecta na primeira requisição.
+"""
+import asyncio
+import logging
+import os
+from fastapi import FastAPI, Response
+from fastapi.responses import ORJSONResponse
+from starlette.concurrency import run_in_threadpool
+from . import database
+from .metrics import MetricsMiddleware, request_metrics
+
+logger = logging.getLogger(__name__)
+
+# Carregar o índice de produtos em segundo plano ao subir o worker
+CATALOG_WARM_ON_STARTUP = os.getenv("CATALOG_WARM_ON_STARTUP", "true").lower() in ("1", "true", "yes")
+
+def _warm_catalog() -> int:
+    from .services import catalog
+
+    db = database.SessionLocal()
+    try:
+        return catalog.warm(db)
+    finally:
+        db.close()
+
+def create_app() -> FastAPI:
+    """Cria a aplicação com middlewares, rotas e eventos de ciclo de vida"""
+    from fastapi.middleware.cors import CORSMiddleware
+    from .routes import auth_router, products_router, sales_router, reports_router
+    from .passwords import password_hasher
+    from .services import login_latency
+
+    # Criar aplicação FastAPI
+    app = FastAPI(
+        title="PDV Web - API",
+        description="API para sistema de ponto de venda web",
+        version="1.0.0",
+        # orjson nas respostas que ainda passam pelo response_model
+        default_response_class=ORJSONResponse
+    )
+
+    @app.on_event("startup")
+    async def warm_catalog():
+        """Carregar o índice de produtos para a leitura de código de barras.
+
+        Roda em segundo plano: o worker já atende enquanto o índice enche
+        (produtos fora do índice são lidos do banco).
+        """
+        if not CATALOG_WARM_ON_STARTUP:
+            return
+
+        async def warm():
+            try:
+                await run_in_threadpool(_warm_catalog)
+            except Exception:
+                logger.exception("Falha ao carregar o índice de produtos")
+
+        app.state.catalog_warmup = asyncio.create_task(warm())
+
+    @app.on_event("startup")
+    def start_password_hasher():
+        """Subir os processos de hash de senha (só na aplicação, não em scripts)"""
+        password_hasher.start()
+
+    @app.on_event("shutdown")
+    def stop_password_hasher():
+        """Encerrar os processos de hash de senha"""
+        password_hasher.shutdown()
+
+    # Configurar CORS
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],  # Em produção, especificar origens permitidas
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=["X-Next-Cursor"],
+    )
+
+    # Latência por rota, requisições em andamento e uso do banco por requisição
+    app.add_middleware(MetricsMiddleware)
+
+    # Incluir rotas
+    app.include_router(auth_router)
+    app.include_router(products_router)
+    app.include_router(sales_router)
+    app.include_router(reports_router)
+
+    @app.get("/")
+    def read_root():
+        """Endpoint raiz"""
+        return {"message": "PDV Web API", "version": "1.0.0"}
+
+    @app.get("/health")
+    def health_check():
+        """Verificação de saúde da API"""
+        return {"status": "healthy"}
+
+    @app.get("/health/pool")
+    def pool_health():
+        """Métricas do pool de conexões com o banco"""
+        data = {"sync": database.pool_metrics.snapshot(database.get_engine())}
+        async_engine = database.get_async_engine()
+        if async_engine is not None:
+            data["async"] = database.async_pool_metrics.snapshot(async_engine.sync_engine)
+        return data
+
+    @app.get("/health/auth")
+    def auth_health():
+        """Latência do login e do pool de hash de senhas"""
+        return {"login": login_latency.snapshot(), "senhas": password_hasher.snapshot()}
+
+    @app.get("/metrics")
+    def metrics():
+        """Métricas no formato texto do Prometheus"""
+        return Response(request_metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+    return app
+
+def __getattr__(name):
+    """`src.main:app` (uvicorn, testes): a aplicação é criada no primeiro acesso"""
+    if name == "app":
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
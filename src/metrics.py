@@ -0,0 +1,340 @@
+import logging
+import threading
+from collections import Counter, deque
+from contextvars import ContextVar
+from typing import Optional
+import time
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from .query_counter import SQL_DEBUG, SQL_N_PLUS_ONE_THRESHOLD, is_transaction_control, statement_shape
+
+logger = logging.getLogger(__name__)
+
+class PoolMetrics:
+    """Métricas do pool de conexões de uma engine"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.overflow_checkouts = 0
+        self.max_checked_out = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record_wait(self, seconds: float, timed_out: bool = False):
+        """Registra quanto tempo uma requisição esperou por conexão livre"""
+        with self._lock:
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def instrument(self, engine):
+        """Liga os eventos do pool da engine a estas métricas"""
+        pool = engine.pool
+        pool._metrics = self
+        pool_size = pool.size() if isinstance(pool, QueuePool) else None
+
+        @event.listens_for(pool, "connect")
+        def on_connect(dbapi_connection, connection_record):
+            with self._lock:
+                self.connects += 1
+
+        @event.listens_for(pool, "checkout")
+        def on_checkout(dbapi_connection, connection_record, connection_proxy):
+            with self._lock:
+                self.checkouts += 1
+                checked_out = self.checkouts - self.checkins
+                self.max_checked_out = max(self.max_checked_out, checked_out)
+                if pool_size is not None and checked_out > pool_size:
+                    self.overflow_checkouts += 1
+
+        @event.listens_for(pool, "checkin")
+        def on_checkin(dbapi_connection, connection_record):
+            with self._lock:
+                self.checkins += 1
+
+        @event.listens_for(pool, "invalidate")
+        def on_invalidate(dbapi_connection, connection_record, exception):
+            with self._lock:
+                self.invalidations += 1
+
+        return self
+
+    def snapshot(self, engine) -> dict:
+        """Estado atual do pool e contadores acumulados"""
+        pool = engine.pool
+        with self._lock:
+            data = {
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "conexoes_abertas": self.connects,
+                "invalidacoes": self.invalidations,
+                "timeouts": self.timeouts,
+                "checkouts_em_overflow": self.overflow_checkouts,
+                "max_em_uso": self.max_checked_out,
+                "espera_total_ms": round(self.wait_total * 1000, 3),
+                "espera_max_ms": round(self.wait_max * 1000, 3),
+                "espera_media_ms": round(self.wait_total * 1000 / self.checkouts, 3) if self.checkouts else 0.0
+            }
+        data["pool"] = type(pool).__name__
+        if isinstance(pool, QueuePool):
+            data.update({
+                "tamanho": pool.size(),
+                "em_uso": pool.checkedout(),
+                "ociosas": pool.checkedin(),
+                "overflow": pool.overflow(),
+                "timeout_s": pool.timeout()
+            })
+        return data
+
+class _TimedCheckoutMixin:
+    """Mede o tempo de espera por conexão (os eventos do pool só disparam depois dela)"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self._record_wait(started, timed_out=True)
+            raise
+        self._record_wait(started)
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool._metrics = getattr(self, "_metrics", None)
+        return pool
+
+    def _record_wait(self, started: float, timed_out: bool = False):
+        metrics = getattr(self, "_metrics", None)
+        if metrics is not None:
+            metrics.record_wait(time.perf_counter() - started, timed_out)
+
+class TimedQueuePool(_TimedCheckoutMixin, QueuePool):
+    """QueuePool que registra o tempo de espera por conexão"""
+
+class TimedAsyncQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    """Pool assíncrono que registra o tempo de espera por conexão"""
+
+class LatencyStats:
+    """Latência de uma operação: contagem, média, p95 (últimas amostras) e máximo"""
+
+    def __init__(self, samples: int = 1024):
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=samples)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float):
+        with self._lock:
+            self.count += 1
+            self.total += seconds
+            self.max = max(self.max, seconds)
+            self._recent.append(seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            recent = sorted(self._recent)
+            p95 = recent[int(0.95 * (len(recent) - 1))] if recent else 0.0
+            return {
+                "chamadas": self.count,
+                "media_ms": round(1000 * self.total / self.count, 3) if self.count else 0.0,
+                "p95_ms": round(1000 * p95, 3),
+                "max_ms": round(1000 * self.max, 3)
+            }
+
+# Limites dos histogramas (formato Prometheus)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(names, values) -> str:
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+def _number(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Histogram:
+    """Histograma com rótulos, exportado no formato texto do Prometheus"""
+
+    def __init__(self, name: str, help_text: str, labelnames, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, labels, value: float):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((labels, list(counts), total, count) for labels, (counts, total, count) in self._series.items())
+        for labels, counts, total, count in series:
+            base = _labels(self.labelnames, labels)
+            for bound, bucket_count in zip(self.buckets, counts):
+                lines.append(f'{self.name}_bucket{{{base},le="{_number(float(bound))}"}} {bucket_count}')
+            lines.append(f'{self.name}_bucket{{{base},le="+Inf"}} {count}')
+            lines.append(f"{self.name}_sum{{{base}}} {_number(float(total))}")
+            lines.append(f"{self.name}_count{{{base}}} {count}")
+        return lines
+
+class _RequestUsage:
+    """Comandos SQL e tempo de banco acumulados durante uma requisição"""
+    __slots__ = ("statements", "db_seconds", "shapes")
+
+    def __init__(self, track_shapes: bool = False):
+        self.statements = 0
+        self.db_seconds = 0.0
+        # Só no modo de depuração: quantas vezes cada forma de comando rodou
+        self.shapes = Counter() if track_shapes else None
+
+# Requisição em andamento no contexto atual (propagado para o threadpool e o run_sync)
+_current_usage: ContextVar[Optional[_RequestUsage]] = ContextVar("pdv_request_usage", default=None)
+
+class RequestMetrics:
+    """Latência por rota, requisições em andamento e uso do banco por requisição"""
+
+    def __init__(self, n_plus_one_threshold: Optional[int] = SQL_N_PLUS_ONE_THRESHOLD if SQL_DEBUG else None):
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        # Repetições da mesma forma de comando que geram aviso de N+1 (None desliga)
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.latency = Histogram(
+            "pdv_http_request_duration_seconds", "Duração das requisições HTTP",
+            ("method", "route", "status"), LATENCY_BUCKETS
+        )
+        self.statements = Histogram(
+            "pdv_http_request_db_statements", "Comandos SQL executados por requisição",
+            ("method", "route"), STATEMENT_BUCKETS
+        )
+        self.db_time = Histogram(
+            "pdv_http_request_db_seconds", "Tempo gasto no banco por requisição",
+            ("method", "route"), LATENCY_BUCKETS
+        )
+
+    def instrument(self, engine):
+        """Soma os comandos da engine à requisição em andamento"""
+        if getattr(engine, "_request_metrics", None) is self:
+            return self
+        engine._request_metrics = self
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault("pdv_query_started", []).append(time.perf_counter())
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            started = conn.info["pdv_query_started"].pop()
+            usage = _current_usage.get()
+            if usage is not None:
+                usage.statements += 1
+                usage.db_seconds += time.perf_counter() - started
+                if usage.shapes is not None and not is_transaction_control(statement):
+                    usage.shapes[statement_shape(statement)] += 1
+
+        @event.listens_for(engine, "handle_error")
+        def handle_error(exception_context):
+            connection = exception_context.connection
+            if connection is not None and connection.info.get("pdv_query_started"):
+                connection.info["pdv_query_started"].pop()
+
+        return self
+
+    def start(self) -> _RequestUsage:
+        usage = _RequestUsage(track_shapes=self.n_plus_one_threshold is not None)
+        _current_usage.set(usage)
+        with self._lock:
+            self.in_flight += 1
+        return usage
+
+    def finish(self, usage: _RequestUsage, method: str, route: str, status: int, seconds: float):
+        with self._lock:
+            self.in_flight -= 1
+        self.latency.observe((method, route, str(status)), seconds)
+        self.statements.observe((method, route), usage.statements)
+        self.db_time.observe((method, route), usage.db_seconds)
+        if usage.shapes:
+            self._warn_repeated(usage.shapes, method, route)
+
+    def _warn_repeated(self, shapes: Counter, method: str, route: str):
+        """Avisa quando uma requisição repete a mesma consulta (provável N+1)"""
+        threshold = self.n_plus_one_threshold
+        if threshold is None:
+            return
+        for shape, count in shapes.most_common():
+            if count < threshold:
+                break
+            logger.warning("Possível N+1 em %s %s: %dx %s", method, route, count, shape)
+
+    def render(self) -> str:
+        lines = [
+            "# HELP pdv_http_requests_in_flight Requisições HTTP em andamento",
+            "# TYPE pdv_http_requests_in_flight gauge",
+            f"pdv_http_requests_in_flight {self.in_flight}"
+        ]
+        for histogram in (self.latency, self.statements, self.db_time):
+            lines.extend(histogram.render())
+        return "\n".join(lines) + "\n"
+
+request_metrics = RequestMetrics()
+
+class MetricsMiddleware:
+    """Middleware ASGI que mede cada requisição pelo template da rota"""
+
+    def __init__(self, app, metrics: RequestMetrics = request_metrics):
+        self.app = app
+        self.metrics = metrics
+        self._routes = {}
+
+    def _route(self, scope) -> str:
+        """Template da rota (ex.: /produtos/{product_id}); evita um rótulo por ID"""
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "desconhecida"
+        if endpoint not in self._routes:
+            for route in scope["app"].routes:
+                if getattr(route, "endpoint", None) is endpoint:
+                    self._routes[endpoint] = route.path
+                    break
+            else:
+                self._routes[endpoint] = "desconhecida"
+        return self._routes[endpoint]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        usage = self.metrics.start()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.metrics.finish(usage, scope["method"], self._route(scope), status, time.perf_counter() - started)
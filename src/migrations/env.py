@@ -0,0 +1,50 @@
+"""Ambiente do Alembic: usa a URL e os modelos da aplicação"""
+from logging.config import fileConfig
+from alembic import context
+from sqlalchemy import create_engine
+from src.database import DATABASE_URL, Base
+import src.models  # noqa: F401  # pylint: disable=unused-import (registra as tabelas no metadata)
+
+config = context.config
+
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+def _url() -> str:
+    """URL passada ao Alembic (testes, scripts) ou a DATABASE_URL da aplicação"""
+    return config.get_main_option("sqlalchemy.url") or DATABASE_URL
+
+def run_migrations_offline():
+    """Gera o SQL das migrações sem conectar (alembic upgrade --sql)"""
+    context.configure(
+        url=_url(), target_metadata=target_metadata, literal_binds=True,
+        dialect_opts={"paramstyle": "named"}, render_as_batch=True
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online():
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        _run(connection)
+        return
+
+    engine = create_engine(_url())
+    try:
+        with engine.connect() as connection:
+            _run(connection)
+    finally:
+        engine.dispose()
+
+def _run(connection):
+    # SQLite não altera tabelas com ALTER: o modo batch recria a tabela
+    context.configure(connection=connection, target_metadata=target_metadata, render_as_batch=True)
+    with context.begin_transaction():
+        context.run_migrations()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,83 @@
+"""Esquema inicial: usuários, produtos, vendas e itens (create_all original)
+
+Bancos já criados pelo create_all não rodam esta revisão: `python -m src.cli
+init-db` detecta até que revisão eles chegaram e os marca antes de atualizar.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 06:41:38
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+def _timestamp(name: str) -> sa.Column:
+    return sa.Column(name, sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True)
+
+def upgrade():
+    op.create_table(
+        "usuarios",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("nome", sa.String(), nullable=False),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("senha_hash", sa.String(), nullable=False),
+        sa.Column("perfil", sa.String(), nullable=False),
+        sa.Column("ativo", sa.Boolean(), nullable=True),
+        _timestamp("criado_em"),
+        _timestamp("atualizado_em"),
+        sa.PrimaryKeyConstraint("id")
+    )
+    op.create_index("ix_usuarios_email", "usuarios", ["email"], unique=True)
+    op.create_index("ix_usuarios_id", "usuarios", ["id"])
+
+    op.create_table(
+        "produtos",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("nome", sa.String(), nullable=False),
+        sa.Column("codigo_barras", sa.String(), nullable=True),
+        sa.Column("preco", sa.Float(), nullable=False),
+        sa.Column("estoque", sa.Float(), nullable=True),
+        sa.Column("ativo", sa.Boolean(), nullable=True),
+        _timestamp("criado_em"),
+        _timestamp("atualizado_em"),
+        sa.PrimaryKeyConstraint("id")
+    )
+    op.create_index("ix_produtos_codigo_barras", "produtos", ["codigo_barras"], unique=True)
+    op.create_index("ix_produtos_id", "produtos", ["id"])
+
+    op.create_table(
+        "vendas",
+        sa.Column("id", sa.Integer(), nullable=False),
+        _timestamp("data_hora"),
+        sa.Column("usuario_id", sa.Integer(), nullable=False),
+        sa.Column("total", sa.Float(), nullable=False),
+        sa.Column("metodo_pagamento", sa.String(), nullable=False),
+        sa.Column("status", sa.String(), nullable=True),
+        sa.ForeignKeyConstraint(["usuario_id"], ["usuarios.id"]),
+        sa.PrimaryKeyConstraint("id")
+    )
+    op.create_index("ix_vendas_id", "vendas", ["id"])
+
+    op.create_table(
+        "itens_venda",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("venda_id", sa.Integer(), nullable=False),
+        sa.Column("produto_id", sa.Integer(), nullable=False),
+        sa.Column("quantidade", sa.Float(), nullable=False),
+        sa.Column("preco_unitario", sa.Float(), nullable=False),
+        sa.Column("subtotal", sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(["produto_id"], ["produtos.id"]),
+        sa.ForeignKeyConstraint(["venda_id"], ["vendas.id"]),
+        sa.PrimaryKeyConstraint("id")
+    )
+    op.create_index("ix_itens_venda_id", "itens_venda", ["id"])
+
+def downgrade():
+    op.drop_table("itens_venda")
+    op.drop_table("vendas")
+    op.drop_table("produtos")
+    op.drop_table("usuarios")
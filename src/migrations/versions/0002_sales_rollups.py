@@ -0,0 +1,40 @@
+"""Resumos diários de vendas e de produtos (relatórios)
+
+Tabelas novas começam vazias: preencha-as com `python -m src.cli rebuild-rollups`.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 06:42:10
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "resumo_vendas_dia",
+        sa.Column("dia", sa.Date(), nullable=False),
+        sa.Column("metodo_pagamento", sa.String(), nullable=False),
+        sa.Column("usuario_id", sa.Integer(), nullable=False),
+        sa.Column("vendas", sa.Integer(), nullable=False),
+        sa.Column("total", sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(["usuario_id"], ["usuarios.id"]),
+        sa.PrimaryKeyConstraint("dia", "metodo_pagamento", "usuario_id")
+    )
+
+    op.create_table(
+        "resumo_produtos_dia",
+        sa.Column("dia", sa.Date(), nullable=False),
+        sa.Column("produto_id", sa.Integer(), nullable=False),
+        sa.Column("quantidade", sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(["produto_id"], ["produtos.id"]),
+        sa.PrimaryKeyConstraint("dia", "produto_id")
+    )
+
+def downgrade():
+    op.drop_table("resumo_produtos_dia")
+    op.drop_table("resumo_vendas_dia")
@@ -0,0 +1,25 @@
+"""Id da venda gerado no caixa (sincronização em lote dos caixas offline)
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 06:42:40
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Modo batch: no SQLite a tabela é recriada para ganhar a restrição UNIQUE
+    with op.batch_alter_table("vendas") as batch:
+        batch.add_column(sa.Column("id_cliente", sa.String(), nullable=True))
+        # Único por vendedor, como as chaves de idempotência: caixas podem repetir ids locais
+        batch.create_unique_constraint("vendas_usuario_id_id_cliente_key", ["usuario_id", "id_cliente"])
+
+def downgrade():
+    with op.batch_alter_table("vendas") as batch:
+        batch.drop_constraint("vendas_usuario_id_id_cliente_key", type_="unique")
+        batch.drop_column("id_cliente")
@@ -0,0 +1,30 @@
+"""Chaves Idempotency-Key do checkout
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 06:43:05
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "chaves_idempotencia",
+        sa.Column("usuario_id", sa.Integer(), nullable=False),
+        sa.Column("chave", sa.String(length=255), nullable=False),
+        sa.Column("hash_requisicao", sa.String(length=64), nullable=False),
+        sa.Column("venda_id", sa.Integer(), nullable=True),
+        sa.Column("criado_em", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(["usuario_id"], ["usuarios.id"]),
+        sa.ForeignKeyConstraint(["venda_id"], ["vendas.id"]),
+        sa.PrimaryKeyConstraint("usuario_id", "chave")
+    )
+    op.create_index("ix_chaves_idempotencia_criado_em", "chaves_idempotencia", ["criado_em"])
+
+def downgrade():
+    op.drop_table("chaves_idempotencia")
@@ -0,0 +1,54 @@
+"""Nome de busca dos produtos (minúsculo, sem acentos) e índice de trigramas
+
+Os produtos existentes são preenchidos aqui; no modo --sql (sem conexão) rode
+depois `python -m src.cli reindex-search`.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 06:43:30
+"""
+from alembic import context, op
+import sqlalchemy as sa
+from src.models.product import search_key
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 1000
+
+def _backfill():
+    produtos = sa.table("produtos", sa.column("id", sa.Integer), sa.column("nome", sa.String),
+                        sa.column("nome_busca", sa.String))
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(produtos.c.id, produtos.c.nome)
+            .where(produtos.c.id > last_id).order_by(produtos.c.id).limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not rows:
+            return
+        bind.execute(
+            produtos.update().where(produtos.c.id == sa.bindparam("produto_id")),
+            [{"produto_id": id, "nome_busca": search_key(nome)} for id, nome in rows]
+        )
+        last_id = rows[-1].id
+
+def upgrade():
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    op.add_column("produtos", sa.Column("nome_busca", sa.String(), nullable=True))
+    op.create_index(
+        "ix_produtos_nome_busca_trgm", "produtos", ["nome_busca"],
+        postgresql_using="gin", postgresql_ops={"nome_busca": "gin_trgm_ops"}
+    )
+    if not context.is_offline_mode():
+        _backfill()
+
+def downgrade():
+    op.drop_index("ix_produtos_nome_busca_trgm", table_name="produtos")
+    with op.batch_alter_table("produtos") as batch:
+        batch.drop_column("nome_busca")
@@ -0,0 +1,46 @@
+"""Índices compostos e parciais para as consultas de vendas e do catálogo
+
+- vendas(status, data_hora): relatórios e recálculo dos resumos (finalizadas num intervalo)
+- vendas(usuario_id, data_hora DESC, id DESC): histórico do vendedor com paginação por cursor
+- vendas(data_hora, id): listagem do gerente e exportação por período
+- produtos(id) WHERE ativo: listagem do catálogo só de produtos ativos
+- itens_venda(venda_id): itens de uma venda (detalhe, exportação)
+
+No PostgreSQL os índices são criados com CONCURRENTLY, sem bloquear as
+gravações das vendas durante a migração.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 07:05:12
+"""
+from contextlib import nullcontext
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+def _indexes():
+    """(nome, tabela, colunas, opções) de cada índice"""
+    active = sa.text("ativo = true")
+    return [
+        ("ix_vendas_status_data_hora", "vendas", ["status", "data_hora"], {}),
+        ("ix_vendas_usuario_data_hora", "vendas", ["usuario_id", sa.text("data_hora DESC"), sa.text("id DESC")], {}),
+        ("ix_vendas_data_hora_id", "vendas", ["data_hora", "id"], {}),
+        ("ix_produtos_ativos_id", "produtos", ["id"], {"postgresql_where": active, "sqlite_where": sa.text("ativo = 1")}),
+        ("ix_itens_venda_venda_id", "itens_venda", ["venda_id"], {})
+    ]
+
+def upgrade():
+    concurrently = op.get_bind().dialect.name == "postgresql"
+    with op.get_context().autocommit_block() if concurrently else nullcontext():
+        for name, table, columns, options in _indexes():
+            op.create_index(name, table, columns, postgresql_concurrently=concurrently, **options)
+
+def downgrade():
+    concurrently = op.get_bind().dialect.name == "postgresql"
+    with op.get_context().autocommit_block() if concurrently else nullcontext():
+        for name, table, _, _ in reversed(_indexes()):
+            op.drop_index(name, table_name=table, postgresql_concurrently=concurrently)
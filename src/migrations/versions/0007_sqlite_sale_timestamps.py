@@ -0,0 +1,35 @@
+"""Data/hora das vendas no mesmo formato em todas as linhas (SQLite)
+
+No SQLite, CURRENT_TIMESTAMP gravava '2024-01-01 12:00:00', sem a fração que
+o SQLAlchemy usa nos parâmetros ('12:00:00.000000'): o cursor da listagem de
+vendas comparava como texto e repetia a última venda da página. O default
+passa a gravar microssegundos e as linhas antigas ganham a fração. No
+PostgreSQL (timestamptz) nada muda.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 09:12:44
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    with op.batch_alter_table("vendas") as batch:
+        batch.alter_column(
+            "data_hora", existing_type=sa.DateTime(timezone=True),
+            server_default=sa.text("(strftime('%Y-%m-%d %H:%M:%f000', 'now'))")
+        )
+    op.execute("UPDATE vendas SET data_hora = data_hora || '.000000' WHERE length(data_hora) = 19")
+
+def downgrade():
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    with op.batch_alter_table("vendas") as batch:
+        batch.alter_column("data_hora", existing_type=sa.DateTime(timezone=True), server_default=sa.func.now())
@@ -2,6 +2,8 @@ from .user import User
 from .product import Product
 from .sale import Sale
 from .sale_item import SaleItem
+from .sales_rollup import DailySalesRollup, DailyProductRollup
+from .idempotency_key import IdempotencyKey
 
 # Importante para criar as tabelas
 from ..database import Base
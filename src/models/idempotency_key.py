@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from ..database import Base
+
+class IdempotencyKey(Base):
+    """Chave Idempotency-Key já usada por um vendedor e a venda que ela gerou"""
+    __tablename__ = "chaves_idempotencia"
+
+    usuario_id = Column(Integer, ForeignKey("usuarios.id"), primary_key=True)
+    chave = Column(String(255), primary_key=True)
+    hash_requisicao = Column(String(64), nullable=False)
+    venda_id = Column(Integer, ForeignKey("vendas.id"), nullable=True)
+    criado_em = Column(DateTime(timezone=True), server_default=func.now(), index=True)
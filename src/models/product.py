@@ -1,15 +1,47 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, DDL, Index, event
 from sqlalchemy.sql import func
+from sqlalchemy.orm import validates
 from ..database import Base
+import unicodedata
+
+def search_key(text: str) -> str:
+    """Texto normalizado para busca: minúsculo e sem acentos"""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
 
 class Product(Base):
     __tablename__ = "produtos"
 
     id = Column(Integer, primary_key=True, index=True)
     nome = Column(String, nullable=False)
+    nome_busca = Column(String, nullable=True)  # nome normalizado por search_key (busca por nome)
     codigo_barras = Column(String, unique=True, index=True, nullable=True)
     preco = Column(Float, nullable=False)
     estoque = Column(Float, default=0.0)  # Pode ser quantidade fracionária
     ativo = Column(Boolean, default=True)
     criado_em = Column(DateTime(timezone=True), server_default=func.now())
     atualizado_em = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        # Índice de trigramas: atende LIKE 'termo%' e LIKE '%termo%' no PostgreSQL
+        Index(
+            "ix_produtos_nome_busca_trgm", "nome_busca",
+            postgresql_using="gin", postgresql_ops={"nome_busca": "gin_trgm_ops"}
+        ),
+        # Listagem do catálogo: só produtos ativos, em ordem de ID (índice parcial)
+        Index(
+            "ix_produtos_ativos_id", "id",
+            postgresql_where=ativo == True, sqlite_where=ativo == True
+        ),
+    )
+
+    @validates("nome")
+    def _sync_nome_busca(self, key, nome):
+        self.nome_busca = search_key(nome)
+        return nome
+
+# O índice de trigramas depende da extensão pg_trgm
+event.listen(
+    Product.__table__, "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql")
+)
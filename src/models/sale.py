@@ -1,18 +1,30 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey
-from sqlalchemy.sql import func
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
-from ..database import Base
+from ..database import Base, server_now
 
 class Sale(Base):
     __tablename__ = "vendas"
 
     id = Column(Integer, primary_key=True, index=True)
-    data_hora = Column(DateTime(timezone=True), server_default=func.now())
+    # server_now: mesmo formato de data/hora em todas as linhas (paginação por cursor)
+    data_hora = Column(DateTime(timezone=True), server_default=server_now())
     usuario_id = Column(Integer, ForeignKey("usuarios.id"), nullable=False)
     total = Column(Float, nullable=False)
     metodo_pagamento = Column(String, nullable=False)  # 'dinheiro', 'cartao', 'pix'
     status = Column(String, default="finalizada")  # 'finalizada', 'cancelada'
+    id_cliente = Column(String, nullable=True)  # id gerado no caixa (vendas sincronizadas em lote), único por vendedor
 
     # Relacionamentos
     usuario = relationship("User")
     itens = relationship("SaleItem", back_populates="venda")
+
+    __table_args__ = (
+        # Caixas diferentes podem gerar o mesmo id local: a chave é (vendedor, id_cliente)
+        UniqueConstraint("usuario_id", "id_cliente", name="vendas_usuario_id_id_cliente_key"),
+        # Relatórios e recálculo dos resumos: vendas finalizadas num intervalo
+        Index("ix_vendas_status_data_hora", "status", "data_hora"),
+        # Histórico do vendedor, mais recentes primeiro (paginação por data_hora, id)
+        Index("ix_vendas_usuario_data_hora", "usuario_id", data_hora.desc(), id.desc()),
+        # Listagem do gerente e exportação por período, na mesma ordem
+        Index("ix_vendas_data_hora_id", "data_hora", "id"),
+    )
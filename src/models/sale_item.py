@@ -6,7 +6,7 @@ class SaleItem(Base):
     __tablename__ = "itens_venda"
 
     id = Column(Integer, primary_key=True, index=True)
-    venda_id = Column(Integer, ForeignKey("vendas.id"), nullable=False)
+    venda_id = Column(Integer, ForeignKey("vendas.id"), nullable=False, index=True)
     produto_id = Column(Integer, ForeignKey("produtos.id"), nullable=False)
     quantidade = Column(Float, nullable=False)
     preco_unitario = Column(Float, nullable=False)
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey
+from ..database import Base
+
+class DailySalesRollup(Base):
+    """Totais de vendas finalizadas por dia, método de pagamento e vendedor"""
+    __tablename__ = "resumo_vendas_dia"
+
+    dia = Column(Date, primary_key=True)
+    metodo_pagamento = Column(String, primary_key=True)
+    usuario_id = Column(Integer, ForeignKey("usuarios.id"), primary_key=True)
+    vendas = Column(Integer, nullable=False, default=0)
+    total = Column(Float, nullable=False, default=0.0)
+
+class DailyProductRollup(Base):
+    """Quantidade vendida por dia e produto (vendas finalizadas)"""
+    __tablename__ = "resumo_produtos_dia"
+
+    dia = Column(Date, primary_key=True)
+    produto_id = Column(Integer, ForeignKey("produtos.id"), primary_key=True)
+    quantidade = Column(Float, nullable=False, default=0.0)
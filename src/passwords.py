@@ -0,0 +1,127 @@
+"""Hash e verificação de senhas fora das threads das requisições.
+
+O pbkdf2 ocupa CPU por dezenas de milissegundos; em um pico de logins isso
+esgotava o threadpool usado também pelo checkout. Na aplicação, o cálculo
+roda em um pool de processos de tamanho fixo, criado no startup, e as rotas
+aguardam o resultado sem segurar nenhuma thread. Fora dela (CLI, scripts,
+testes) não há pool: o hash é calculado na própria thread.
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Optional, Tuple
+from passlib.context import CryptContext
+from starlette.concurrency import run_in_threadpool
+from .metrics import LatencyStats
+
+# Custo do hash (rounds do pbkdf2_sha256); hashes com outro custo são refeitos no login
+PASSWORD_HASH_ROUNDS = int(os.getenv("PASSWORD_HASH_ROUNDS", "29000"))
+# Processos dedicados ao hash na aplicação (0 = calcular no threadpool)
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+
+@lru_cache(maxsize=8)
+def _context(rounds: int) -> CryptContext:
+    """Contexto pbkdf2_sha256 que considera desatualizado qualquer outro custo"""
+    return CryptContext(
+        schemes=["pbkdf2_sha256"],
+        deprecated="auto",
+        pbkdf2_sha256__default_rounds=rounds,
+        pbkdf2_sha256__min_rounds=rounds,
+        pbkdf2_sha256__max_rounds=rounds
+    )
+
+def _hash(password: str, rounds: int) -> str:
+    return _context(rounds).hash(password)
+
+def _verify_and_update(password: str, hashed_password: str, rounds: int) -> Tuple[bool, Optional[str]]:
+    return _context(rounds).verify_and_update(password, hashed_password)
+
+class PasswordHasher:
+    """Pool de processos para hash e verificação de senhas"""
+
+    def __init__(self, rounds: int = PASSWORD_HASH_ROUNDS, workers: int = PASSWORD_HASH_WORKERS):
+        self.rounds = rounds
+        self.workers = workers
+        self._executor = None
+        self._lock = threading.Lock()
+        self.hash_latency = LatencyStats()
+        self.verify_latency = LatencyStats()
+        self.rehashes = 0
+
+    def start(self):
+        """Cria o pool de processos ("spawn": seguro com threads no processo pai).
+
+        Chamado no startup da aplicação: importar este módulo não sobe processos
+        (scripts sem `if __name__ == "__main__"` quebrariam com spawn).
+        """
+        if self.workers <= 0:
+            return
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+
+    async def _run(self, fn, *args):
+        """Aguarda fn no pool; sem pool, no threadpool (nunca no event loop)"""
+        pool = self._executor
+        if pool is None:
+            return await run_in_threadpool(fn, *args)
+        return await asyncio.wrap_future(pool.submit(fn, *args))
+
+    def hash(self, password: str) -> str:
+        """Gera o hash na thread atual"""
+        started = time.perf_counter()
+        hashed = _hash(password, self.rounds)
+        self.hash_latency.record(time.perf_counter() - started)
+        return hashed
+
+    async def hash_async(self, password: str) -> str:
+        """Como hash, mas no pool de processos, aguardado sem ocupar thread"""
+        started = time.perf_counter()
+        hashed = await self._run(_hash, password, self.rounds)
+        self.hash_latency.record(time.perf_counter() - started)
+        return hashed
+
+    def verify(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """Verifica a senha na thread atual; devolve também o novo hash se o custo mudou"""
+        started = time.perf_counter()
+        result = _verify_and_update(password, hashed_password, self.rounds)
+        self._record_verify(started, result)
+        return result
+
+    async def verify_async(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """Como verify, mas no pool de processos, aguardado sem ocupar thread"""
+        started = time.perf_counter()
+        result = await self._run(_verify_and_update, password, hashed_password, self.rounds)
+        self._record_verify(started, result)
+        return result
+
+    def _record_verify(self, started: float, result: Tuple[bool, Optional[str]]):
+        self.verify_latency.record(time.perf_counter() - started)
+        if result[1] is not None:
+            with self._lock:
+                self.rehashes += 1
+
+    def snapshot(self) -> dict:
+        """Uso do pool e latência de hash e verificação"""
+        return {
+            "rounds": self.rounds,
+            "processos": self.workers if self._executor is not None else 0,
+            "hash": self.hash_latency.snapshot(),
+            "verificacao": self.verify_latency.snapshot(),
+            "hashes_atualizados": self.rehashes
+        }
+
+    def shutdown(self):
+        """Encerra os processos do pool (recriado por start)"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+password_hasher = PasswordHasher()
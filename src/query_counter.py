@@ -0,0 +1,86 @@
+import os
+import re
+from collections import Counter
+from contextlib import contextmanager
+from sqlalchemy import event
+
+# Modo de depuração: avisa no log quando o mesmo comando se repete muitas vezes
+# numa requisição (sinal típico de N+1)
+SQL_DEBUG = os.getenv("SQL_DEBUG", "false").lower() in ("1", "true", "yes")
+SQL_N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", "10"))
+
+# Controle de transação não conta no orçamento (os testes usam SAVEPOINTs)
+_TRANSACTION_CONTROL = ("BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE")
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAM = re.compile(r"%\(\w+\)s|\$\d+|:\w+|%s|\?")
+_PARAM_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_ROW_LIST = re.compile(r"\(\?\)(?:\s*,\s*\(\?\))+")
+_SPACES = re.compile(r"\s+")
+
+def statement_shape(statement: str) -> str:
+    """Forma do comando: sem literais, parâmetros nem tamanho de listas IN/VALUES"""
+    shape = _STRING.sub("?", statement)
+    shape = _PARAM.sub("?", shape)
+    shape = _NUMBER.sub("?", shape)
+    shape = _PARAM_LIST.sub("(?)", shape)
+    shape = _ROW_LIST.sub("(?)", shape)
+    return _SPACES.sub(" ", shape).strip()
+
+def is_transaction_control(statement: str) -> bool:
+    return statement.lstrip().upper().startswith(_TRANSACTION_CONTROL)
+
+class QueryLog:
+    """Comandos SQL capturados dentro de um bloco"""
+
+    def __init__(self):
+        self.statements = []
+
+    @property
+    def queries(self) -> list:
+        """Comandos enviados ao banco, sem o controle de transação"""
+        return [s for s in self.statements if not is_transaction_control(s)]
+
+    def __len__(self) -> int:
+        return len(self.queries)
+
+    def shapes(self) -> Counter:
+        return Counter(statement_shape(s) for s in self.queries)
+
+    def repeated(self, threshold: int = SQL_N_PLUS_ONE_THRESHOLD) -> list:
+        """Formas que se repetem threshold vezes ou mais, da mais repetida à menos"""
+        return [(shape, count) for shape, count in self.shapes().most_common() if count >= threshold]
+
+    def report(self) -> str:
+        """Lista numerada dos comandos, para mensagens de falha"""
+        return "\n".join(f"{n}. {_SPACES.sub(' ', s).strip()}" for n, s in enumerate(self.queries, 1))
+
+@contextmanager
+def capture_queries(engine):
+    """Captura os comandos SQL enviados pela engine dentro do bloco"""
+    log = QueryLog()
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        log.statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield log
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+class QueryBudgetExceeded(AssertionError):
+    """O bloco executou mais comandos SQL do que o orçamento declarado"""
+
+@contextmanager
+def query_budget(engine, max_queries: int):
+    """Falha se o bloco enviar mais de max_queries comandos ao banco"""
+    with capture_queries(engine) as log:
+        yield log
+    if len(log) > max_queries:
+        message = f"{len(log)} comandos SQL, orçamento de {max_queries}:\n{log.report()}"
+        repeated = log.repeated(threshold=2)
+        if repeated:
+            message += "\nRepetidos:\n" + "\n".join(f"{count}x {shape}" for shape, count in repeated)
+        raise QueryBudgetExceeded(message)
@@ -0,0 +1,24 @@
+from operator import attrgetter
+from typing import Iterable, List, Type
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+def orm_rows(schema: Type[BaseModel], objects: Iterable) -> List[dict]:
+    """Campos do schema lidos direto dos objetos do ORM, sem validar linha a linha.
+
+    Só para dados que vêm do banco (já tipados pelas colunas). Em listagens
+    grandes a validação do Pydantic é a maior parte do custo da resposta.
+    """
+    fields = tuple(schema.model_fields)
+    values = attrgetter(*fields)
+    return [dict(zip(fields, values(obj))) for obj in objects]
+
+def json_response(content, headers: dict = None) -> ORJSONResponse:
+    """Serializa a resposta já montada direto com orjson.
+
+    Devolver uma Response faz o FastAPI pular a revalidação pelo response_model,
+    que continua valendo para a documentação (OpenAPI).
+    """
+    if isinstance(content, BaseModel):
+        content = content.model_dump()
+    return ORJSONResponse(content, headers=headers)
@@ -1,8 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
-from ..database import get_db
-from ..services import authenticate_user, create_access_token, create_user, get_current_user
+from ..database import get_session, run_db
+from ..services import authenticate_user_async, create_access_token, create_user_async, get_current_user
 from ..schemas import LoginRequest, TokenResponse, UserCreate, UserResponse
 from ..models import User
 
@@ -11,9 +11,9 @@ router = APIRouter(prefix="/auth", tags=["autenticação"])
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
 @router.post("/login", response_model=TokenResponse)
-def login(request: LoginRequest, db: Session = Depends(get_db)):
+async def login(request: LoginRequest, db: Session = Depends(get_session)):
     """Faz login e retorna token JWT"""
-    user = authenticate_user(db, request.email, request.senha)
+    user = await authenticate_user_async(db, request.email, request.senha)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -36,17 +36,17 @@ def logout():
     return {"message": "Logout realizado com sucesso"}
 
 @router.post("/register", response_model=UserResponse)
-def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, db: Session = Depends(get_session)):
     """Registra novo usuário (apenas para desenvolvimento)"""
     try:
-        user = create_user(db, user_data)
+        user = await create_user_async(db, user_data)
         return user
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-async def get_current_active_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    """Dependência para obter usuário atual"""
-    user = get_current_user(token, db)
+async def get_current_active_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_session)):
+    """Dependência para obter usuário atual (em cache por alguns segundos)"""
+    user = await run_db(db, lambda session: get_current_user(token, session))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -1,89 +1,156 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
 from sqlalchemy.orm import Session
 from typing import List
-from ..database import get_db
+from ..database import get_session, run_db, run_db_in_thread
+from ..responses import json_response, orm_rows
 from ..services import (
-    get_products, get_product_by_id, create_product, update_product,
-    delete_product, add_stock
+    get_products, create_product, update_product,
+    delete_product, add_stock, next_products_cursor, catalog,
+    import_products, iter_import_rows, search_products
 )
-from ..schemas import ProductCreate, ProductUpdate, ProductResponse, StockEntry
+from ..schemas import ProductCreate, ProductUpdate, ProductResponse, StockEntry, ProductImportResult
 from ..routes.auth import get_current_active_user, require_manager
 from ..models import User
 
 router = APIRouter(prefix="/produtos", tags=["produtos"])
 
 @router.get("/", response_model=List[ProductResponse])
-def list_products(
+async def list_products(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    db: Session = Depends(get_db),
+    cursor: str = Query(None, description="Cursor da página (header X-Next-Cursor da resposta anterior)"),
+    db: Session = Depends(get_session),
     current_user: User = Depends(get_current_active_user)
 ):
     """Lista produtos ativos"""
-    products = get_products(db, skip=skip, limit=limit)
-    return products
+    if cursor and skip:
+        raise HTTPException(status_code=400, detail="Use skip ou cursor, não ambos")
+
+    try:
+        products = await run_db(db, get_products, skip=skip, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    next_cursor = next_products_cursor(products, limit)
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return json_response(orm_rows(ProductResponse, products), headers=headers)
+
+@router.get("/busca", response_model=List[ProductResponse])
+async def search_products_by_name(
+    q: str = Query(..., min_length=1, max_length=100, description="Nome ou parte do nome (acentos opcionais)"),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_session),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Busca produtos ativos pelo nome, mais relevantes primeiro"""
+    products = await run_db(db, search_products, q, limit)
+    return json_response(orm_rows(ProductResponse, products))
+
+@router.get("/barcode/{codigo}", response_model=ProductResponse)
+async def get_product_by_barcode_scan(
+    codigo: str,
+    db: Session = Depends(get_session),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Busca produto pelo código de barras (leitura no caixa)"""
+    product = catalog.peek_barcode(codigo) or await run_db(db, catalog.load_barcode, codigo)
+    if not product:
+        raise HTTPException(status_code=404, detail="Produto não encontrado")
+    return product
+
+@router.get("/catalogo/estatisticas")
+def get_catalog_stats(current_user: User = Depends(require_manager)):
+    """Uso do índice de produtos em memória (apenas gerente)"""
+    return catalog.stats()
 
 @router.get("/{product_id}", response_model=ProductResponse)
-def get_product(
+async def get_product(
     product_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_session),
     current_user: User = Depends(get_current_active_user)
 ):
     """Busca produto por ID"""
-    product = get_product_by_id(db, product_id)
+    product = catalog.peek_id(product_id) or await run_db(db, catalog.load_id, product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Produto não encontrado")
     return product
 
 @router.post("/", response_model=ProductResponse)
-def create_new_product(
+async def create_new_product(
     product_data: ProductCreate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_session),
     current_user: User = Depends(require_manager)
 ):
     """Cria novo produto (apenas gerente)"""
     try:
-        product = create_product(db, product_data)
+        product = await run_db(db, create_product, product_data)
         return product
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@router.post("/importar", response_model=ProductImportResult)
+async def import_product_catalog(
+    arquivo: UploadFile = File(..., description="Arquivo CSV (com cabeçalho) ou NDJSON"),
+    formato: str = Query(None, description="csv ou ndjson (padrão: pela extensão do arquivo)"),
+    db: Session = Depends(get_session),
+    current_user: User = Depends(require_manager)
+):
+    """Importa catálogo de produtos em lote (apenas gerente).
+
+    Toda linha precisa de codigo_barras, a chave da importação: produtos já
+    cadastrados com o código são atualizados (só as colunas presentes no
+    arquivo; estoque muda apenas se a coluna vier), então reimportar o mesmo
+    arquivo não duplica nada. Linhas sem código voltam como erro; produtos sem
+    código de barras (ex.: granel) são cadastrados por POST /produtos/.
+    """
+    if formato is None:
+        formato = "ndjson" if (arquivo.filename or "").lower().endswith((".ndjson", ".jsonl")) else "csv"
+    if formato not in ("csv", "ndjson"):
+        raise HTTPException(status_code=400, detail="Formato deve ser 'csv' ou 'ndjson'")
+
+    rows = iter_import_rows(arquivo.file, formato)
+    try:
+        # Leitura e validação das linhas ocupam CPU: fora do event loop também no modo assíncrono
+        return await run_db_in_thread(db, import_products, rows)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.put("/{product_id}", response_model=ProductResponse)
-def update_existing_product(
+async def update_existing_product(
     product_id: int,
     product_data: ProductUpdate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_session),
     current_user: User = Depends(require_manager)
 ):
     """Atualiza produto (apenas gerente)"""
     try:
-        product = update_product(db, product_id, product_data)
+        product = await run_db(db, update_product, product_id, product_data)
         return product
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.delete("/{product_id}")
-def delete_existing_product(
+async def delete_existing_product(
     product_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_session),
     current_user: User = Depends(require_manager)
 ):
     """Desativa produto (apenas gerente)"""
-    success = delete_product(db, product_id)
+    success = await run_db(db, delete_product, product_id)
     if not success:
         raise HTTPException(status_code=404, detail="Produto não encontrado")
 
     return {"message": "Produto desativado com sucesso"}
 
 @router.post("/estoque/entrada", response_model=List[ProductResponse])
-def add_product_stock(
+async def add_product_stock(
     stock_entries: List[StockEntry],
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_session),
     current_user: User = Depends(require_manager)
 ):
     """Adiciona estoque aos produtos (apenas gerente)"""
     try:
-        updated_products = add_stock(db, stock_entries)
+        updated_products = await run_db(db, add_stock, stock_entries)
         return updated_products
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from datetime import date, datetime
-from ..database import get_db
-from ..services import get_daily_sales_report, get_period_sales_report
+from ..database import get_db, get_session, run_db
+from ..services import get_daily_sales_report, get_period_sales_report, export_sales
 from ..schemas import DailySalesReport, PeriodSalesReport
 from ..routes.auth import get_current_active_user, require_manager
 from ..models import User
@@ -10,22 +11,22 @@ from ..models import User
 router = APIRouter(prefix="/relatorios", tags=["relatórios"])
 
 @router.get("/vendas-dia", response_model=DailySalesReport)
-def get_daily_report(
+async def get_daily_report(
     report_date: date = Query(None, description="Data do relatório (padrão: hoje)"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_session),
     current_user: User = Depends(require_manager)
 ):
     """Relatório de vendas do dia (apenas gerente)"""
     if report_date is None:
         report_date = date.today()
 
-    return get_daily_sales_report(db, report_date)
+    return await run_db(db, get_daily_sales_report, report_date)
 
 @router.get("/vendas-periodo", response_model=PeriodSalesReport)
-def get_period_report(
+async def get_period_report(
     start_date: date = Query(..., description="Data inicial"),
     end_date: date = Query(..., description="Data final"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_session),
     current_user: User = Depends(require_manager)
 ):
     """Relatório de vendas por período (apenas gerente)"""
@@ -37,4 +38,31 @@ def get_period_report(
     if delta.days > 90:
         raise HTTPException(status_code=400, detail="Período máximo de 90 dias")
 
-    return get_period_sales_report(db, start_date, end_date)
+    return await run_db(db, get_period_sales_report, start_date, end_date)
+
+EXPORT_MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+
+@router.get("/vendas/export")
+async def export_sales_dump(
+    inicio: date = Query(..., description="Data inicial"),
+    fim: date = Query(..., description="Data final"),
+    formato: str = Query("csv", pattern="^(csv|ndjson)$", description="csv ou ndjson"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_manager)
+):
+    """Exporta vendas e itens do período em streaming (apenas gerente)
+
+    Sem limite de período: as linhas saem do cursor do banco direto para a
+    resposta. Usa sempre a sessão síncrona, consumida no threadpool.
+    """
+    try:
+        content = export_sales(db, inicio, fim, formato)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    filename = f"vendas_{inicio.isoformat()}_{fim.isoformat()}.{formato}"
+    return StreamingResponse(
+        content,
+        media_type=EXPORT_MEDIA_TYPES[formato],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
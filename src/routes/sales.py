@@ -1,51 +1,82 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
 from sqlalchemy.orm import Session
-from typing import List
-from ..database import get_db
-from ..services import create_sale, get_sale_by_id, get_sales, format_sale_response, format_sale_summary
-from ..schemas import SaleCreate, SaleResponse, SaleSummary
+from typing import List, Optional
+from ..database import get_session, run_db
+from ..responses import json_response
+from ..services import (
+    create_sale, get_sale_by_id, get_sales, format_sale_response, format_sale_summaries,
+    next_sales_cursor, create_sales_batch, create_sale_idempotent
+)
+from ..schemas import SaleCreate, SaleResponse, SaleSummary, SaleBatchCreate, SaleBatchResult
 from ..routes.auth import get_current_active_user
 from ..models import User
 
 router = APIRouter(prefix="/vendas", tags=["vendas"])
 
 @router.post("/", response_model=SaleResponse)
-def create_new_sale(
+async def create_new_sale(
     sale_data: SaleCreate,
-    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(
+        None, alias="Idempotency-Key", max_length=255,
+        description="Chave gerada pelo caixa; repetir a chave devolve a venda original"
+    ),
+    db: Session = Depends(get_session),
     current_user: User = Depends(get_current_active_user)
 ):
     """Cria nova venda"""
     try:
-        sale = create_sale(db, sale_data, current_user.id)
-        return format_sale_response(sale)
+        if idempotency_key:
+            return json_response(
+                await run_db(db, create_sale_idempotent, sale_data, current_user.id, idempotency_key)
+            )
+        sale = await run_db(db, create_sale, sale_data, current_user.id)
+        return json_response(format_sale_response(sale))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@router.post("/lote", response_model=SaleBatchResult)
+async def create_sales_batch_route(
+    batch: SaleBatchCreate,
+    db: Session = Depends(get_session),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Sincroniza vendas feitas offline no caixa (resultado por venda)"""
+    return await run_db(db, create_sales_batch, batch, current_user.id)
+
 @router.get("/", response_model=List[SaleSummary])
-def list_sales(
+async def list_sales(
     user_id: int = Query(None, description="Filtrar por usuário (opcional)"),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    db: Session = Depends(get_db),
+    cursor: str = Query(None, description="Cursor da página (header X-Next-Cursor da resposta anterior)"),
+    db: Session = Depends(get_session),
     current_user: User = Depends(get_current_active_user)
 ):
     """Lista vendas com filtros"""
+    if cursor and skip:
+        raise HTTPException(status_code=400, detail="Use skip ou cursor, não ambos")
+
     # Vendedor só vê suas próprias vendas, gerente vê todas
     if current_user.perfil == "vendedor":
         user_id = current_user.id
 
-    sales = get_sales(db, user_id=user_id, skip=skip, limit=limit)
-    return [format_sale_summary(sale) for sale in sales]
+    try:
+        sales = await run_db(db, get_sales, user_id=user_id, skip=skip, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    next_cursor = next_sales_cursor(sales, limit)
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return json_response(format_sale_summaries(sales), headers=headers)
 
 @router.get("/{sale_id}", response_model=SaleResponse)
-def get_sale_detail(
+async def get_sale_detail(
     sale_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_session),
     current_user: User = Depends(get_current_active_user)
 ):
     """Busca detalhes da venda"""
-    sale = get_sale_by_id(db, sale_id)
+    sale = await run_db(db, get_sale_by_id, sale_id)
     if not sale:
         raise HTTPException(status_code=404, detail="Venda não encontrada")
 
@@ -53,4 +84,4 @@ def get_sale_detail(
     if current_user.perfil == "vendedor" and sale.usuario_id != current_user.id:
         raise HTTPException(status_code=403, detail="Acesso negado")
 
-    return format_sale_response(sale)
+    return json_response(format_sale_response(sale))
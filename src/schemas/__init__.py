@@ -1,4 +1,10 @@
-from .user import UserBase, UserCreate, UserUpdate, UserResponse, LoginRequest, TokenResponse
-from .product import ProductBase, ProductCreate, ProductUpdate, ProductResponse, StockEntry
-from .sale import SaleCreate, SaleResponse, SaleSummary, SaleItemResponse
+from .user import UserBase, UserCreate, UserUpdate, UserResponse, CurrentUser, LoginRequest, TokenResponse
+from .product import (
+    ProductBase, ProductCreate, ProductUpdate, ProductResponse, StockEntry,
+    ProductImportError, ProductImportResult
+)
+from .sale import (
+    SaleCreate, SaleResponse, SaleSummary, SaleItemResponse,
+    SaleBatchItem, SaleBatchCreate, SaleBatchItemResult, SaleBatchResult
+)
 from .report import SalesReport, DailySalesReport, PeriodSalesReport
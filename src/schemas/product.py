@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 class ProductBase(BaseModel):
@@ -30,3 +30,16 @@ class ProductResponse(ProductBase):
 class StockEntry(BaseModel):
     produto_id: int
     quantidade: float
+
+class ProductImportError(BaseModel):
+    linha: int
+    erro: str
+
+class ProductImportResult(BaseModel):
+    total_linhas: int
+    inseridos: int
+    atualizados: int
+    linhas_com_erro: int
+    erros: List[ProductImportError]  # Limitado às primeiras 1000 linhas com erro
+    segundos: float
+    linhas_por_segundo: float
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 from datetime import datetime
 
@@ -24,6 +24,25 @@ class SaleCreate(BaseModel):
     itens: List[SaleItemCreate]
     metodo_pagamento: str  # 'dinheiro', 'cartao', 'pix'
 
+class SaleBatchItem(SaleCreate):
+    id_cliente: str = Field(..., min_length=1, max_length=64)  # id gerado no caixa
+    data_hora: datetime  # momento da venda no caixa
+
+class SaleBatchCreate(BaseModel):
+    vendas: List[SaleBatchItem] = Field(..., min_length=1, max_length=1000)
+
+class SaleBatchItemResult(BaseModel):
+    id_cliente: str
+    status: str  # 'criada', 'duplicada', 'erro'
+    venda_id: Optional[int] = None
+    erro: Optional[str] = None
+
+class SaleBatchResult(BaseModel):
+    criadas: int
+    duplicadas: int
+    com_erro: int
+    resultados: List[SaleBatchItemResult]
+
 class SaleResponse(BaseModel):
     id: int
     data_hora: datetime
@@ -33,6 +33,18 @@ class UserResponse(UserBase):
     class Config:
         from_attributes = True
 
+class CurrentUser(BaseModel):
+    """Dados do usuário autenticado guardados em cache entre requisições"""
+    id: int
+    nome: str
+    email: str
+    perfil: str
+    ativo: bool
+
+    class Config:
+        from_attributes = True
+        frozen = True
+
 class LoginRequest(BaseModel):
     email: EmailStr
     senha: str
@@ -1,13 +1,23 @@
 from .auth_service import (
     authenticate_user, create_access_token, create_user, get_current_user,
-    verify_password, get_password_hash
+    verify_password, get_password_hash, update_user, invalidate_user_cache,
+    clear_user_cache, authenticate_user_async, create_user_async, login_latency
 )
 from .product_service import (
     get_products, get_product_by_id, get_product_by_barcode,
-    create_product, update_product, delete_product, add_stock
+    create_product, update_product, delete_product, add_stock,
+    next_products_cursor, search_products, reindex_product_search
 )
 from .sale_service import (
     create_sale, get_sale_by_id, get_sales, get_sales_by_date_range,
-    format_sale_response, format_sale_summary
+    format_sale_response, format_sale_summary, format_sale_summaries, next_sales_cursor
 )
+from .sale_batch_service import create_sales_batch
+from .idempotency_service import create_sale_idempotent, purge_idempotency_keys, clear_idempotency_cache
 from .report_service import get_daily_sales_report, get_period_sales_report
+from .export_service import export_sales
+from .rollup_service import record_sale, rebuild_rollups
+from .archive_service import archive_sales, sales_archive
+from .catalog_cache import catalog
+from .report_cache import report_cache
+from .import_service import import_products, iter_import_rows
@@ -0,0 +1,235 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import delete, func, select
+from ..models.idempotency_key import IdempotencyKey
+from ..models.sale import Sale
+from ..models.sale_item import SaleItem
+from datetime import date, datetime, time, timedelta, timezone
+from itertools import accumulate
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+import gzip
+import os
+import orjson
+
+# Vendas de meses anteriores ao horizonte saem de vendas/itens_venda para
+# arquivos colunares comprimidos, um por mês (diretório local, compartilhado
+# pelos workers). Os resumos diários continuam no banco.
+SALES_ARCHIVE_DIR = os.getenv("SALES_ARCHIVE_DIR", "arquivo_vendas")
+# Meses fechados mantidos nas tabelas, além do mês atual
+SALES_ARCHIVE_MONTHS = int(os.getenv("SALES_ARCHIVE_MONTHS", "12"))
+
+ARCHIVE_VERSION = 1
+# Colunas quase sequenciais: gravadas como diferença para a linha anterior
+DELTA_COLUMNS = {"vendas": ("id", "data_hora"), "itens": ("id", "venda_id")}
+# Limite de parâmetros por IN (SQLite antigo aceita 999)
+DELETE_CHUNK_SIZE = 900
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+class ArchivedSale(NamedTuple):
+    id: int
+    data_hora: datetime
+    usuario_id: int
+    total: float
+    metodo_pagamento: str
+    status: str
+    id_cliente: Optional[str]
+
+class ArchivedItem(NamedTuple):
+    id: int
+    venda_id: int
+    produto_id: int
+    quantidade: float
+    preco_unitario: float
+    subtotal: float
+
+# Uma venda arquivada com os seus itens
+ArchivedEntry = Tuple[ArchivedSale, List[ArchivedItem]]
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+def next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+def _months_before(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 - count
+    return date(index // 12, index % 12 + 1, 1)
+
+def _encode_datetimes(values: List[datetime]) -> Tuple[List[int], Optional[List[int]]]:
+    """Microssegundos do relógio local e, se houver fuso, o deslocamento em segundos"""
+    micros = [(value.replace(tzinfo=None) - _EPOCH) // _MICROSECOND for value in values]
+    if all(value.tzinfo is None for value in values):
+        return micros, None
+    return micros, [int(value.utcoffset().total_seconds()) for value in values]
+
+def _decode_datetimes(micros: List[int], offsets: Optional[List[int]]) -> List[datetime]:
+    values = [_EPOCH + micro * _MICROSECOND for micro in micros]
+    if offsets is None:
+        return values
+    return [value.replace(tzinfo=timezone(timedelta(seconds=offset))) for value, offset in zip(values, offsets)]
+
+def _delta(values: List[int]) -> List[int]:
+    return [value - previous for value, previous in zip(values, [0] + values[:-1])]
+
+def encode_month(sales: List[ArchivedSale], items: List[ArchivedItem]) -> bytes:
+    """Arquivo do mês: uma lista por coluna (JSON), comprimida com gzip"""
+    sale_columns = {name: [getattr(sale, name) for sale in sales] for name in ArchivedSale._fields}
+    item_columns = {name: [getattr(item, name) for item in items] for name in ArchivedItem._fields}
+    sale_columns["data_hora"], offsets = _encode_datetimes(sale_columns["data_hora"])
+    if offsets is not None:
+        sale_columns["utc_offset"] = offsets
+    tables = {"vendas": sale_columns, "itens": item_columns}
+    for table, names in DELTA_COLUMNS.items():
+        for name in names:
+            tables[table][name] = _delta(tables[table][name])
+    return gzip.compress(orjson.dumps({"versao": ARCHIVE_VERSION, **tables}), compresslevel=9)
+
+def decode_month(data: bytes) -> Tuple[List[ArchivedSale], List[ArchivedItem]]:
+    content = orjson.loads(gzip.decompress(data))
+    if content["versao"] != ARCHIVE_VERSION:
+        raise ValueError(f"Versão de arquivo de vendas não suportada: {content['versao']}")
+    for table, names in DELTA_COLUMNS.items():
+        for name in names:
+            content[table][name] = list(accumulate(content[table][name]))
+
+    sale_columns, item_columns = content["vendas"], content["itens"]
+    sale_columns["data_hora"] = _decode_datetimes(sale_columns["data_hora"], sale_columns.pop("utc_offset", None))
+    sales = [ArchivedSale._make(row) for row in zip(*(sale_columns[name] for name in ArchivedSale._fields))]
+    items = [ArchivedItem._make(row) for row in zip(*(item_columns[name] for name in ArchivedItem._fields))]
+    return sales, items
+
+class SalesArchive:
+    """Vendas arquivadas, um arquivo por mês em `directory`"""
+
+    def __init__(self, directory=SALES_ARCHIVE_DIR):
+        self.directory = Path(directory)
+
+    def path(self, month: date) -> Path:
+        return self.directory / f"vendas-{month:%Y-%m}.json.gz"
+
+    def months(self, start: Optional[date] = None, end: Optional[date] = None) -> List[date]:
+        """Meses arquivados que cruzam o intervalo (sem limites: todos), em ordem"""
+        months = []
+        for path in self.directory.glob("vendas-*.json.gz"):
+            month = datetime.strptime(path.name[len("vendas-"):-len(".json.gz")], "%Y-%m").date()
+            if (start is None or next_month(month) > start) and (end is None or month <= end):
+                months.append(month)
+        return sorted(months)
+
+    def read(self, month: date) -> Tuple[List[ArchivedSale], List[ArchivedItem]]:
+        """Vendas do mês na ordem (data_hora, id) e os seus itens (vazio se o mês não foi arquivado)"""
+        try:
+            return decode_month(self.path(month).read_bytes())
+        except FileNotFoundError:
+            return [], []
+
+    def write(self, month: date, sales: Iterable[ArchivedSale], items: Iterable[ArchivedItem]):
+        """Grava o mês inteiro; troca o arquivo de uma vez (leitores nunca veem um arquivo pela metade)"""
+        sales = sorted(sales, key=lambda sale: (sale.data_hora, sale.id))
+        position = {sale.id: n for n, sale in enumerate(sales)}
+        items = sorted(items, key=lambda item: (position[item.venda_id], item.id))
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.path(month)
+        partial = path.with_name(path.name + ".tmp")
+        with open(partial, "wb") as file:
+            file.write(encode_month(sales, items))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(partial, path)
+
+    def read_period(self, start: Optional[date] = None, end: Optional[date] = None) -> Iterator[List[ArchivedEntry]]:
+        """Vendas arquivadas de start a end (inclusive), com os itens: uma lista por mês, em ordem"""
+        lower = datetime.combine(start, time.min) if start else None
+        upper = datetime.combine(end + timedelta(days=1), time.min) if end else None
+        for month in self.months(start, end):
+            sales, items = self.read(month)
+            items_by_sale: Dict[int, List[ArchivedItem]] = {}
+            for item in items:
+                items_by_sale.setdefault(item.venda_id, []).append(item)
+            # Mesmo critério das consultas: data/hora local, sem fuso
+            yield [
+                (sale, items_by_sale.get(sale.id, []))
+                for sale in sales
+                if (lower is None or sale.data_hora.replace(tzinfo=None) >= lower)
+                and (upper is None or sale.data_hora.replace(tzinfo=None) < upper)
+            ]
+
+sales_archive = SalesArchive()
+
+def _in_month(month: date) -> tuple:
+    """Filtro das vendas do mês (data/hora local)"""
+    start = datetime.combine(month, time.min)
+    end = datetime.combine(next_month(month), time.min)
+    return Sale.data_hora >= start, Sale.data_hora < end
+
+def read_archived_period(db: Session, start: Optional[date] = None, end: Optional[date] = None) -> Iterator[List[ArchivedEntry]]:
+    """Como SalesArchive.read_period, sem as vendas que ainda estão nas tabelas.
+
+    O arquivo do mês é gravado antes de o DELETE ser confirmado: se a
+    confirmação falhar, a venda fica nos dois lugares até o próximo
+    arquivamento, e vale a cópia das tabelas (quem lê as duas não duplica).
+    """
+    for entries in sales_archive.read_period(start, end):
+        if entries:
+            month = month_start(entries[0][0].data_hora.date())
+            live = set(db.scalars(select(Sale.id).where(*_in_month(month))))
+            entries = [entry for entry in entries if entry[0].id not in live]
+        yield entries
+
+def _archive_month(db: Session, month: date) -> int:
+    """Move as vendas do mês para o arquivo e as apaga das tabelas"""
+    in_month = _in_month(month)
+
+    sales = [ArchivedSale._make(row) for row in db.execute(
+        select(*(getattr(Sale, name) for name in ArchivedSale._fields)).where(*in_month)
+    )]
+    if not sales:
+        return 0
+    sale_ids = {sale.id for sale in sales}
+    # Vendas gravadas depois da leitura acima ficam para a próxima execução
+    items = [ArchivedItem._make(row) for row in db.execute(
+        select(*(getattr(SaleItem, name) for name in ArchivedItem._fields))
+        .join(Sale, SaleItem.venda_id == Sale.id)
+        .where(*in_month)
+    ) if row.venda_id in sale_ids]
+
+    # Meses já arquivados recebem as vendas que chegaram atrasadas (ex.: lote
+    # de caixa offline); repetir após uma falha não duplica vendas. Até o
+    # commit abaixo, read_archived_period ignora no arquivo as vendas ainda
+    # presentes nas tabelas
+    archived_sales, archived_items = sales_archive.read(month)
+    merged_sales = {sale.id: sale for sale in archived_sales + sales}
+    merged_items = {item.id: item for item in archived_items + items}
+    sales_archive.write(month, merged_sales.values(), merged_items.values())
+
+    ids = sorted(sale_ids)
+    for n in range(0, len(ids), DELETE_CHUNK_SIZE):
+        chunk = ids[n:n + DELETE_CHUNK_SIZE]
+        # Chaves de idempotência antigas não têm mais venda para devolver
+        db.execute(delete(IdempotencyKey).where(IdempotencyKey.venda_id.in_(chunk)))
+        db.execute(delete(SaleItem).where(SaleItem.venda_id.in_(chunk)))
+        db.execute(delete(Sale).where(Sale.id.in_(chunk)))
+    db.commit()
+    return len(sales)
+
+def archive_sales(db: Session, months_to_keep: int = SALES_ARCHIVE_MONTHS, today: Optional[date] = None) -> Dict[date, int]:
+    """Arquiva as vendas dos meses anteriores aos `months_to_keep` meses mais recentes.
+
+    Um mês por transação. Retorna quantas vendas foram arquivadas em cada mês.
+    """
+    if months_to_keep < 0:
+        raise ValueError("Número de meses mantidos não pode ser negativo")
+    cutoff = _months_before(month_start(today or date.today()), months_to_keep)
+    first = db.scalar(select(func.min(Sale.data_hora)).where(Sale.data_hora < datetime.combine(cutoff, time.min)))
+
+    archived = {}
+    month = month_start(first.date()) if first else cutoff
+    while month < cutoff:
+        count = _archive_month(db, month)
+        if count:
+            archived[month] = count
+        month = next_month(month)
+    return archived
@@ -1,39 +1,83 @@
 from datetime import datetime, timedelta
 from typing import Optional
 from sqlalchemy.orm import Session
-from passlib.context import CryptContext
 from jose import JWTError, jwt
+from ..cache import TTLCache
+from ..database import run_db
+from ..metrics import LatencyStats
+from ..passwords import password_hasher
+from .report_cache import report_cache
 from ..models.user import User
-from ..schemas.user import UserCreate
+from ..schemas.user import UserCreate, UserUpdate, CurrentUser
 import os
+import threading
+import time
 
 # Configurações de segurança
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-# Contexto para hash de senhas - usando pbkdf2_sha256 por ser mais compatível
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+# Cache do usuário autenticado por email (sub do token): evita um SELECT por requisição
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", "1024"))
+_user_cache = TTLCache(maxsize=USER_CACHE_MAX_SIZE, ttl=USER_CACHE_TTL_SECONDS)
+# Muda a cada invalidação: usuário lido do banco antes dela não entra no cache
+_user_cache_lock = threading.Lock()
+_user_cache_generation = 0
+
+# Latência do login completo (busca do usuário + verificação da senha)
+login_latency = LatencyStats()
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verifica se a senha plain corresponde ao hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_hasher.verify(plain_password, hashed_password)[0]
 
 def get_password_hash(password: str) -> str:
-    """Gera hash da senha"""
-    return pwd_context.hash(password)
+    """Gera hash da senha (pbkdf2_sha256, na thread atual)"""
+    return password_hasher.hash(password)
+
+def _get_user_by_email(db: Session, email: str) -> Optional[User]:
+    return db.query(User).filter(User.email == email).first()
+
+def _store_password_hash(db: Session, user: User, new_hash: str):
+    """Grava o hash refeito com o custo configurado"""
+    user.senha_hash = new_hash
+    db.commit()
+    db.refresh(user)
 
 def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
     """Autentica usuário por email e senha"""
-    user = db.query(User).filter(User.email == email).first()
+    user = _get_user_by_email(db, email)
     if not user:
         return None
     # Truncar senha para 72 caracteres (limite bcrypt)
     password = password[:72] if len(password) > 72 else password
-    if not verify_password(password, user.senha_hash):
+    valid, new_hash = password_hasher.verify(password, user.senha_hash)
+    if not valid:
         return None
+    if new_hash:
+        _store_password_hash(db, user, new_hash)
     return user
 
+async def authenticate_user_async(db, email: str, password: str) -> Optional[User]:
+    """Como authenticate_user, para as rotas: a verificação roda no pool de
+    processos e é aguardada sem ocupar o threadpool do checkout"""
+    started = time.perf_counter()
+    try:
+        user = await run_db(db, _get_user_by_email, email)
+        if not user:
+            return None
+        password = password[:72] if len(password) > 72 else password
+        valid, new_hash = await password_hasher.verify_async(password, user.senha_hash)
+        if not valid:
+            return None
+        if new_hash:
+            await run_db(db, _store_password_hash, user, new_hash)
+        return user
+    finally:
+        login_latency.record(time.perf_counter() - started)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Cria token JWT"""
     to_encode = data.copy()
@@ -46,8 +90,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def create_user(db: Session, user_data: UserCreate) -> User:
-    """Cria novo usuário"""
+def _check_new_user(db: Session, user_data: UserCreate):
+    """Valida perfil e email antes de calcular o hash"""
     # Verificar se perfil é válido
     if user_data.perfil not in ["vendedor", "gerente"]:
         raise ValueError("Perfil deve ser 'vendedor' ou 'gerente'")
@@ -57,9 +101,7 @@ def create_user(db: Session, user_data: UserCreate) -> User:
     if existing_user:
         raise ValueError("Email já cadastrado")
 
-    # Criar usuário - truncar senha para 72 caracteres (limite bcrypt)
-    password = user_data.senha[:72] if len(user_data.senha) > 72 else user_data.senha
-    hashed_password = get_password_hash(password)
+def _insert_user(db: Session, user_data: UserCreate, hashed_password: str) -> User:
     user = User(
         nome=user_data.nome,
         email=user_data.email,
@@ -72,7 +114,66 @@ def create_user(db: Session, user_data: UserCreate) -> User:
     db.refresh(user)
     return user
 
-def get_current_user(token: str, db: Session) -> Optional[User]:
+def create_user(db: Session, user_data: UserCreate) -> User:
+    """Cria novo usuário"""
+    _check_new_user(db, user_data)
+    # Truncar senha para 72 caracteres (limite bcrypt)
+    password = user_data.senha[:72] if len(user_data.senha) > 72 else user_data.senha
+    return _insert_user(db, user_data, get_password_hash(password))
+
+async def create_user_async(db, user_data: UserCreate) -> User:
+    """Como create_user, para as rotas: o hash roda no pool de processos e é
+    aguardado sem ocupar o threadpool do checkout"""
+    await run_db(db, _check_new_user, user_data)
+    password = user_data.senha[:72] if len(user_data.senha) > 72 else user_data.senha
+    hashed_password = await password_hasher.hash_async(password)
+    return await run_db(db, _insert_user, user_data, hashed_password)
+
+def update_user(db: Session, user_id: int, user_data: UserUpdate) -> User:
+    """Atualiza usuário (perfil, ativo, dados cadastrais)"""
+    user = db.query(User).filter(User.id == user_id).first()
+    if not user:
+        raise ValueError("Usuário não encontrado")
+
+    if user_data.perfil is not None and user_data.perfil not in ["vendedor", "gerente"]:
+        raise ValueError("Perfil deve ser 'vendedor' ou 'gerente'")
+
+    if user_data.email is not None:
+        existing = db.query(User).filter(User.email == user_data.email, User.id != user_id).first()
+        if existing:
+            raise ValueError("Email já cadastrado")
+
+    old_email = user.email
+    update_data = user_data.model_dump(exclude_unset=True)
+    for field, value in update_data.items():
+        setattr(user, field, value)
+
+    db.commit()
+    db.refresh(user)
+
+    # Perfil ou status alterado precisa valer já na próxima requisição
+    invalidate_user_cache(old_email)
+    invalidate_user_cache(user.email)
+    if "nome" in update_data:
+        # Relatórios em cache guardam o nome do vendedor
+        report_cache.clear()
+    return user
+
+def invalidate_user_cache(email: str):
+    """Remove o usuário do cache de autenticação"""
+    global _user_cache_generation
+    with _user_cache_lock:
+        _user_cache_generation += 1
+        _user_cache.pop(email)
+
+def clear_user_cache():
+    """Esvazia o cache de autenticação"""
+    global _user_cache_generation
+    with _user_cache_lock:
+        _user_cache_generation += 1
+        _user_cache.clear()
+
+def get_current_user(token: str, db: Session) -> Optional[CurrentUser]:
     """Obtém usuário atual do token JWT"""
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
@@ -82,5 +183,15 @@ def get_current_user(token: str, db: Session) -> Optional[User]:
     except JWTError:
         return None
 
-    user = db.query(User).filter(User.email == email).first()
-    return user
+    current_user = _user_cache.get(email)
+    if current_user is None:
+        generation = _user_cache_generation
+        user = db.query(User).filter(User.email == email).first()
+        if not user:
+            return None
+        current_user = CurrentUser.model_validate(user)
+        with _user_cache_lock:
+            # Invalidado durante a leitura (ex.: usuário desativado): não guarda o valor antigo
+            if generation == _user_cache_generation:
+                _user_cache.set(email, current_user)
+    return current_user
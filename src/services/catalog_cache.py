@@ -0,0 +1,95 @@
+from sqlalchemy.orm import Session
+from ..cache import TTLCache
+from ..models.product import Product
+from ..schemas.product import ProductResponse
+from collections import Counter
+from typing import Iterable, Optional
+import os
+import threading
+
+# Índice do catálogo em memória (por worker). O TTL limita quanto tempo um
+# worker pode ver dados alterados por outro worker.
+CATALOG_CACHE_TTL_SECONDS = float(os.getenv("CATALOG_CACHE_TTL_SECONDS", "30"))
+CATALOG_CACHE_MAX_SIZE = int(os.getenv("CATALOG_CACHE_MAX_SIZE", "100000"))
+
+class CatalogIndex:
+    """Índice de produtos por ID e por código de barras para a leitura no caixa"""
+
+    def __init__(self, maxsize: int = CATALOG_CACHE_MAX_SIZE, ttl: Optional[float] = CATALOG_CACHE_TTL_SECONDS):
+        self._by_id = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._by_barcode = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._counters = Counter()
+        self._lock = threading.Lock()
+
+    def _count(self, name: str, found: bool):
+        with self._lock:
+            self._counters[f"{name}_{'acertos' if found else 'falhas'}"] += 1
+
+    def _store(self, product: Product) -> ProductResponse:
+        snapshot = ProductResponse.model_validate(product)
+        self._by_id.set(snapshot.id, snapshot)
+        if snapshot.codigo_barras:
+            self._by_barcode.set(snapshot.codigo_barras, snapshot.id)
+        return snapshot
+
+    def warm(self, db: Session) -> int:
+        """Carrega todos os produtos ativos; retorna quantos foram indexados"""
+        products = db.query(Product).filter(Product.ativo == True).all()
+        for product in products:
+            self._store(product)
+        return len(products)
+
+    def peek_id(self, product_id: int) -> Optional[ProductResponse]:
+        """Produto em cache pelo ID (sem acessar o banco)"""
+        snapshot = self._by_id.get(product_id)
+        self._count("id", snapshot is not None)
+        return snapshot
+
+    def load_id(self, db: Session, product_id: int) -> Optional[ProductResponse]:
+        """Busca o produto no banco e guarda no índice"""
+        product = db.query(Product).filter(Product.id == product_id).first()
+        return self._store(product) if product else None
+
+    def peek_barcode(self, barcode: str) -> Optional[ProductResponse]:
+        """Produto em cache pelo código de barras (sem acessar o banco)"""
+        product_id = self._by_barcode.get(barcode)
+        snapshot = self._by_id.get(product_id) if product_id is not None else None
+        # O código pode ter mudado desde que o índice foi preenchido
+        if snapshot is not None and snapshot.codigo_barras != barcode:
+            snapshot = None
+        self._count("codigo_barras", snapshot is not None)
+        return snapshot
+
+    def load_barcode(self, db: Session, barcode: str) -> Optional[ProductResponse]:
+        """Busca o produto no banco pelo código de barras e guarda no índice"""
+        product = db.query(Product).filter(Product.codigo_barras == barcode).first()
+        return self._store(product) if product else None
+
+    def invalidate(self, product_ids: Iterable[int]):
+        """Descarta produtos alterados (cadastro, estoque ou venda)"""
+        for product_id in product_ids:
+            snapshot = self._by_id.pop(product_id)
+            if snapshot is not None and snapshot.codigo_barras:
+                self._by_barcode.pop(snapshot.codigo_barras)
+
+    def clear(self):
+        """Esvazia o índice"""
+        self._by_id.clear()
+        self._by_barcode.clear()
+        with self._lock:
+            self._counters.clear()
+
+    def stats(self) -> dict:
+        """Tamanho do índice e acertos/falhas das buscas por ID e por código de barras"""
+        with self._lock:
+            counters = dict(self._counters)
+        return {
+            "produtos": len(self._by_id),
+            "codigos_barras": len(self._by_barcode),
+            "id_acertos": counters.get("id_acertos", 0),
+            "id_falhas": counters.get("id_falhas", 0),
+            "codigo_barras_acertos": counters.get("codigo_barras_acertos", 0),
+            "codigo_barras_falhas": counters.get("codigo_barras_falhas", 0)
+        }
+
+catalog = CatalogIndex()
@@ -0,0 +1,153 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import select
+from ..models.sale import Sale
+from ..models.sale_item import SaleItem
+from ..models.product import Product
+from ..models.user import User
+from .archive_service import read_archived_period, sales_archive
+from datetime import date, datetime, time, timedelta
+from typing import Iterator, NamedTuple, Optional
+from itertools import chain, groupby, islice
+import csv
+import heapq
+import io
+import json
+
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_CSV_COLUMNS = [
+    "venda_id", "data_hora", "vendedor", "metodo_pagamento", "status", "total",
+    "produto_id", "produto", "quantidade", "preco_unitario", "subtotal"
+]
+
+class ExportRow(NamedTuple):
+    """Linha de exportação de uma venda arquivada (mesmas posições da consulta)"""
+    id: int
+    data_hora: datetime
+    vendedor: str
+    metodo_pagamento: str
+    status: str
+    total: float
+    produto_id: Optional[int]
+    produto: Optional[str]
+    quantidade: Optional[float]
+    preco_unitario: Optional[float]
+    subtotal: Optional[float]
+
+def _export_rows(db: Session, start_date: date, end_date: date):
+    """Linhas (venda + item) do período, lidas do cursor em lotes.
+
+    Seleciona colunas em vez de entidades: nada fica no identity map, então a
+    memória não cresce com o tamanho do período.
+    """
+    start = datetime.combine(start_date, time.min)
+    end = datetime.combine(end_date + timedelta(days=1), time.min)
+    stmt = (
+        select(
+            Sale.id, Sale.data_hora, User.nome, Sale.metodo_pagamento, Sale.status, Sale.total,
+            SaleItem.produto_id, Product.nome, SaleItem.quantidade, SaleItem.preco_unitario,
+            SaleItem.subtotal
+        )
+        .join(User, User.id == Sale.usuario_id)
+        .outerjoin(SaleItem, SaleItem.venda_id == Sale.id)
+        .outerjoin(Product, Product.id == SaleItem.produto_id)
+        .where(Sale.data_hora >= start, Sale.data_hora < end)
+        .order_by(Sale.data_hora, Sale.id, SaleItem.id)
+        # yield_per liga stream_results: cursor do lado do servidor no PostgreSQL
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    return db.execute(stmt)
+
+def _archived_rows(db: Session, start_date: date, end_date: date) -> Iterator[ExportRow]:
+    """Linhas das vendas arquivadas do período, com os nomes atuais de vendedor e produto"""
+    for month in read_archived_period(db, start_date, end_date):
+        if not month:
+            continue
+        user_ids = {sale.usuario_id for sale, _ in month}
+        product_ids = {item.produto_id for _, items in month for item in items}
+        users = dict(db.execute(select(User.id, User.nome).where(User.id.in_(user_ids))).all())
+        products = dict(db.execute(select(Product.id, Product.nome).where(Product.id.in_(product_ids))).all())
+
+        for sale, items in month:
+            head = (sale.id, sale.data_hora, users.get(sale.usuario_id), sale.metodo_pagamento, sale.status, sale.total)
+            if not items:
+                yield ExportRow(*head, None, None, None, None, None)
+            for item in items:
+                yield ExportRow(
+                    *head, item.produto_id, products.get(item.produto_id), item.quantidade,
+                    item.preco_unitario, item.subtotal
+                )
+
+def _batches(db: Session, start_date: date, end_date: date, rows) -> Iterator[list]:
+    """Lotes de linhas do período: arquivo e tabelas intercalados por (data_hora, id)"""
+    if not sales_archive.months(start_date, end_date):
+        yield from rows.partitions()
+        return
+
+    live = (row for partition in rows.partitions() for row in partition)
+    merged = heapq.merge(_archived_rows(db, start_date, end_date), live, key=lambda row: (row.data_hora, row[0]))
+    while batch := list(islice(merged, EXPORT_BATCH_SIZE)):
+        yield batch
+
+def _iter_csv(batches) -> Iterator[str]:
+    """Uma linha de CSV por item vendido"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_CSV_COLUMNS)
+    yield buffer.getvalue()
+
+    for partition in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        for row in partition:
+            values = list(row)
+            values[1] = values[1].isoformat()
+            writer.writerow(values)
+        yield buffer.getvalue()
+
+def _iter_ndjson(batches) -> Iterator[str]:
+    """Uma linha de JSON por venda, com os itens aninhados"""
+    lines = []
+    for sale_id, sale_rows in groupby(chain.from_iterable(batches), key=lambda row: row[0]):
+        itens = []
+        for row in sale_rows:
+            if row.produto_id is not None:
+                itens.append({
+                    "produto_id": row.produto_id,
+                    "produto": row[7],
+                    "quantidade": row.quantidade,
+                    "preco_unitario": row.preco_unitario,
+                    "subtotal": row.subtotal
+                })
+        lines.append(json.dumps({
+            "id": sale_id,
+            "data_hora": row.data_hora.isoformat(),
+            "vendedor": row[2],
+            "metodo_pagamento": row.metodo_pagamento,
+            "status": row.status,
+            "total": row.total,
+            "itens": itens
+        }, ensure_ascii=False) + "\n")
+
+        if len(lines) >= EXPORT_BATCH_SIZE:
+            yield "".join(lines)
+            lines = []
+    if lines:
+        yield "".join(lines)
+
+def export_sales(db: Session, start_date: date, end_date: date, formato: str) -> Iterator[str]:
+    """Exporta as vendas do período em blocos de texto (CSV ou NDJSON), incluindo as arquivadas"""
+    if formato not in ("csv", "ndjson"):
+        raise ValueError("Formato deve ser 'csv' ou 'ndjson'")
+    if start_date > end_date:
+        raise ValueError("Data inicial deve ser anterior à data final")
+
+    def generate():
+        rows = _export_rows(db, start_date, end_date)
+        try:
+            batches = _batches(db, start_date, end_date, rows)
+            yield from _iter_csv(batches) if formato == "csv" else _iter_ndjson(batches)
+        finally:
+            rows.close()
+
+    return generate()
@@ -0,0 +1,75 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+from ..models.idempotency_key import IdempotencyKey
+from ..schemas.sale import SaleCreate, SaleResponse
+from ..cache import TTLCache
+from .sale_service import create_sale, get_sale_by_id, format_sale_response
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+import hashlib
+import os
+
+# Respostas recentes ficam em memória: a retentativa do caixa não toca o banco
+IDEMPOTENCY_CACHE_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_CACHE_TTL_SECONDS", "3600"))
+IDEMPOTENCY_CACHE_MAX_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_MAX_SIZE", "10000"))
+
+_responses = TTLCache(maxsize=IDEMPOTENCY_CACHE_MAX_SIZE, ttl=IDEMPOTENCY_CACHE_TTL_SECONDS)
+
+def _request_hash(sale_data: SaleCreate) -> str:
+    """Impressão digital da venda enviada com a chave"""
+    return hashlib.sha256(sale_data.model_dump_json().encode()).hexdigest()
+
+def _check_hash(stored_hash: str, request_hash: str):
+    if stored_hash != request_hash:
+        raise ValueError("Idempotency-Key já usada em outra venda")
+
+def _stored_response(db: Session, user_id: int, key: str, request_hash: str) -> Optional[SaleResponse]:
+    """Resposta da venda já registrada com a chave (ou None se a chave é nova)"""
+    stored = db.get(IdempotencyKey, (user_id, key))
+    if stored is None:
+        return None
+    _check_hash(stored.hash_requisicao, request_hash)
+    return format_sale_response(get_sale_by_id(db, stored.venda_id))
+
+def create_sale_idempotent(db: Session, sale_data: SaleCreate, user_id: int, key: str) -> SaleResponse:
+    """Cria a venda uma única vez por (vendedor, Idempotency-Key).
+
+    Repetições devolvem a resposta original sem refazer a venda: primeiro da
+    memória, depois da tabela de chaves. Duas requisições simultâneas com a
+    mesma chave disputam a linha da chave; a perdedora devolve a venda da outra.
+    """
+    request_hash = _request_hash(sale_data)
+    cached = _responses.get((user_id, key))
+    if cached is not None:
+        stored_hash, response = cached
+        _check_hash(stored_hash, request_hash)
+        return response
+
+    response = _stored_response(db, user_id, key, request_hash)
+    if response is None:
+        try:
+            sale = create_sale(db, sale_data, user_id, idempotency_key=IdempotencyKey(
+                usuario_id=user_id, chave=key, hash_requisicao=request_hash
+            ))
+            response = format_sale_response(sale)
+        except IntegrityError:
+            db.rollback()
+            response = _stored_response(db, user_id, key, request_hash)
+            if response is None:
+                raise
+
+    _responses.set((user_id, key), (request_hash, response))
+    return response
+
+def purge_idempotency_keys(db: Session, older_than_days: int) -> int:
+    """Apaga chaves mais antigas que o prazo em que o caixa ainda pode repetir"""
+    limit = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+    removed = db.execute(delete(IdempotencyKey).where(IdempotencyKey.criado_em < limit)).rowcount
+    db.commit()
+    clear_idempotency_cache()
+    return removed
+
+def clear_idempotency_cache():
+    """Esvazia as respostas guardadas em memória"""
+    _responses.clear()
@@ -0,0 +1,194 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from pydantic import ValidationError
+from ..database import dialect_insert
+from ..models.product import Product, search_key
+from ..schemas.product import ProductCreate, ProductImportError, ProductImportResult
+from .catalog_cache import catalog
+from .report_cache import report_cache
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Set, Tuple
+import codecs
+import csv
+import json
+import time
+
+IMPORT_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+# Colunas que a importação atualiza num produto já cadastrado, se vierem no arquivo
+UPDATABLE_COLUMNS = ("nome", "preco", "estoque")
+
+NOT_UTF8 = "Texto fora do UTF-8 (salve o arquivo como CSV UTF-8)"
+MISSING_BARCODE = "codigo_barras: obrigatório na importação (identifica o produto ao reimportar)"
+
+def _decoded_lines(file: BinaryIO, bad_lines: Set[int]) -> Iterator[str]:
+    """Linhas do arquivo como texto UTF-8; as que não decodificam vão para bad_lines"""
+    for line_number, raw in enumerate(file, start=1):
+        if line_number == 1 and raw.startswith(codecs.BOM_UTF8):
+            raw = raw[len(codecs.BOM_UTF8):]
+        try:
+            yield raw.decode("utf-8")
+        except UnicodeDecodeError:
+            bad_lines.add(line_number)
+            yield raw.decode("utf-8", errors="replace")
+
+def iter_import_rows(file: BinaryIO, formato: str) -> Iterator[Tuple[int, object]]:
+    """Lê o arquivo linha a linha, sem carregá-lo inteiro em memória.
+
+    Gera (número da linha, dados); linhas ilegíveis (JSON ou CSV inválido,
+    texto fora do UTF-8) geram um ValueError no lugar dos dados, para virar
+    erro daquela linha. Cabeçalho de CSV ilegível levanta ValueError.
+    """
+    if formato not in ("csv", "ndjson"):
+        raise ValueError("Formato deve ser 'csv' ou 'ndjson'")
+    bad_lines: Set[int] = set()
+    lines = _decoded_lines(file, bad_lines)
+
+    if formato == "csv":
+        reader = csv.DictReader(lines)
+        try:
+            reader.fieldnames
+        except csv.Error as e:
+            raise ValueError(f"Cabeçalho do CSV inválido: {e}")
+        if bad_lines:
+            raise ValueError(NOT_UTF8)
+        last_line = reader.line_num
+        while True:
+            try:
+                row = next(reader)
+            except StopIteration:
+                return
+            except csv.Error as e:
+                yield last_line + 1, ValueError(f"CSV inválido: {e}")
+                last_line = reader.line_num
+                continue
+            # Uma linha do CSV pode ocupar várias linhas do arquivo (campos entre aspas)
+            if bad_lines:
+                bad_lines.clear()
+                yield reader.line_num, ValueError(NOT_UTF8)
+            else:
+                yield reader.line_num, {key: value for key, value in row.items() if key}
+            last_line = reader.line_num
+    else:
+        for line_number, line in enumerate(lines, start=1):
+            if line_number in bad_lines:
+                yield line_number, ValueError(NOT_UTF8)
+                continue
+            if not line.strip():
+                continue
+            try:
+                yield line_number, json.loads(line)
+            except ValueError as e:
+                yield line_number, ValueError(f"JSON inválido: {e}")
+
+def _parse_row(data) -> ProductCreate:
+    """Valida uma linha do arquivo contra ProductCreate"""
+    if isinstance(data, Exception):
+        raise data
+    if not isinstance(data, dict):
+        raise ValueError("Linha deve ser um objeto")
+    # Células vazias do CSV contam como ausentes
+    data = {key: value for key, value in data.items() if value not in ("", None)}
+    return ProductCreate(**data)
+
+def _upsert(db: Session, products: List[ProductCreate], columns: Tuple[str, ...]) -> List[int]:
+    """Um upsert por código de barras; produtos já cadastrados recebem só `columns`.
+
+    Estoque de produto existente só muda se o arquivo trouxer a coluna (o normal
+    é a entrada de estoque), e produtos desativados continuam desativados.
+    """
+    # Sem .values(): o mesmo comando compilado é reaproveitado e o SQLAlchemy
+    # envia as linhas do lote em INSERTs multi-linha (insertmanyvalues)
+    stmt = dialect_insert(db, Product)
+    updates = {column: stmt.excluded[column] for column in columns}
+    if "nome" in columns:
+        updates["nome_busca"] = stmt.excluded.nome_busca
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["codigo_barras"],
+        set_={**updates, "atualizado_em": func.now()}
+    ).returning(Product.id)
+    rows = [
+        {**product.model_dump(), "nome_busca": search_key(product.nome), "ativo": True}
+        for product in products
+    ]
+    return list(db.scalars(stmt, rows))
+
+def _write_chunk(db: Session, products: List[ProductCreate]) -> Tuple[int, int]:
+    """Grava um lote: um upsert por conjunto de colunas presentes (em geral, um só)"""
+    barcodes = [p.codigo_barras for p in products]
+    existing = set(db.scalars(select(Product.codigo_barras).where(Product.codigo_barras.in_(barcodes))))
+
+    groups: Dict[Tuple[str, ...], List[ProductCreate]] = {}
+    for product in products:
+        columns = tuple(column for column in UPDATABLE_COLUMNS if column in product.model_fields_set)
+        groups.setdefault(columns, []).append(product)
+    product_ids = []
+    for columns, group in groups.items():
+        product_ids.extend(_upsert(db, group, columns))
+    db.commit()
+
+    catalog.invalidate(product_ids)
+    if existing:
+        # Produtos atualizados podem ter mudado de nome, que os relatórios em cache guardam
+        report_cache.clear()
+    updated = len(existing)
+    return len(products) - updated, updated
+
+def import_products(db: Session, rows: Iterable[Tuple[int, object]], chunk_size: int = IMPORT_CHUNK_SIZE) -> ProductImportResult:
+    """Importa produtos em lotes, pelo código de barras; linhas inválidas ou sem código são reportadas e ignoradas"""
+    started = time.perf_counter()
+    total = inserted = updated = failed = 0
+    errors: List[ProductImportError] = []
+    seen_barcodes = set()
+    chunk: List[ProductCreate] = []
+
+    def reject(line_number: int, message: str):
+        nonlocal failed
+        failed += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append(ProductImportError(linha=line_number, erro=message))
+
+    for line_number, data in rows:
+        total += 1
+        try:
+            product = _parse_row(data)
+        except ValidationError as e:
+            reject(line_number, "; ".join(
+                f"{'.'.join(str(loc) for loc in error['loc'])}: {error['msg']}" for error in e.errors()
+            ))
+            continue
+        except (TypeError, ValueError) as e:
+            reject(line_number, str(e))
+            continue
+
+        # O código de barras é a chave do upsert: sem ele, reimportar o arquivo
+        # (o normal após uma falha parcial) duplicaria o produto
+        if not product.codigo_barras:
+            reject(line_number, MISSING_BARCODE)
+            continue
+        if product.codigo_barras in seen_barcodes:
+            reject(line_number, f"Código de barras {product.codigo_barras} repetido no arquivo")
+            continue
+        seen_barcodes.add(product.codigo_barras)
+
+        chunk.append(product)
+        if len(chunk) >= chunk_size:
+            chunk_inserted, chunk_updated = _write_chunk(db, chunk)
+            inserted += chunk_inserted
+            updated += chunk_updated
+            chunk = []
+
+    if chunk:
+        chunk_inserted, chunk_updated = _write_chunk(db, chunk)
+        inserted += chunk_inserted
+        updated += chunk_updated
+
+    elapsed = time.perf_counter() - started
+    return ProductImportResult(
+        total_linhas=total,
+        inseridos=inserted,
+        atualizados=updated,
+        linhas_com_erro=failed,
+        erros=errors,
+        segundos=round(elapsed, 3),
+        linhas_por_segundo=round(total / elapsed, 1) if elapsed > 0 else 0.0
+    )
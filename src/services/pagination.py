@@ -0,0 +1,27 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional
+
+def encode_cursor(*values) -> str:
+    """Gera cursor opaco a partir dos valores da última linha da página"""
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> list:
+    """Lê os valores de um cursor gerado por encode_cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except ValueError:
+        raise ValueError("Cursor inválido")
+    if not isinstance(values, list):
+        raise ValueError("Cursor inválido")
+    return values
+
+def next_cursor(rows: list, limit: int, *fields) -> Optional[str]:
+    """Cursor da próxima página, ou None se esta for a última"""
+    if len(rows) < limit:
+        return None
+    last = rows[-1]
+    return encode_cursor(*(getattr(last, field) for field in fields))
@@ -1,11 +1,72 @@
 from sqlalchemy.orm import Session
-from ..models.product import Product
-from ..schemas.product import ProductCreate, ProductUpdate, StockEntry
-from typing import List
-
-def get_products(db: Session, skip: int = 0, limit: int = 100) -> List[Product]:
-    """Lista todos os produtos ativos"""
-    return db.query(Product).filter(Product.ativo == True).offset(skip).limit(limit).all()
+from sqlalchemy import case, func, update
+from ..models.product import Product, search_key
+from ..schemas.product import ProductCreate, ProductUpdate, ProductResponse, StockEntry
+from .pagination import decode_cursor, next_cursor
+from .catalog_cache import catalog
+from .report_cache import report_cache
+from typing import Dict, List, Optional
+
+def get_products(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> List[Product]:
+    """Lista todos os produtos ativos (paginação por skip ou por cursor)"""
+    query = db.query(Product).filter(Product.ativo == True).order_by(Product.id)
+
+    if cursor:
+        # Keyset: continua depois do último ID visto, sem descartar linhas
+        query = query.filter(Product.id > _decode_product_cursor(cursor))
+    else:
+        query = query.offset(skip)
+
+    return query.limit(limit).all()
+
+def _decode_product_cursor(cursor: str) -> int:
+    """Lê o ID do cursor de produtos"""
+    values = decode_cursor(cursor)
+    try:
+        (product_id,) = values
+        return int(product_id)
+    except (TypeError, ValueError):
+        raise ValueError("Cursor inválido")
+
+def next_products_cursor(products: List[Product], limit: int) -> Optional[str]:
+    """Cursor da página seguinte de produtos"""
+    return next_cursor(products, limit, "id")
+
+def search_products(db: Session, q: str, limit: int = 20) -> List[Product]:
+    """Busca produtos ativos pelo nome, sem diferenciar acentos e maiúsculas.
+
+    Todos os termos precisam aparecer no nome. Ordem: nome igual à busca,
+    nome começando pela busca, palavra começando pela busca, demais; depois
+    nomes mais curtos primeiro.
+    """
+    key = " ".join(search_key(q).split())
+    if not key:
+        return []
+
+    filters = [Product.ativo == True]
+    filters += [Product.nome_busca.contains(term, autoescape=True) for term in key.split()]
+    rank = case(
+        (Product.nome_busca == key, 0),
+        (Product.nome_busca.startswith(key, autoescape=True), 1),
+        (Product.nome_busca.contains(" " + key, autoescape=True), 2),
+        else_=3
+    )
+    return db.query(Product).filter(*filters).order_by(
+        rank, func.length(Product.nome_busca), Product.nome_busca, Product.id
+    ).limit(limit).all()
+
+def reindex_product_search(db: Session, batch_size: int = 1000) -> int:
+    """Preenche nome_busca dos produtos cadastrados antes da busca por nome"""
+    updated = 0
+    while True:
+        products = db.query(Product.id, Product.nome).filter(Product.nome_busca == None).limit(batch_size).all()
+        if not products:
+            return updated
+        db.execute(update(Product), [
+            {"id": product.id, "nome_busca": search_key(product.nome)} for product in products
+        ])
+        db.commit()
+        updated += len(products)
 
 def get_product_by_id(db: Session, product_id: int) -> Product:
     """Busca produto por ID"""
@@ -27,6 +88,7 @@ def create_product(db: Session, product_data: ProductCreate) -> Product:
     db.add(product)
     db.commit()
     db.refresh(product)
+    catalog.invalidate([product.id])
     return product
 
 def update_product(db: Session, product_id: int, product_data: ProductUpdate) -> Product:
@@ -50,6 +112,10 @@ def update_product(db: Session, product_id: int, product_data: ProductUpdate) ->
 
     db.commit()
     db.refresh(product)
+    catalog.invalidate([product_id])
+    if "nome" in update_data:
+        # Relatórios em cache guardam o nome do produto
+        report_cache.clear()
     return product
 
 def delete_product(db: Session, product_id: int) -> bool:
@@ -60,23 +126,37 @@ def delete_product(db: Session, product_id: int) -> bool:
 
     product.ativo = False
     db.commit()
+    catalog.invalidate([product_id])
     return True
 
-def add_stock(db: Session, stock_entries: List[StockEntry]) -> List[Product]:
-    """Adiciona estoque aos produtos"""
-    updated_products = []
-
+def add_stock(db: Session, stock_entries: List[StockEntry]) -> List[ProductResponse]:
+    """Adiciona estoque aos produtos em um único UPDATE (entrada de mercadorias)"""
+    # Linhas repetidas do mesmo produto são somadas
+    quantities: Dict[int, float] = {}
     for entry in stock_entries:
-        product = get_product_by_id(db, entry.produto_id)
-        if not product:
-            raise ValueError(f"Produto {entry.produto_id} não encontrado")
-
-        product.estoque += entry.quantidade
-        updated_products.append(product)
-
+        quantities[entry.produto_id] = quantities.get(entry.produto_id, 0.0) + entry.quantidade
+
+    if not quantities:
+        return []
+
+    stmt = (
+        update(Product)
+        .where(Product.id.in_(quantities))
+        .values(estoque=Product.estoque + case(quantities, value=Product.id))
+        .returning(Product)
+        .execution_options(synchronize_session="fetch")
+    )
+    products = {product.id: product for product in db.scalars(stmt)}
+
+    # A entrada inteira falha se algum produto não existir
+    for product_id in quantities:
+        if product_id not in products:
+            db.rollback()
+            raise ValueError(f"Produto {product_id} não encontrado")
+
+    # Resposta montada antes do commit, com os valores retornados pelo UPDATE
+    updated_products = [ProductResponse.model_validate(products[product_id]) for product_id in quantities]
     db.commit()
-    # Refresh para obter dados atualizados
-    for product in updated_products:
-        db.refresh(product)
 
+    catalog.invalidate(quantities)
     return updated_products
@@ -0,0 +1,55 @@
+from ..cache import TTLCache
+from datetime import date
+from typing import Iterable, Optional
+import os
+import threading
+
+# Resumo de cada dia já encerrado (por worker). Saem por LRU, quando uma venda
+# daquele dia é gravada neste worker ou pelo TTL: vendas de outros workers (lote
+# de caixa offline, venda gravada logo após a meia-noite) e os comandos de
+# manutenção (rebuild-rollups) não invalidam este cache, então o TTL limita por
+# quanto tempo um dia alterado fora daqui pode aparecer desatualizado (0 = sem TTL).
+REPORT_CACHE_MAX_DAYS = int(os.getenv("REPORT_CACHE_MAX_DAYS", "400"))
+REPORT_CACHE_TTL_SECONDS = float(os.getenv("REPORT_CACHE_TTL_SECONDS", "60")) or None
+
+class ReportCache:
+    """Pedaços de relatório por (tipo de relatório, dia encerrado), com LRU"""
+
+    def __init__(self, maxsize: int = REPORT_CACHE_MAX_DAYS, ttl: Optional[float] = REPORT_CACHE_TTL_SECONDS):
+        self._days = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self._generation = 0
+
+    @property
+    def generation(self) -> int:
+        """Muda a cada invalidação; ler antes de consultar o banco e passar ao set"""
+        return self._generation
+
+    def get(self, report: str, day: date):
+        return self._days.get((report, day))
+
+    def set(self, report: str, day: date, piece, generation: int):
+        """Guarda o pedaço só se nada foi invalidado desde a leitura do banco"""
+        with self._lock:
+            if generation == self._generation:
+                self._days.set((report, day), piece)
+
+    def invalidate_days(self, days: Iterable[date]):
+        """Descarta os dias (de todos os relatórios) alterados por vendas"""
+        days = set(days)
+        with self._lock:
+            self._generation += 1
+            for key in self._days.keys():
+                if key[1] in days:
+                    self._days.pop(key)
+
+    def clear(self):
+        """Descarta tudo (ex.: recálculo dos resumos, nome de produto alterado)"""
+        with self._lock:
+            self._generation += 1
+            self._days.clear()
+
+    def stats(self) -> dict:
+        return self._days.stats()
+
+report_cache = ReportCache()
@@ -1,87 +1,125 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import func, and_
-from ..models.sale import Sale
-from ..models.sale_item import SaleItem
-from ..schemas.report import DailySalesReport, PeriodSalesReport
+from ..models.product import Product
+from ..models.user import User
+from ..models.sales_rollup import DailySalesRollup, DailyProductRollup
+from ..schemas.report import SalesReport, DailySalesReport, PeriodSalesReport
+from .report_cache import report_cache
+from datetime import date, timedelta
 from typing import Dict, List
-from datetime import date, datetime
-from collections import defaultdict
+
+SALES_REPORT = "vendas"
 
 def get_daily_sales_report(db: Session, report_date: date) -> DailySalesReport:
     """Relatório de vendas do dia"""
-    start_date = datetime.combine(report_date, datetime.min.time())
-    end_date = datetime.combine(report_date, datetime.max.time())
-
-    # Vendas do dia
-    sales = db.query(Sale).filter(
-        and_(
-            Sale.data_hora >= start_date,
-            Sale.data_hora <= end_date,
-            Sale.status == "finalizada"
-        )
-    ).all()
-
-    return _build_sales_report(sales, report_date)
+    return _build_sales_report(db, report_date, report_date, report_date)
 
 def get_period_sales_report(db: Session, start_date: date, end_date: date) -> PeriodSalesReport:
     """Relatório de vendas por período"""
-    start_datetime = datetime.combine(start_date, datetime.min.time())
-    end_datetime = datetime.combine(end_date, datetime.max.time())
-
-    # Vendas do período
-    sales = db.query(Sale).filter(
-        and_(
-            Sale.data_hora >= start_datetime,
-            Sale.data_hora <= end_datetime,
-            Sale.status == "finalizada"
-        )
-    ).all()
-
-    report_data = _build_sales_report(sales)
+    report_data = _build_sales_report(db, start_date, end_date)
     return PeriodSalesReport(
         **report_data.model_dump(),
         data_inicio=start_date,
         data_fim=end_date
     )
 
-def _build_sales_report(sales: List[Sale], specific_date: date = None) -> DailySalesReport:
-    """Constrói dados do relatório de vendas"""
-    total_vendas = len(sales)
-    valor_total = sum(sale.total for sale in sales)
-
-    # Vendas por método de pagamento
-    vendas_por_metodo = defaultdict(float)
-    vendas_por_vendedor = defaultdict(lambda: {"total": 0.0, "vendas": 0})
-
-    # Produtos mais vendidos
-    produtos_vendidos = defaultdict(float)
-
-    for sale in sales:
-        # Método de pagamento
-        vendas_por_metodo[sale.metodo_pagamento] += sale.total
-
-        # Por vendedor
-        vendedor_nome = sale.usuario.nome
-        vendas_por_vendedor[vendedor_nome]["total"] += sale.total
-        vendas_por_vendedor[vendedor_nome]["vendas"] += 1
-
-        # Produtos vendidos
-        for item in sale.itens:
-            produtos_vendidos[item.produto.nome] += item.quantidade
-
-    # Formatar vendas por método
-    vendas_por_metodo_dict = dict(vendas_por_metodo)
+def _empty_day() -> dict:
+    return {"metodos": {}, "vendedores": {}, "produtos": {}}
+
+def _load_days(db: Session, start: date, end: date) -> Dict[date, dict]:
+    """Resumo de cada dia do intervalo, lido dos resumos diários (3 consultas)"""
+    days = {start + timedelta(days=n): _empty_day() for n in range((end - start).days + 1)}
+    sales_in_window = and_(DailySalesRollup.dia >= start, DailySalesRollup.dia <= end)
+
+    # Vendas por método de pagamento (totais gerais derivam daqui)
+    por_metodo = db.query(
+        DailySalesRollup.dia,
+        DailySalesRollup.metodo_pagamento,
+        func.sum(DailySalesRollup.vendas),
+        func.sum(DailySalesRollup.total)
+    ).filter(sales_in_window).group_by(DailySalesRollup.dia, DailySalesRollup.metodo_pagamento).all()
+    for dia, metodo, vendas, total in por_metodo:
+        days[dia]["metodos"][metodo] = (vendas, total)
+
+    # Vendas por vendedor
+    por_vendedor = db.query(
+        DailySalesRollup.dia,
+        User.nome,
+        func.sum(DailySalesRollup.total),
+        func.sum(DailySalesRollup.vendas)
+    ).join(User, DailySalesRollup.usuario_id == User.id).filter(sales_in_window).group_by(
+        DailySalesRollup.dia, User.nome
+    ).all()
+    for dia, nome, total, vendas in por_vendedor:
+        days[dia]["vendedores"][nome] = (total, vendas)
+
+    # Quantidade vendida de cada produto (o top 10 sai da soma dos dias)
+    produtos = db.query(
+        DailyProductRollup.dia, Product.nome, func.sum(DailyProductRollup.quantidade)
+    ).join(Product, DailyProductRollup.produto_id == Product.id).filter(
+        DailyProductRollup.dia >= start,
+        DailyProductRollup.dia <= end
+    ).group_by(DailyProductRollup.dia, Product.nome).all()
+    for dia, nome, quantidade in produtos:
+        days[dia]["produtos"][nome] = quantidade
+
+    return days
+
+def _report_days(db: Session, start: date, end: date) -> List[dict]:
+    """Resumo de cada dia do intervalo; dias encerrados vêm do cache quando possível"""
+    today = date.today()
+    pieces = {}
+    missing = []
+    for n in range((end - start).days + 1):
+        day = start + timedelta(days=n)
+        piece = report_cache.get(SALES_REPORT, day) if day < today else None
+        if piece is None:
+            missing.append(day)
+        else:
+            pieces[day] = piece
+
+    if missing:
+        generation = report_cache.generation
+        loaded = _load_days(db, missing[0], missing[-1])
+        for day in missing:
+            pieces[day] = loaded[day]
+            # O dia de hoje (e futuros) ainda recebe vendas: não entra no cache
+            if day < today:
+                report_cache.set(SALES_REPORT, day, loaded[day], generation)
+
+    return list(pieces.values())
+
+def _build_sales_report(db: Session, start: date, end: date, specific_date: date = None) -> SalesReport:
+    """Constrói dados do relatório de vendas somando o resumo de cada dia"""
+    vendas_por_metodo: Dict[str, list] = {}
+    vendas_por_vendedor: Dict[str, list] = {}
+    quantidades: Dict[str, float] = {}
+    for piece in _report_days(db, start, end):
+        for metodo, (vendas, total) in piece["metodos"].items():
+            totals = vendas_por_metodo.setdefault(metodo, [0, 0.0])
+            totals[0] += vendas
+            totals[1] += total
+        for nome, (total, vendas) in piece["vendedores"].items():
+            totals = vendas_por_vendedor.setdefault(nome, [0.0, 0])
+            totals[0] += total
+            totals[1] += vendas
+        for nome, quantidade in piece["produtos"].items():
+            quantidades[nome] = quantidades.get(nome, 0.0) + quantidade
+
+    total_vendas = sum(vendas for vendas, _ in vendas_por_metodo.values())
+    valor_total = sum(total for _, total in vendas_por_metodo.values())
+    vendas_por_metodo_dict = {metodo: total for metodo, (_, total) in vendas_por_metodo.items()}
 
-    # Formatar vendas por vendedor
     vendas_por_vendedor_list = [
-        {"vendedor": nome, "total": dados["total"], "vendas": dados["vendas"]}
-        for nome, dados in vendas_por_vendedor.items()
+        {"vendedor": nome, "total": total, "vendas": vendas}
+        for nome, (total, vendas) in vendas_por_vendedor.items()
     ]
 
     # Top produtos mais vendidos
+    top_produtos = sorted(quantidades.items(), key=lambda item: (-item[1], item[0]))[:10]
     produtos_mais_vendidos = [
         {"produto": produto, "quantidade": quantidade}
-        for produto, quantidade in sorted(produtos_vendidos.items(), key=lambda x: x[1], reverse=True)[:10]
+        for produto, quantidade in top_produtos
     ]
 
     if specific_date:
@@ -94,7 +132,7 @@ def _build_sales_report(sales: List[Sale], specific_date: date = None) -> DailyS
             vendas_por_vendedor=vendas_por_vendedor_list
         )
     else:
-        return DailySalesReport(
+        return SalesReport(
             total_vendas=total_vendas,
             valor_total=valor_total,
             vendas_por_metodo=vendas_por_metodo_dict,
@@ -0,0 +1,118 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import Date, func, and_, delete, insert, select
+from ..database import dialect_insert
+from ..models.sale import Sale
+from ..models.sale_item import SaleItem
+from ..models.sales_rollup import DailySalesRollup, DailyProductRollup
+from .archive_service import ArchivedItem, read_archived_period
+from .report_cache import report_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+from datetime import date, datetime
+
+def record_sale(db: Session, sale: Sale, quantities: Dict[int, float]):
+    """Soma a venda aos resumos diários, na mesma transação da venda"""
+    record_sales(db, [(sale, quantities)])
+
+def record_sales(db: Session, sales: Iterable[Tuple[Sale, Dict[int, float]]]):
+    """Soma um lote de vendas aos resumos diários com um upsert por tabela.
+
+    As linhas são agregadas antes: um mesmo upsert não pode atualizar a
+    mesma chave duas vezes.
+    """
+    sales_totals: Dict[Tuple[date, str, int], List[float]] = {}
+    product_totals: Dict[Tuple[date, int], float] = {}
+    for sale, quantities in sales:
+        dia = sale.data_hora.date()
+        totals = sales_totals.setdefault((dia, sale.metodo_pagamento, sale.usuario_id), [0, 0.0])
+        totals[0] += 1
+        totals[1] += sale.total
+        for product_id, quantidade in quantities.items():
+            product_totals[(dia, product_id)] = product_totals.get((dia, product_id), 0.0) + quantidade
+
+    _upsert_rollups(db, sales_totals, product_totals)
+
+def _upsert_rollups(db: Session, sales_totals: Dict[Tuple[date, str, int], List[float]],
+                    product_totals: Dict[Tuple[date, int], float]):
+    if not sales_totals:
+        return
+
+    stmt = dialect_insert(db, DailySalesRollup).values([
+        {"dia": dia, "metodo_pagamento": metodo, "usuario_id": usuario_id, "vendas": vendas, "total": total}
+        for (dia, metodo, usuario_id), (vendas, total) in sales_totals.items()
+    ])
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=["dia", "metodo_pagamento", "usuario_id"],
+        set_={
+            "vendas": DailySalesRollup.vendas + stmt.excluded.vendas,
+            "total": DailySalesRollup.total + stmt.excluded.total
+        }
+    ))
+
+    if not product_totals:
+        return
+
+    stmt = dialect_insert(db, DailyProductRollup).values([
+        {"dia": dia, "produto_id": product_id, "quantidade": quantidade}
+        for (dia, product_id), quantidade in product_totals.items()
+    ])
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=["dia", "produto_id"],
+        set_={"quantidade": DailyProductRollup.quantidade + stmt.excluded.quantidade}
+    ))
+
+def _quantities(items: Iterable[ArchivedItem]) -> Dict[int, float]:
+    quantities: Dict[int, float] = {}
+    for item in items:
+        quantities[item.produto_id] = quantities.get(item.produto_id, 0.0) + item.quantidade
+    return quantities
+
+def rebuild_rollups(db: Session, start_date: Optional[date] = None, end_date: Optional[date] = None) -> int:
+    """Recalcula os resumos diários a partir das vendas (todas ou de um período),
+    incluindo as arquivadas.
+
+    Retorna o número de dias com vendas recalculados.
+    """
+    sales_filter = [Sale.status == "finalizada"]
+    sales_rollup_filter = []
+    products_rollup_filter = []
+    if start_date:
+        sales_filter.append(Sale.data_hora >= datetime.combine(start_date, datetime.min.time()))
+        sales_rollup_filter.append(DailySalesRollup.dia >= start_date)
+        products_rollup_filter.append(DailyProductRollup.dia >= start_date)
+    if end_date:
+        sales_filter.append(Sale.data_hora <= datetime.combine(end_date, datetime.max.time()))
+        sales_rollup_filter.append(DailySalesRollup.dia <= end_date)
+        products_rollup_filter.append(DailyProductRollup.dia <= end_date)
+
+    db.execute(delete(DailySalesRollup).where(*sales_rollup_filter))
+    db.execute(delete(DailyProductRollup).where(*products_rollup_filter))
+
+    dia = func.date(Sale.data_hora, type_=Date)
+
+    # Agregação feita inteiramente no banco (INSERT ... SELECT ... GROUP BY)
+    db.execute(insert(DailySalesRollup).from_select(
+        ["dia", "metodo_pagamento", "usuario_id", "vendas", "total"],
+        select(dia, Sale.metodo_pagamento, Sale.usuario_id, func.count(Sale.id), func.sum(Sale.total))
+        .where(and_(*sales_filter))
+        .group_by(dia, Sale.metodo_pagamento, Sale.usuario_id)
+    ))
+    db.execute(insert(DailyProductRollup).from_select(
+        ["dia", "produto_id", "quantidade"],
+        select(dia, SaleItem.produto_id, func.sum(SaleItem.quantidade))
+        .join(Sale, SaleItem.venda_id == Sale.id)
+        .where(and_(*sales_filter))
+        .group_by(dia, SaleItem.produto_id)
+    ))
+
+    # Vendas já arquivadas (meses antigos) entram pelo mesmo upsert
+    record_sales(db, (
+        (sale, _quantities(items))
+        for month in read_archived_period(db, start_date, end_date)
+        for sale, items in month
+        if sale.status == "finalizada"
+    ))
+
+    days = db.query(func.count(func.distinct(DailySalesRollup.dia))).filter(*sales_rollup_filter).scalar()
+    db.commit()
+    report_cache.clear()
+    return days
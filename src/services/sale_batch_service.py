@@ -0,0 +1,209 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import case, insert, select, update
+from sqlalchemy.exc import DBAPIError, IntegrityError
+from ..models.sale import Sale
+from ..models.sale_item import SaleItem
+from ..models.product import Product
+from ..schemas.sale import SaleBatchCreate, SaleBatchItem, SaleBatchItemResult, SaleBatchResult
+from .sale_service import _aggregate_items
+from .rollup_service import record_sales
+from .catalog_cache import catalog
+from .report_cache import report_cache
+from typing import Dict, List, Optional, Tuple
+
+SALE_BATCH_CHUNK_SIZE = 200
+SALE_BATCH_RETRIES = 3
+SALE_COLUMNS = ("id_cliente", "data_hora", "usuario_id", "total", "metodo_pagamento", "status")
+# Deadlock e falha de serialização (PostgreSQL): a transação foi desfeita e pode ser refeita
+RETRYABLE_SQLSTATES = ("40P01", "40001")
+
+def create_sales_batch(db: Session, batch: SaleBatchCreate, user_id: int) -> SaleBatchResult:
+    """Registra um lote de vendas feitas offline no caixa.
+
+    Cada bloco de vendas é validado e gravado com consultas em conjunto e
+    confirmado em uma transação própria; o resultado é informado por venda.
+    Vendas já sincronizadas (mesmo id_cliente do mesmo vendedor) voltam como
+    'duplicada', então o caixa pode reenviar o lote com segurança.
+    """
+    results: List[Optional[SaleBatchItemResult]] = [None] * len(batch.vendas)
+    pending: List[Tuple[int, SaleBatchItem]] = []
+    seen = set()
+
+    for index, venda in enumerate(batch.vendas):
+        if venda.id_cliente in seen:
+            results[index] = SaleBatchItemResult(
+                id_cliente=venda.id_cliente, status="erro",
+                erro=f"Venda {venda.id_cliente} repetida no lote"
+            )
+            continue
+        seen.add(venda.id_cliente)
+        pending.append((index, venda))
+
+    for start in range(0, len(pending), SALE_BATCH_CHUNK_SIZE):
+        chunk = pending[start:start + SALE_BATCH_CHUNK_SIZE]
+        for _ in range(SALE_BATCH_RETRIES):
+            try:
+                chunk_results = _write_chunk(db, chunk, user_id)
+            except DBAPIError as error:
+                if not _is_retryable(error):
+                    raise
+                db.rollback()
+                chunk_results = None
+            if chunk_results is not None:
+                break
+        else:
+            chunk_results = {
+                index: SaleBatchItemResult(
+                    id_cliente=venda.id_cliente, status="erro",
+                    erro="Estoque alterado por outra operação, reenvie a venda"
+                )
+                for index, venda in chunk
+            }
+        for index, result in chunk_results.items():
+            results[index] = result
+
+    return SaleBatchResult(
+        criadas=sum(1 for r in results if r.status == "criada"),
+        duplicadas=sum(1 for r in results if r.status == "duplicada"),
+        com_erro=sum(1 for r in results if r.status == "erro"),
+        resultados=results
+    )
+
+def _is_retryable(error: DBAPIError) -> bool:
+    """Erro de concorrência que o banco resolve desfazendo a transação"""
+    return getattr(error.orig, "pgcode", None) in RETRYABLE_SQLSTATES
+
+def _allocation_error(product, product_id: int, quantidade: float, available: float) -> Optional[str]:
+    """Mesmas regras de create_sale, contra o estoque que sobrou no bloco"""
+    if product is None:
+        return f"Produto {product_id} não encontrado"
+    if not product.ativo:
+        return f"Produto {product.nome} está inativo"
+    if available < quantidade:
+        return f"Estoque insuficiente para {product.nome}. Disponível: {available}"
+    return None
+
+def _write_chunk(
+    db: Session, chunk: List[Tuple[int, SaleBatchItem]], user_id: int
+) -> Optional[Dict[int, SaleBatchItemResult]]:
+    """Grava um bloco de vendas em uma transação.
+
+    Retorna None quando o estoque mudou entre a leitura e a baixa (ou outro
+    caixa gravou o mesmo id_cliente); o bloco foi desfeito e deve ser refeito.
+    Deadlock e falha de serialização sobem como DBAPIError para o mesmo fim.
+    """
+    client_ids = [venda.id_cliente for _, venda in chunk]
+    existing = dict(db.execute(
+        select(Sale.id_cliente, Sale.id).where(Sale.usuario_id == user_id, Sale.id_cliente.in_(client_ids))
+    ).all())
+
+    quantities_by_sale = {index: _aggregate_items(venda.itens) for index, venda in chunk}
+    product_ids = {product_id for quantities in quantities_by_sale.values() for product_id in quantities}
+    products = {
+        product.id: product
+        for product in db.execute(
+            select(Product.id, Product.nome, Product.preco, Product.estoque, Product.ativo)
+            .where(Product.id.in_(product_ids))
+            # Mesma ordem de bloqueio em todos os caixas: lotes com produtos em comum não se travam
+            .order_by(Product.id)
+            .with_for_update()
+        )
+    }
+
+    # Distribui o estoque entre as vendas na ordem em que chegaram
+    available = {product_id: product.estoque for product_id, product in products.items()}
+    deltas: Dict[int, float] = {}
+    results: Dict[int, SaleBatchItemResult] = {}
+    accepted: List[Tuple[int, Sale, Dict[int, float]]] = []
+
+    for index, venda in chunk:
+        if venda.id_cliente in existing:
+            results[index] = SaleBatchItemResult(
+                id_cliente=venda.id_cliente, status="duplicada", venda_id=existing[venda.id_cliente]
+            )
+            continue
+
+        quantities = quantities_by_sale[index]
+        error = None
+        for product_id, quantidade in quantities.items():
+            error = _allocation_error(
+                products.get(product_id), product_id, quantidade, available.get(product_id, 0.0)
+            )
+            if error:
+                break
+        if error:
+            results[index] = SaleBatchItemResult(id_cliente=venda.id_cliente, status="erro", erro=error)
+            continue
+
+        for product_id, quantidade in quantities.items():
+            available[product_id] -= quantidade
+            deltas[product_id] = deltas.get(product_id, 0.0) + quantidade
+
+        # Não entra na sessão: só carrega os valores para o INSERT e os resumos
+        sale = Sale(
+            id_cliente=venda.id_cliente,
+            data_hora=venda.data_hora,
+            usuario_id=user_id,
+            total=sum(products[product_id].preco * quantidade for product_id, quantidade in quantities.items()),
+            metodo_pagamento=venda.metodo_pagamento,
+            status="finalizada"
+        )
+        accepted.append((index, sale, quantities))
+
+    if not accepted:
+        db.rollback()
+        return results
+
+    try:
+        # Baixa única e condicional: se outra operação mexeu no estoque, refaz o bloco
+        if deltas:
+            quantidade = case(deltas, value=Product.id)
+            stmt = (
+                update(Product)
+                .where(Product.id.in_(deltas), Product.estoque >= quantidade)
+                .values(estoque=Product.estoque - quantidade)
+                .returning(Product.id)
+                .execution_options(synchronize_session=False)
+            )
+            if len(db.execute(stmt).all()) != len(deltas):
+                db.rollback()
+                return None
+
+        # Vendas em um INSERT multi-linha (ids via RETURNING), itens em outro
+        sale_ids = dict(db.execute(
+            insert(Sale).returning(Sale.id_cliente, Sale.id),
+            [
+                {column: getattr(sale, column) for column in SALE_COLUMNS}
+                for _, sale, _ in accepted
+            ]
+        ).all())
+
+        item_rows = [
+            {
+                "venda_id": sale_ids[sale.id_cliente],
+                "produto_id": product_id,
+                "quantidade": quantidade,
+                "preco_unitario": products[product_id].preco,
+                "subtotal": products[product_id].preco * quantidade
+            }
+            for _, sale, quantities in accepted
+            for product_id, quantidade in quantities.items()
+        ]
+        if item_rows:
+            db.execute(insert(SaleItem), item_rows)
+
+        record_sales(db, [(sale, quantities) for _, sale, quantities in accepted])
+
+        for index, sale, _ in accepted:
+            results[index] = SaleBatchItemResult(
+                id_cliente=sale.id_cliente, status="criada", venda_id=sale_ids[sale.id_cliente]
+            )
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return None
+
+    catalog.invalidate(deltas)
+    # Vendas offline costumam cair em dias já encerrados (e em cache)
+    report_cache.invalidate_days({sale.data_hora.date() for _, sale, _ in accepted})
+    return results
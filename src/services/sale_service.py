@@ -1,39 +1,102 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy import and_, case, insert, select, tuple_, update
 from ..models.sale import Sale
 from ..models.sale_item import SaleItem
 from ..models.product import Product
-from ..schemas.sale import SaleCreate, SaleResponse, SaleSummary, SaleItemResponse
-from typing import List, Optional
+from ..models.idempotency_key import IdempotencyKey
+from ..schemas.sale import SaleCreate, SaleResponse, SaleSummary, SaleItemResponse, SaleItemCreate
+from .pagination import decode_cursor, next_cursor
+from .rollup_service import record_sale
+from .catalog_cache import catalog
+from .report_cache import report_cache
+from typing import Dict, List, Optional
 from datetime import datetime, date
 
-def create_sale(db: Session, sale_data: SaleCreate, user_id: int) -> Sale:
-    """Cria uma nova venda"""
-    # Calcular total e validar estoque
-    total = 0.0
-    sale_items = []
-
-    for item_data in sale_data.itens:
-        product = db.query(Product).filter(Product.id == item_data.produto_id).first()
+def _aggregate_items(itens: List[SaleItemCreate]) -> Dict[int, float]:
+    """Soma as quantidades de linhas repetidas do mesmo produto"""
+    quantities: Dict[int, float] = {}
+    for item in itens:
+        quantities[item.produto_id] = quantities.get(item.produto_id, 0.0) + item.quantidade
+    return quantities
+
+def _reserve_stock(db: Session, quantities: Dict[int, float]) -> Dict[int, float]:
+    """Baixa o estoque de todos os produtos em um único UPDATE condicional.
+
+    Retorna o preço de cada produto baixado; produtos ausentes no resultado
+    não existem, estão inativos ou não têm estoque suficiente.
+    """
+    # Trava as linhas em ordem de id antes da baixa: o UPDATE trava na ordem do
+    # plano, e dois carrinhos com os mesmos produtos podiam entrar em deadlock
+    db.execute(select(Product.id).where(Product.id.in_(quantities)).order_by(Product.id).with_for_update())
+    quantidade = case(quantities, value=Product.id)
+    stmt = (
+        update(Product)
+        .where(
+            Product.id.in_(quantities),
+            Product.ativo == True,
+            Product.estoque >= quantidade
+        )
+        .values(estoque=Product.estoque - quantidade)
+        .returning(Product.id, Product.preco)
+        .execution_options(synchronize_session="fetch")
+    )
+    return {row.id: row.preco for row in db.execute(stmt)}
+
+def _raise_reservation_error(db: Session, quantities: Dict[int, float], reserved: Dict[int, float]):
+    """Descobre por que a baixa falhou e levanta o erro correspondente"""
+    db.rollback()
+    missing = [product_id for product_id in quantities if product_id not in reserved]
+    products = {
+        product.id: product
+        for product in db.query(Product).filter(Product.id.in_(missing)).all()
+    }
+
+    for product_id in missing:
+        product = products.get(product_id)
         if not product:
-            raise ValueError(f"Produto {item_data.produto_id} não encontrado")
+            raise ValueError(f"Produto {product_id} não encontrado")
 
         if not product.ativo:
             raise ValueError(f"Produto {product.nome} está inativo")
 
-        if product.estoque < item_data.quantidade:
-            raise ValueError(f"Estoque insuficiente para {product.nome}. Disponível: {product.estoque}")
+        raise ValueError(f"Estoque insuficiente para {product.nome}. Disponível: {product.estoque}")
+
+def create_sale(
+    db: Session, sale_data: SaleCreate, user_id: int, idempotency_key: Optional[IdempotencyKey] = None
+) -> Sale:
+    """Cria uma nova venda.
+
+    Com idempotency_key, a chave é gravada antes de tudo na mesma transação:
+    uma retentativa simultânea com a mesma chave espera por ela (ou falha com
+    IntegrityError) antes de mexer no estoque.
+    """
+    quantities = _aggregate_items(sale_data.itens)
+
+    if idempotency_key is not None:
+        db.add(idempotency_key)
+        db.flush()
+
+    # A baixa só acontece se todos os produtos estiverem ativos e com estoque;
+    # não há leitura prévia, então caixas concorrentes nunca vendem além do estoque
+    reserved = _reserve_stock(db, quantities) if quantities else {}
+    if len(reserved) != len(quantities):
+        _raise_reservation_error(db, quantities, reserved)
+
+    # Calcular total com os preços retornados pelo UPDATE
+    total = 0.0
+    item_rows = []
 
-        subtotal = product.preco * item_data.quantidade
+    for product_id, quantidade in quantities.items():
+        preco = reserved[product_id]
+        subtotal = preco * quantidade
         total += subtotal
 
-        sale_item = SaleItem(
-            produto_id=item_data.produto_id,
-            quantidade=item_data.quantidade,
-            preco_unitario=product.preco,
-            subtotal=subtotal
-        )
-        sale_items.append(sale_item)
+        item_rows.append({
+            "produto_id": product_id,
+            "quantidade": quantidade,
+            "preco_unitario": preco,
+            "subtotal": subtotal
+        })
 
     # Criar venda
     sale = Sale(
@@ -45,31 +108,71 @@ def create_sale(db: Session, sale_data: SaleCreate, user_id: int) -> Sale:
     db.add(sale)
     db.flush()  # Para obter o ID da venda
 
-    # Adicionar itens à venda
-    for item in sale_items:
-        item.venda_id = sale.id
-        db.add(item)
+    if idempotency_key is not None:
+        idempotency_key.venda_id = sale.id
+
+    # Inserir todos os itens em um único INSERT multi-linha
+    if item_rows:
+        for row in item_rows:
+            row["venda_id"] = sale.id
+        db.execute(insert(SaleItem).values(item_rows))
 
-        # Baixar estoque
-        product = db.query(Product).filter(Product.id == item.produto_id).first()
-        product.estoque -= item.quantidade
+    # Resumos diários usados pelos relatórios
+    record_sale(db, sale, quantities)
 
+    sale_id, sale_day = sale.id, sale.data_hora.date()
     db.commit()
-    db.refresh(sale)
-    return sale
+    catalog.invalidate(quantities)
+    report_cache.invalidate_days([sale_day])
+
+    # Recarrega já com vendedor, itens e produtos para montar a resposta
+    return get_sale_by_id(db, sale_id)
 
 def get_sale_by_id(db: Session, sale_id: int) -> Sale:
     """Busca venda por ID com itens"""
-    return db.query(Sale).filter(Sale.id == sale_id).first()
-
-def get_sales(db: Session, user_id: Optional[int] = None, skip: int = 0, limit: int = 100) -> List[Sale]:
-    """Lista vendas com filtros"""
-    query = db.query(Sale)
+    # Vendedor vem no mesmo SELECT; itens e produtos em um único SELECT extra
+    return db.query(Sale).options(
+        joinedload(Sale.usuario),
+        selectinload(Sale.itens).joinedload(SaleItem.produto)
+    ).filter(Sale.id == sale_id).first()
+
+def get_sales(
+    db: Session,
+    user_id: Optional[int] = None,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None
+) -> List[Sale]:
+    """Lista vendas com filtros (paginação por skip ou por cursor)"""
+    # Resumo só precisa do nome do vendedor: JOIN em vez de um SELECT por venda
+    query = db.query(Sale).options(joinedload(Sale.usuario))
 
     if user_id:
         query = query.filter(Sale.usuario_id == user_id)
 
-    return query.order_by(Sale.data_hora.desc()).offset(skip).limit(limit).all()
+    query = query.order_by(Sale.data_hora.desc(), Sale.id.desc())
+
+    if cursor:
+        # Keyset: continua depois da última venda vista, sem descartar linhas
+        data_hora, sale_id = _decode_sale_cursor(cursor)
+        query = query.filter(tuple_(Sale.data_hora, Sale.id) < tuple_(data_hora, sale_id))
+    else:
+        query = query.offset(skip)
+
+    return query.limit(limit).all()
+
+def _decode_sale_cursor(cursor: str):
+    """Lê (data_hora, id) do cursor de vendas"""
+    values = decode_cursor(cursor)
+    try:
+        data_hora, sale_id = values
+        return datetime.fromisoformat(data_hora), int(sale_id)
+    except (TypeError, ValueError):
+        raise ValueError("Cursor inválido")
+
+def next_sales_cursor(sales: List[Sale], limit: int) -> Optional[str]:
+    """Cursor da página seguinte de vendas"""
+    return next_cursor(sales, limit, "data_hora", "id")
 
 def get_sales_by_date_range(db: Session, start_date: date, end_date: date) -> List[Sale]:
     """Busca vendas por período"""
@@ -114,3 +217,17 @@ def format_sale_summary(sale: Sale) -> SaleSummary:
         metodo_pagamento=sale.metodo_pagamento,
         status=sale.status
     )
+
+def format_sale_summaries(sales: List[Sale]) -> List[dict]:
+    """Resumos das vendas prontos para JSON (listagem: sem validar venda a venda)"""
+    return [
+        {
+            "id": sale.id,
+            "data_hora": sale.data_hora,
+            "usuario_nome": sale.usuario.nome,
+            "total": sale.total,
+            "metodo_pagamento": sale.metodo_pagamento,
+            "status": sale.status
+        }
+        for sale in sales
+    ]
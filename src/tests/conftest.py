@@ -0,0 +1,121 @@
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from fastapi.testclient import TestClient
+from ..database import Base, get_db
+from ..query_counter import capture_queries, query_budget as _query_budget
+from ..main import app
+from ..models import Product
+from ..services import (
+    create_user, create_access_token, clear_user_cache, clear_idempotency_cache, catalog, report_cache, sales_archive
+)
+from ..schemas import UserCreate
+
+# Configuração do banco de dados de teste (SQLite em memória)
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Caches em memória não podem vazar dados de um teste para outro"""
+    clear_user_cache()
+    clear_idempotency_cache()
+    catalog.clear()
+    report_cache.clear()
+    yield
+    clear_user_cache()
+    clear_idempotency_cache()
+    catalog.clear()
+    report_cache.clear()
+
+@pytest.fixture(autouse=True)
+def archive_dir(tmp_path, monkeypatch):
+    """Arquivo de vendas vazio e isolado em cada teste"""
+    directory = tmp_path / "arquivo_vendas"
+    monkeypatch.setattr(sales_archive, "directory", directory)
+    return directory
+
+@pytest.fixture(scope="session")
+def engine():
+    engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+
+    # pysqlite só trata SAVEPOINT corretamente com BEGIN explícito
+    @event.listens_for(engine, "connect")
+    def do_connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def do_begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+    return engine
+
+@pytest.fixture(scope="session")
+def tables(engine):
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+@pytest.fixture
+def db_session(engine, tables):
+    connection = engine.connect()
+    transaction = connection.begin()
+    # Commits e rollbacks dos serviços viram savepoints dentro da transação do teste
+    session = sessionmaker(bind=connection, join_transaction_mode="create_savepoint")()
+
+    yield session
+
+    session.close()
+    transaction.rollback()
+    connection.close()
+
+@pytest.fixture
+def query_budget(engine):
+    """Falha se o bloco passar do número de comandos SQL: with query_budget(3): ..."""
+    return lambda max_queries: _query_budget(engine, max_queries)
+
+@pytest.fixture
+def query_counter(engine):
+    """Captura os comandos SQL do bloco, sem o controle de transação: with query_counter() as log: ..."""
+    return lambda: capture_queries(engine)
+
+@pytest.fixture
+def client(db_session):
+    def override_get_db():
+        yield db_session
+
+    app.dependency_overrides[get_db] = override_get_db
+
+    yield TestClient(app)
+
+    app.dependency_overrides.clear()
+
+@pytest.fixture
+def manager(db_session):
+    return create_user(db_session, UserCreate(
+        nome="Gerente Teste", email="gerente@test.com", perfil="gerente", senha="123456"
+    ))
+
+@pytest.fixture
+def seller(db_session):
+    return create_user(db_session, UserCreate(
+        nome="Vendedor Teste", email="vendedor@test.com", perfil="vendedor", senha="123456"
+    ))
+
+@pytest.fixture
+def manager_headers(manager):
+    token = create_access_token(data={"sub": manager.email})
+    return {"Authorization": f"Bearer {token}"}
+
+@pytest.fixture
+def seller_headers(seller):
+    token = create_access_token(data={"sub": seller.email})
+    return {"Authorization": f"Bearer {token}"}
+
+@pytest.fixture
+def make_product(db_session):
+    def _make_product(nome="Produto", preco=10.0, estoque=100.0, **kwargs):
+        product = Product(nome=nome, preco=preco, estoque=estoque, **kwargs)
+        db_session.add(product)
+        db_session.commit()
+        return product
+    return _make_product
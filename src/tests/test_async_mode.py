@@ -0,0 +1,105 @@
+import asyncio
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import NullPool
+from fastapi.testclient import TestClient
+from .. import database
+from ..database import Base, get_db
+from ..routes import products as product_routes
+from ..main import app
+from ..models import Product
+from ..services import create_access_token, create_user
+from ..schemas import UserCreate
+
+pytest.importorskip("aiosqlite")
+
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+@pytest.fixture
+def async_client(tmp_path):
+    """Cliente com as rotas usando AsyncSession (aiosqlite), como no modo DB_ASYNC"""
+    database_file = tmp_path / "async.db"
+    sync_engine = create_engine(f"sqlite:///{database_file}")
+    Base.metadata.create_all(bind=sync_engine)
+
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{database_file}", poolclass=NullPool)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    async def override_get_db():
+        async with AsyncSessionLocal() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    yield TestClient(app), sync_engine
+
+    app.dependency_overrides.clear()
+    sync_engine.dispose()
+
+def test_sale_flow_with_async_session(async_client):
+    """Testa checkout, listagem, detalhe e relatório rodando em AsyncSession"""
+    client, sync_engine = async_client
+    with Session(bind=sync_engine) as db:
+        user = create_user(db, UserCreate(nome="Gerente", email="async@test.com", perfil="gerente", senha="123456"))
+        product = Product(nome="Suco", preco=7.5, estoque=10.0)
+        db.add(product)
+        db.commit()
+        headers = {"Authorization": f"Bearer {create_access_token(data={'sub': user.email})}"}
+        product_id = product.id
+
+    response = client.post("/vendas/", json={
+        "itens": [{"produto_id": product_id, "quantidade": 2}],
+        "metodo_pagamento": "pix"
+    }, headers=headers)
+    assert response.status_code == 200
+    sale = response.json()
+    assert sale["total"] == 15.0
+    assert sale["itens"][0]["produto_nome"] == "Suco"
+
+    response = client.get("/vendas/", headers=headers)
+    assert [row["id"] for row in response.json()] == [sale["id"]]
+
+    response = client.get(f"/vendas/{sale['id']}", headers=headers)
+    assert response.json()["usuario_nome"] == "Gerente"
+
+    day = sale["data_hora"][:10]
+    response = client.get(f"/relatorios/vendas-dia?report_date={day}", headers=headers)
+    assert response.json()["valor_total"] == 15.0
+
+    response = client.post("/vendas/", json={
+        "itens": [{"produto_id": product_id, "quantidade": 50}],
+        "metodo_pagamento": "pix"
+    }, headers=headers)
+    assert response.status_code == 400
+    assert "Estoque insuficiente" in response.json()["detail"]
+
+def test_import_runs_off_the_event_loop(async_client, monkeypatch):
+    """Testa que a importação (CPU) roda no threadpool, com sessão síncrona, também no modo assíncrono"""
+    client, sync_engine = async_client
+    monkeypatch.setattr(database, "SessionLocal", sessionmaker(bind=sync_engine))
+    with Session(bind=sync_engine) as db:
+        user = create_user(db, UserCreate(nome="Gerente", email="import@test.com", perfil="gerente", senha="123456"))
+        headers = {"Authorization": f"Bearer {create_access_token(data={'sub': user.email})}"}
+
+    calls = []
+    import_products = product_routes.import_products
+
+    def recording_import(db, rows):
+        try:
+            asyncio.get_running_loop()
+            calls.append("event loop")
+        except RuntimeError:
+            calls.append(type(db).__name__)
+        return import_products(db, rows)
+
+    monkeypatch.setattr(product_routes, "import_products", recording_import)
+    csv_data = "nome,preco,estoque,codigo_barras\nSuco,7.5,10,789001\nBolo,12,3,789002\n"
+    response = client.post(
+        "/produtos/importar", files={"arquivo": ("catalogo.csv", csv_data.encode(), "text/csv")}, headers=headers
+    )
+
+    assert response.status_code == 200
+    assert response.json()["inseridos"] == 2
+    assert calls == ["Session"]
+    with Session(bind=sync_engine) as db:
+        assert {p.nome for p in db.query(Product).all()} == {"Suco", "Bolo"}
@@ -3,8 +3,9 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from ..database import Base
 from ..main import app
-from ..services import create_user
-from ..schemas import UserCreate
+from ..models import User
+from ..services import auth_service, create_user, create_access_token, invalidate_user_cache, update_user
+from ..schemas import UserCreate, UserUpdate
 from fastapi.testclient import TestClient
 
 # Configuração do banco de dados de teste (SQLite em memória)
@@ -139,3 +140,71 @@ def test_register_invalid_profile(client):
     response = client.post("/auth/register", json=user_data)
     assert response.status_code == 400
     assert "Perfil deve ser" in response.json()["detail"]
+
+def test_authenticated_user_is_cached(client, db_session, query_counter):
+    """Testa que requisições seguidas não consultam o usuário de novo"""
+    user = create_user(db_session, UserCreate(
+        nome="Ana Vendedora", email="ana@test.com", perfil="vendedor", senha="123456"
+    ))
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': user.email})}"}
+
+    with query_counter() as log:
+        for _ in range(3):
+            assert client.get("/vendas/", headers=headers).status_code == 200
+
+    assert len([s for s in log.queries if "FROM usuarios" in s]) == 1
+
+def test_deactivated_user_is_rejected_immediately(client, db_session):
+    """Testa que desativar o usuário invalida o cache"""
+    user = create_user(db_session, UserCreate(
+        nome="Bruno Vendedor", email="bruno@test.com", perfil="vendedor", senha="123456"
+    ))
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': user.email})}"}
+    assert client.get("/vendas/", headers=headers).status_code == 200
+
+    update_user(db_session, user.id, UserUpdate(ativo=False))
+
+    response = client.get("/vendas/", headers=headers)
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Usuário inativo"
+
+def test_profile_change_is_applied_immediately(client, db_session):
+    """Testa que mudança de perfil invalida o cache"""
+    user = create_user(db_session, UserCreate(
+        nome="Carla", email="carla@test.com", perfil="vendedor", senha="123456"
+    ))
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': user.email})}"}
+    assert client.get("/relatorios/vendas-dia", headers=headers).status_code == 403
+
+    update_user(db_session, user.id, UserUpdate(perfil="gerente"))
+
+    assert client.get("/relatorios/vendas-dia", headers=headers).status_code == 200
+
+def test_invalidation_during_load_is_not_overwritten(client, db_session, monkeypatch):
+    """Testa que o usuário lido antes de uma invalidação não volta para o cache"""
+    user = create_user(db_session, UserCreate(
+        nome="Davi", email="davi@test.com", perfil="vendedor", senha="123456"
+    ))
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': user.email})}"}
+    model_validate = auth_service.CurrentUser.model_validate
+
+    class InvalidatedDuringLoad:
+        """Outra requisição desativa o usuário entre a leitura e o set do cache"""
+
+        @staticmethod
+        def model_validate(row):
+            current_user = model_validate(row)
+            invalidate_user_cache(row.email)
+            return current_user
+
+    with monkeypatch.context() as patch:
+        patch.setattr(auth_service, "CurrentUser", InvalidatedDuringLoad)
+        assert client.get("/vendas/", headers=headers).status_code == 200
+
+    # A desativação já foi confirmada (e sua invalidação já passou)
+    db_session.query(User).filter(User.id == user.id).update({"ativo": False})
+    db_session.commit()
+
+    response = client.get("/vendas/", headers=headers)
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Usuário inativo"
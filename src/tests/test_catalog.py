@@ -0,0 +1,71 @@
+from ..services import catalog
+
+def test_barcode_scan(client, seller_headers, make_product):
+    """Testa busca por código de barras"""
+    product = make_product(nome="Refrigerante", codigo_barras="7891234567890", preco=6.0)
+
+    response = client.get("/produtos/barcode/7891234567890", headers=seller_headers)
+    assert response.status_code == 200
+    assert response.json()["id"] == product.id
+
+    response = client.get("/produtos/barcode/0000000000000", headers=seller_headers)
+    assert response.status_code == 404
+
+def test_barcode_scan_is_served_from_cache(client, db_session, query_counter, seller_headers, make_product):
+    """Testa que a segunda leitura não consulta produtos no banco"""
+    make_product(nome="Chocolate", codigo_barras="111", preco=4.0)
+    client.get("/produtos/barcode/111", headers=seller_headers)
+
+    with query_counter() as log:
+        for _ in range(3):
+            assert client.get("/produtos/barcode/111", headers=seller_headers).status_code == 200
+
+    assert not [s for s in log.queries if "FROM produtos" in s]
+    stats = catalog.stats()
+    assert stats["codigo_barras_acertos"] == 3
+    assert stats["codigo_barras_falhas"] == 1
+
+def test_warm_indexes_active_products(db_session, make_product):
+    """Testa carga inicial do índice"""
+    make_product(nome="Ativo", codigo_barras="222")
+    make_product(nome="Inativo", codigo_barras="333", ativo=False)
+
+    assert catalog.warm(db_session) == 1
+    assert catalog.peek_barcode("222").nome == "Ativo"
+    assert catalog.peek_barcode("333") is None
+
+def test_product_changes_invalidate_cache(client, manager_headers, make_product):
+    """Testa que alterar o produto descarta a versão em cache"""
+    product = make_product(nome="Biscoito", codigo_barras="444", preco=3.0)
+    client.get("/produtos/barcode/444", headers=manager_headers)
+
+    client.put(f"/produtos/{product.id}", json={"preco": 3.5, "codigo_barras": "555"}, headers=manager_headers)
+
+    assert client.get("/produtos/barcode/444", headers=manager_headers).status_code == 404
+    response = client.get("/produtos/barcode/555", headers=manager_headers)
+    assert response.json()["preco"] == 3.5
+
+    client.post("/produtos/estoque/entrada", json=[{"produto_id": product.id, "quantidade": 5}], headers=manager_headers)
+    assert client.get(f"/produtos/{product.id}", headers=manager_headers).json()["estoque"] == 105.0
+
+    client.delete(f"/produtos/{product.id}", headers=manager_headers)
+    assert client.get(f"/produtos/{product.id}", headers=manager_headers).json()["ativo"] is False
+
+def test_sale_invalidates_cached_stock(client, seller_headers, make_product):
+    """Testa que a venda atualiza o estoque visto na leitura"""
+    make_product(nome="Água", codigo_barras="666", preco=2.0, estoque=10.0)
+    product_id = client.get("/produtos/barcode/666", headers=seller_headers).json()["id"]
+
+    client.post("/vendas/", json={
+        "itens": [{"produto_id": product_id, "quantidade": 4}],
+        "metodo_pagamento": "dinheiro"
+    }, headers=seller_headers)
+
+    assert client.get("/produtos/barcode/666", headers=seller_headers).json()["estoque"] == 6.0
+
+def test_catalog_stats_requires_manager(client, seller_headers, manager_headers):
+    """Testa o endpoint de estatísticas do índice"""
+    assert client.get("/produtos/catalogo/estatisticas", headers=seller_headers).status_code == 403
+    response = client.get("/produtos/catalogo/estatisticas", headers=manager_headers)
+    assert response.status_code == 200
+    assert "codigo_barras_acertos" in response.json()
@@ -0,0 +1,113 @@
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from ..database import Base
+from ..models import IdempotencyKey, Product, Sale
+from ..services import create_sale_idempotent, create_user, clear_idempotency_cache
+from ..schemas import SaleCreate, UserCreate
+
+def _payload(product, quantidade=2):
+    return {"itens": [{"produto_id": product.id, "quantidade": quantidade}], "metodo_pagamento": "pix"}
+
+def test_repeated_key_returns_original_sale(client, db_session, query_budget, seller_headers, make_product):
+    """Testa que a retentativa devolve a mesma venda sem nova baixa de estoque"""
+    product = make_product(nome="Arroz", preco=20.0, estoque=10.0)
+    headers = {**seller_headers, "Idempotency-Key": "caixa1-0001"}
+
+    first = client.post("/vendas/", json=_payload(product), headers=headers)
+    # Usuário e resposta vêm da memória
+    with query_budget(0):
+        retry = client.post("/vendas/", json=_payload(product), headers=headers)
+
+    assert first.status_code == retry.status_code == 200
+    assert retry.json() == first.json()
+
+    # Em outro worker (memória vazia) a resposta sai da tabela de chaves
+    clear_idempotency_cache()
+    assert client.post("/vendas/", json=_payload(product), headers=headers).json() == first.json()
+
+    db_session.expire_all()
+    assert db_session.get(Product, product.id).estoque == 8.0
+    assert db_session.query(Sale).count() == 1
+    assert db_session.get(IdempotencyKey, (first.json()["usuario_id"], "caixa1-0001")).venda_id == first.json()["id"]
+
+def test_key_reused_with_other_sale_is_rejected(client, seller_headers, make_product):
+    """Testa que a mesma chave com outro carrinho é recusada"""
+    product = make_product(nome="Café", preco=15.0)
+    headers = {**seller_headers, "Idempotency-Key": "caixa1-0002"}
+
+    assert client.post("/vendas/", json=_payload(product, 1), headers=headers).status_code == 200
+    response = client.post("/vendas/", json=_payload(product, 3), headers=headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Idempotency-Key já usada em outra venda"
+
+def test_failed_sale_does_not_consume_key(client, seller_headers, make_product, db_session):
+    """Testa que uma venda recusada pode ser refeita com a mesma chave"""
+    product = make_product(nome="Leite", preco=5.0, estoque=1.0)
+    headers = {**seller_headers, "Idempotency-Key": "caixa1-0003"}
+
+    assert client.post("/vendas/", json=_payload(product, 2), headers=headers).status_code == 400
+    assert db_session.query(IdempotencyKey).count() == 0
+    assert client.post("/vendas/", json=_payload(product, 2), headers={**seller_headers}).status_code == 400
+
+def test_concurrent_duplicates_create_one_sale(tmp_path):
+    """Testa retentativas simultâneas com a mesma chave"""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'idempotencia.db'}",
+        connect_args={"check_same_thread": False, "timeout": 30}
+    )
+
+    @event.listens_for(engine, "connect")
+    def do_connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def do_begin(conn):
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    with Session() as db:
+        user = create_user(db, UserCreate(nome="Caixa", email="caixa@test.com", perfil="vendedor", senha="123456"))
+        product = Product(nome="Pão", preco=1.0, estoque=50.0)
+        db.add(product)
+        db.commit()
+        user_id, product_id = user.id, product.id
+
+    sale_data = SaleCreate(itens=[{"produto_id": product_id, "quantidade": 1}], metodo_pagamento="dinheiro")
+
+    def checkout(_):
+        with Session() as db:
+            return create_sale_idempotent(db, sale_data, user_id, "mesma-chave").id
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        sale_ids = set(executor.map(checkout, range(24)))
+
+    with Session() as db:
+        assert len(sale_ids) == 1
+        assert db.query(Sale).count() == 1
+        assert db.get(Product, product_id).estoque == 49.0
+
+    engine.dispose()
+
+def test_losing_the_key_race_returns_winner_sale(db_session, seller, make_product, monkeypatch):
+    """Testa a requisição que grava a chave depois da outra (IntegrityError)"""
+    from ..services import idempotency_service
+
+    product = make_product(nome="Pão", preco=1.0, estoque=5.0)
+    sale_data = SaleCreate(itens=[{"produto_id": product.id, "quantidade": 1}], metodo_pagamento="dinheiro")
+    winner = create_sale_idempotent(db_session, sale_data, seller.id, "corrida")
+    clear_idempotency_cache()
+
+    # A perdedora consultou a tabela antes de a vencedora confirmar
+    lookup = idempotency_service._stored_response
+    calls = []
+    def stale_lookup(*args):
+        calls.append(args)
+        return None if len(calls) == 1 else lookup(*args)
+    monkeypatch.setattr(idempotency_service, "_stored_response", stale_lookup)
+
+    assert create_sale_idempotent(db_session, sale_data, seller.id, "corrida") == winner
+    db_session.expire_all()
+    assert db_session.get(Product, product.id).estoque == 4.0
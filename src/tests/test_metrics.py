@@ -0,0 +1,55 @@
+import re
+from ..metrics import request_metrics
+
+def _sample(text, name, **labels):
+    """Valor de uma série do /metrics (None se não existir)"""
+    for line in text.splitlines():
+        if not line.startswith(name + "{") and line.split(" ")[0] != name:
+            continue
+        found = dict(re.findall(r'(\w+)="([^"]*)"', line.rsplit(" ", 1)[0]))
+        if all(found.get(key) == value for key, value in labels.items()):
+            return float(line.rsplit(" ", 1)[1])
+    return None
+
+def test_metrics_by_route_template_and_status(client, engine, seller_headers, make_product):
+    """Testa latência por template de rota e status no /metrics"""
+    request_metrics.instrument(engine)
+    product = make_product(nome="Arroz")
+    before = client.get("/metrics").text
+    count = lambda text, **labels: _sample(
+        text, "pdv_http_request_duration_seconds_count", method="GET", route="/produtos/{product_id}", **labels
+    ) or 0
+
+    client.get(f"/produtos/{product.id}", headers=seller_headers)
+    client.get("/produtos/999999", headers=seller_headers)
+    client.get("/produtos/999998", headers=seller_headers)
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert count(response.text, status="200") == count(before, status="200") + 1
+    assert count(response.text, status="404") == count(before, status="404") + 2
+    assert _sample(response.text, "pdv_http_request_duration_seconds_bucket",
+                   route="/produtos/{product_id}", status="404", le="+Inf") == count(response.text, status="404")
+    # Só o próprio /metrics está em andamento
+    assert _sample(response.text, "pdv_http_requests_in_flight") == 1
+
+def test_metrics_count_sql_per_request(client, engine, seller, seller_headers, make_product):
+    """Testa comandos SQL e tempo de banco atribuídos à requisição"""
+    request_metrics.instrument(engine)
+    make_product(nome="Café")
+    route = {"method": "GET", "route": "/vendas/"}
+    before = client.get("/metrics").text
+
+    client.get("/vendas/", headers=seller_headers)
+    text = client.get("/metrics").text
+
+    statements = (_sample(text, "pdv_http_request_db_statements_sum", **route) or 0) - (
+        _sample(before, "pdv_http_request_db_statements_sum", **route) or 0
+    )
+    # Usuário autenticado + listagem (+ SAVEPOINT da sessão de teste)
+    assert statements == 3
+    assert _sample(text, "pdv_http_request_db_seconds_sum", **route) > 0
+    # Nenhum comando fora de requisição (ex.: fixtures) é atribuído a uma rota
+    assert _sample(text, "pdv_http_request_db_statements_count", method="GET", route="/metrics") >= 1
+    assert _sample(text, "pdv_http_request_db_statements_sum", method="GET", route="/metrics") == 0
@@ -0,0 +1,248 @@
+import os
+import sqlite3
+import subprocess
+import sys
+import pytest
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.orm import Session
+from ..database import Base
+from ..models import Product, Sale, SaleItem, User
+from ..services import export_sales, get_products, get_sales, rebuild_rollups
+
+ROOT = Path(__file__).resolve().parents[2]
+ALEMBIC_INI = ROOT / "alembic.ini"
+
+def _alembic_config(url: str) -> Config:
+    config = Config(str(ALEMBIC_INI))
+    config.set_main_option("sqlalchemy.url", url)
+    # Não reconfigurar o logging do processo de testes
+    config.attributes["configure_logger"] = False
+    return config
+
+def test_migrations_build_the_models_schema(tmp_path):
+    """Testa que upgrade head gera exatamente o esquema dos modelos e que downgrade desfaz"""
+    url = f"sqlite:///{tmp_path / 'migrations.db'}"
+    config = _alembic_config(url)
+    engine = create_engine(url)
+
+    command.upgrade(config, "head")
+    with engine.connect() as connection:
+        assert compare_metadata(MigrationContext.configure(connection), Base.metadata) == []
+        indexes = {index["name"] for index in inspect(connection).get_indexes("vendas")}
+    assert {"ix_vendas_status_data_hora", "ix_vendas_usuario_data_hora", "ix_vendas_data_hora_id"} <= indexes
+
+    command.downgrade(config, "base")
+    assert inspect(engine).get_table_names() == ["alembic_version"]
+    engine.dispose()
+
+def test_upgrade_from_initial_schema_keeps_data(tmp_path):
+    """Testa a atualização de um banco com dados na revisão inicial: colunas novas e busca preenchida"""
+    url = f"sqlite:///{tmp_path / 'baseline.db'}"
+    config = _alembic_config(url)
+    engine = create_engine(url)
+    command.upgrade(config, "0001")
+    with engine.begin() as connection:
+        connection.exec_driver_sql("INSERT INTO produtos (nome, preco, estoque, ativo) VALUES ('Pão de Açúcar', 5.0, 3, 1)")
+
+    command.upgrade(config, "head")
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql("SELECT nome_busca FROM produtos").scalar() == "pao de acucar"
+        assert compare_metadata(MigrationContext.configure(connection), Base.metadata) == []
+    engine.dispose()
+
+# Esquema gerado pelo create_all antes das migrações (SQLite), sem as tabelas e
+# colunas que vieram depois: não derivar dos modelos atuais
+ORIGINAL_SCHEMA = """
+CREATE TABLE usuarios (
+    id INTEGER NOT NULL, nome VARCHAR NOT NULL, email VARCHAR NOT NULL, senha_hash VARCHAR NOT NULL,
+    perfil VARCHAR NOT NULL, ativo BOOLEAN, criado_em DATETIME DEFAULT CURRENT_TIMESTAMP,
+    atualizado_em DATETIME DEFAULT CURRENT_TIMESTAMP, PRIMARY KEY (id)
+);
+CREATE INDEX ix_usuarios_id ON usuarios (id);
+CREATE UNIQUE INDEX ix_usuarios_email ON usuarios (email);
+CREATE TABLE produtos (
+    id INTEGER NOT NULL, nome VARCHAR NOT NULL, codigo_barras VARCHAR, preco FLOAT NOT NULL, estoque FLOAT,
+    ativo BOOLEAN, criado_em DATETIME DEFAULT CURRENT_TIMESTAMP, atualizado_em DATETIME DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id)
+);
+CREATE UNIQUE INDEX ix_produtos_codigo_barras ON produtos (codigo_barras);
+CREATE INDEX ix_produtos_id ON produtos (id);
+CREATE TABLE vendas (
+    id INTEGER NOT NULL, data_hora DATETIME DEFAULT CURRENT_TIMESTAMP, usuario_id INTEGER NOT NULL,
+    total FLOAT NOT NULL, metodo_pagamento VARCHAR NOT NULL, status VARCHAR, PRIMARY KEY (id),
+    FOREIGN KEY(usuario_id) REFERENCES usuarios (id)
+);
+CREATE INDEX ix_vendas_id ON vendas (id);
+CREATE TABLE itens_venda (
+    id INTEGER NOT NULL, venda_id INTEGER NOT NULL, produto_id INTEGER NOT NULL, quantidade FLOAT NOT NULL,
+    preco_unitario FLOAT NOT NULL, subtotal FLOAT NOT NULL, PRIMARY KEY (id),
+    FOREIGN KEY(venda_id) REFERENCES vendas (id), FOREIGN KEY(produto_id) REFERENCES produtos (id)
+);
+CREATE INDEX ix_itens_venda_id ON itens_venda (id);
+INSERT INTO usuarios (id, nome, email, senha_hash, perfil, ativo) VALUES (1, 'Ana', 'ana@loja.com', 'x', 'vendedor', 1);
+INSERT INTO produtos (id, nome, preco, estoque, ativo) VALUES (1, 'Café', 15.0, 10, 1);
+INSERT INTO vendas (id, usuario_id, total, metodo_pagamento, status) VALUES (1, 1, 15.0, 'pix', 'finalizada');
+INSERT INTO itens_venda (venda_id, produto_id, quantidade, preco_unitario, subtotal) VALUES (1, 1, 1, 15.0, 15.0);
+"""
+
+def test_sqlite_sale_timestamps_get_microseconds(tmp_path):
+    """Testa que vendas antigas e novas do SQLite ficam no formato dos parâmetros do SQLAlchemy"""
+    url = f"sqlite:///{tmp_path / 'timestamps.db'}"
+    config = _alembic_config(url)
+    engine = create_engine(url)
+    command.upgrade(config, "0006")
+    with engine.begin() as connection:
+        connection.exec_driver_sql("INSERT INTO usuarios (nome, email, senha_hash, perfil) VALUES ('a', 'a@a', 'x', 'vendedor')")
+        connection.exec_driver_sql("INSERT INTO vendas (usuario_id, total, metodo_pagamento) VALUES (1, 1.0, 'pix')")
+
+    command.upgrade(config, "head")
+    with engine.begin() as connection:
+        connection.exec_driver_sql("INSERT INTO vendas (usuario_id, total, metodo_pagamento) VALUES (1, 1.0, 'pix')")
+        values = connection.exec_driver_sql("SELECT data_hora FROM vendas").scalars().all()
+    assert [len(value) for value in values] == [26, 26]
+    engine.dispose()
+
+def _init_db(url: str) -> str:
+    """Roda `python -m src.cli init-db` num processo novo (a engine do módulo é única por processo)"""
+    env = dict(os.environ, DATABASE_URL=url, DB_ASYNC="false")
+    return subprocess.run(
+        [sys.executable, "-m", "src.cli", "init-db"], cwd=ROOT, env=env, check=True, capture_output=True, text=True
+    ).stdout
+
+def _revision(engine) -> str:
+    with engine.connect() as connection:
+        return MigrationContext.configure(connection).get_current_revision()
+
+def test_init_db_creates_and_updates_schema(tmp_path):
+    """Testa que init-db cria o esquema num banco vazio e pode ser repetido a cada deploy"""
+    url = f"sqlite:///{tmp_path / 'init.db'}"
+    engine = create_engine(url)
+
+    _init_db(url)
+    _init_db(url)
+
+    assert _revision(engine) == "0007"
+    assert "vendas" in inspect(engine).get_table_names()
+    engine.dispose()
+
+def test_init_db_stamps_database_created_without_migrations(tmp_path):
+    """Testa que um banco criado pelo create_all antigo é marcado, sem recriar as tabelas"""
+    url = f"sqlite:///{tmp_path / 'legacy.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+
+    output = _init_db(url)
+
+    assert "revisão 0006" in output
+    assert _revision(engine) == "0007"
+    engine.dispose()
+
+def test_init_db_upgrades_database_with_original_schema(tmp_path):
+    """Testa init-db num banco do create_all original: marcado em 0001 e completado pelas migrações"""
+    path = tmp_path / "original.db"
+    with sqlite3.connect(path) as connection:
+        connection.executescript(ORIGINAL_SCHEMA)
+    url = f"sqlite:///{path}"
+    engine = create_engine(url)
+
+    output = _init_db(url)
+
+    assert "revisão 0001" in output
+    assert _revision(engine) == "0007"
+    with engine.connect() as connection:
+        assert compare_metadata(MigrationContext.configure(connection), Base.metadata) == []
+    db = Session(engine)
+    try:
+        assert [product.nome_busca for product in get_products(db)] == ["cafe"]
+        assert [sale.id_cliente for sale in get_sales(db)] == [None]
+    finally:
+        db.close()
+    engine.dispose()
+
+@contextmanager
+def _executed(engine):
+    """Comandos (SQL, parâmetros) enviados pela engine dentro do bloco"""
+    calls = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        calls.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield calls
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+def _plan(db, calls, table: str) -> str:
+    """EXPLAIN QUERY PLAN do primeiro comando que lê a tabela"""
+    statement, parameters = next(
+        (s, p) for s, p in calls if s.lstrip().upper().startswith(("SELECT", "INSERT")) and f"FROM {table}" in s
+    )
+    rows = db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+    return "\n".join(row[-1] for row in rows)
+
+@pytest.fixture
+def store(db_session):
+    """Três vendedores, catálogo com muitos produtos desativados e vendas em 60 dias"""
+    sellers = [
+        User(nome=f"Vendedor {n}", email=f"v{n}@plano.com", senha_hash="x", perfil="vendedor", ativo=True)
+        for n in range(3)
+    ]
+    products = [Product(nome=f"Produto {n}", preco=1.0, estoque=10.0, ativo=n % 10 == 0) for n in range(2000)]
+    db_session.add_all(sellers + products)
+    db_session.flush()
+    start = datetime(2024, 1, 1, 8, 0)
+    for n in range(600):
+        sale = Sale(
+            usuario_id=sellers[n % 3].id, total=2.0, metodo_pagamento="pix",
+            status="cancelada" if n % 20 == 0 else "finalizada",
+            data_hora=start + timedelta(hours=n * 2.4)
+        )
+        sale.itens = [SaleItem(produto_id=products[n % 2000].id, quantidade=2, preco_unitario=1.0, subtotal=2.0)]
+        db_session.add(sale)
+    db_session.commit()
+    db_session.connection().exec_driver_sql("ANALYZE")
+    return sellers
+
+def test_seller_history_uses_composite_index(db_session, engine, store):
+    """Histórico do vendedor: índice (usuario_id, data_hora DESC, id DESC), sem ordenação extra"""
+    with _executed(engine) as calls:
+        get_sales(db_session, user_id=store[0].id, limit=50)
+    plan = _plan(db_session, calls, "vendas")
+
+    assert "ix_vendas_usuario_data_hora" in plan
+    assert "TEMP B-TREE" not in plan
+
+def test_catalog_listing_uses_partial_index(db_session, engine, store):
+    """Listagem do catálogo: índice parcial de produtos ativos, já na ordem de ID"""
+    with _executed(engine) as calls:
+        products = get_products(db_session, limit=50)
+    plan = _plan(db_session, calls, "produtos")
+
+    assert all(product.ativo for product in products)
+    assert "ix_produtos_ativos_id" in plan
+    assert "TEMP B-TREE" not in plan
+
+def test_rollup_rebuild_uses_status_date_index(db_session, engine, store):
+    """Recálculo de um período: só as vendas finalizadas do intervalo, pelo índice (status, data_hora)"""
+    with _executed(engine) as calls:
+        rebuild_rollups(db_session, date(2024, 1, 10), date(2024, 1, 20))
+    plan = _plan(db_session, calls, "vendas")
+
+    assert "ix_vendas_status_data_hora (status=? AND data_hora>? AND data_hora<?)" in plan
+
+def test_export_reads_period_in_index_order(db_session, engine, store):
+    """Exportação: intervalo e ordem pelo índice (data_hora, id); itens pelo índice de venda_id"""
+    with _executed(engine) as calls:
+        "".join(export_sales(db_session, date(2024, 1, 10), date(2024, 1, 20), "csv"))
+    plan = _plan(db_session, calls, "vendas")
+
+    assert "ix_vendas_data_hora_id (data_hora>? AND data_hora<?)" in plan
+    assert "ix_itens_venda_venda_id" in plan
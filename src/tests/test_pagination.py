@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta
+from ..models import Sale
+from ..schemas import SaleCreate
+from ..services import create_sale
+
+def _add_sales(db_session, user_id, timestamps):
+    """Cria vendas com data/hora explícitas (inclusive repetidas)"""
+    sales = [
+        Sale(usuario_id=user_id, total=1.0, metodo_pagamento="pix", data_hora=data_hora)
+        for data_hora in timestamps
+    ]
+    db_session.add_all(sales)
+    db_session.commit()
+    return sales
+
+def _walk(client, url, headers, limit):
+    """Percorre todas as páginas seguindo o header X-Next-Cursor"""
+    ids = []
+    response = client.get(f"{url}?limit={limit}", headers=headers)
+    while True:
+        assert response.status_code == 200
+        page = [row["id"] for row in response.json()]
+        # Cursor que não avança repetiria a página para sempre
+        assert not set(page) & set(ids), f"página repetida: {page}"
+        ids.extend(page)
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return ids
+        response = client.get(f"{url}?limit={limit}&cursor={cursor}", headers=headers)
+
+def test_sales_cursor_pagination(client, db_session, seller, manager_headers):
+    """Testa paginação por cursor de vendas, inclusive com horários repetidos"""
+    base = datetime(2024, 1, 1, 12, 0, 0)
+    timestamps = [base + timedelta(minutes=i // 3) for i in range(10)]
+    sales = _add_sales(db_session, seller.id, timestamps)
+
+    ids = _walk(client, "/vendas/", manager_headers, limit=4)
+
+    expected = [s.id for s in sorted(sales, key=lambda s: (s.data_hora, s.id), reverse=True)]
+    assert ids == expected
+
+def test_sales_cursor_with_server_timestamps(client, db_session, seller, manager_headers, make_product):
+    """Testa o cursor com data/hora preenchida pelo banco (várias vendas no mesmo segundo)"""
+    product = make_product(preco=2.0)
+    sales = [
+        create_sale(db_session, SaleCreate(itens=[{"produto_id": product.id, "quantidade": 1}], metodo_pagamento="pix"), seller.id)
+        for _ in range(3)
+    ]
+
+    ids = _walk(client, "/vendas/", manager_headers, limit=1)
+
+    assert ids == [sale.id for sale in reversed(sales)]
+
+def test_sales_cursor_is_stable_when_new_sales_arrive(client, db_session, seller, manager_headers):
+    """Testa que vendas novas não deslocam as páginas seguintes"""
+    base = datetime(2024, 1, 1, 12, 0, 0)
+    _add_sales(db_session, seller.id, [base + timedelta(minutes=i) for i in range(6)])
+
+    first = client.get("/vendas/?limit=3", headers=manager_headers)
+    cursor = first.headers["X-Next-Cursor"]
+    _add_sales(db_session, seller.id, [base + timedelta(hours=1)])
+
+    second = client.get(f"/vendas/?limit=3&cursor={cursor}", headers=manager_headers)
+    first_ids = {row["id"] for row in first.json()}
+    second_ids = {row["id"] for row in second.json()}
+    assert len(second_ids) == 3
+    assert not first_ids & second_ids
+
+def test_sales_skip_still_works(client, db_session, seller, manager_headers):
+    """Testa que skip/limit continua funcionando"""
+    base = datetime(2024, 1, 1, 12, 0, 0)
+    _add_sales(db_session, seller.id, [base + timedelta(minutes=i) for i in range(5)])
+
+    response = client.get("/vendas/?skip=3&limit=10", headers=manager_headers)
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+    assert "X-Next-Cursor" not in response.headers
+
+def test_invalid_cursor(client, manager_headers):
+    """Testa cursor inválido ou combinado com skip"""
+    response = client.get("/vendas/?cursor=nao-e-um-cursor", headers=manager_headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Cursor inválido"
+
+    response = client.get("/produtos/?cursor=abc&skip=10", headers=manager_headers)
+    assert response.status_code == 400
+
+def test_products_cursor_pagination(client, manager_headers, make_product):
+    """Testa paginação por cursor de produtos ativos"""
+    products = [make_product(nome=f"Produto {i}") for i in range(7)]
+    make_product(nome="Inativo", ativo=False)
+
+    ids = _walk(client, "/produtos/", manager_headers, limit=3)
+
+    assert ids == [p.id for p in products]
@@ -0,0 +1,89 @@
+import asyncio
+import pytest
+from ..models import User
+from ..passwords import PasswordHasher, password_hasher
+
+def _login(client, email="vendedor@test.com"):
+    return client.post("/auth/login", json={"email": email, "senha": "123456"})
+
+def test_login_rehashes_when_cost_changes(client, db_session, seller, monkeypatch):
+    """Testa que o hash é refeito no login quando o custo configurado muda"""
+    assert seller.senha_hash.startswith("$pbkdf2-sha256$29000$")
+    monkeypatch.setattr(password_hasher, "rounds", 1000)
+    rehashes = password_hasher.rehashes
+
+    assert _login(client).status_code == 200
+    db_session.expire_all()
+    new_hash = db_session.get(User, seller.id).senha_hash
+    assert new_hash.startswith("$pbkdf2-sha256$1000$")
+    assert password_hasher.rehashes == rehashes + 1
+
+    # Já no custo atual: nada a refazer, e a senha continua valendo
+    assert _login(client).status_code == 200
+    db_session.expire_all()
+    assert db_session.get(User, seller.id).senha_hash == new_hash
+    assert password_hasher.rehashes == rehashes + 1
+
+def test_wrong_password_is_not_rehashed(client, db_session, seller, monkeypatch):
+    """Testa que senha errada não troca o hash"""
+    monkeypatch.setattr(password_hasher, "rounds", 1000)
+    response = client.post("/auth/login", json={"email": "vendedor@test.com", "senha": "errada"})
+
+    assert response.status_code == 401
+    db_session.expire_all()
+    assert db_session.get(User, seller.id).senha_hash.startswith("$pbkdf2-sha256$29000$")
+
+def test_login_latency_is_reported(client, seller):
+    """Testa a latência de login exposta em /health/auth"""
+    before = client.get("/health/auth").json()["login"]["chamadas"]
+    _login(client)
+    data = client.get("/health/auth").json()
+
+    assert data["login"]["chamadas"] == before + 1
+    assert data["senhas"]["rounds"] == password_hasher.rounds
+    assert data["senhas"]["verificacao"]["chamadas"] >= 1
+
+def test_process_pool_hashes_and_verifies():
+    """Testa hash e verificação assíncronos no pool de processos"""
+    hasher = PasswordHasher(rounds=1000, workers=1)
+    hasher.start()
+    try:
+        hashed = asyncio.run(hasher.hash_async("segredo"))
+        assert hashed.startswith("$pbkdf2-sha256$1000$")
+        assert hasher.verify("segredo", hashed) == (True, None)
+        assert asyncio.run(hasher.verify_async("outra", hashed)) == (False, None)
+
+        hasher.rounds = 2000
+        valid, new_hash = asyncio.run(hasher.verify_async("segredo", hashed))
+        assert valid and new_hash.startswith("$pbkdf2-sha256$2000$")
+        assert hasher.snapshot()["verificacao"]["chamadas"] == 3
+        assert hasher.snapshot()["processos"] == 1
+    finally:
+        hasher.shutdown()
+
+def test_no_process_pool_until_started():
+    """Testa que, sem start (scripts, CLI), o hash é calculado sem subir processos"""
+    hasher = PasswordHasher(rounds=1000, workers=2)
+    hashed = hasher.hash("segredo")
+    assert asyncio.run(hasher.verify_async("segredo", hashed)) == (True, None)
+    assert hasher._executor is None
+    assert hasher.snapshot()["processos"] == 0
+
+def test_register_awaits_async_hash(client, db_session, monkeypatch):
+    """Testa que o cadastro aguarda o hash assíncrono em vez de bloquear uma thread"""
+    hashed = []
+    hash_async = password_hasher.hash_async
+
+    async def recording_hash_async(password):
+        hashed.append(password)
+        return await hash_async(password)
+
+    monkeypatch.setattr(password_hasher, "hash", lambda password: pytest.fail("hash síncrono na rota"))
+    monkeypatch.setattr(password_hasher, "hash_async", recording_hash_async)
+    response = client.post("/auth/register", json={
+        "nome": "Novo", "email": "novo@test.com", "senha": "segredo", "perfil": "vendedor"
+    })
+
+    assert response.status_code == 200
+    assert hashed == ["segredo"]
+    assert client.post("/auth/login", json={"email": "novo@test.com", "senha": "segredo"}).status_code == 200
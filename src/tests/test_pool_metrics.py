@@ -0,0 +1,44 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from ..metrics import PoolMetrics, TimedQueuePool
+
+@pytest.fixture
+def pooled_engine(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=TimedQueuePool, pool_size=2, max_overflow=1, pool_timeout=0.1
+    )
+    yield engine
+    engine.dispose()
+
+def test_pool_metrics_track_checkouts_and_overflow(pooled_engine):
+    """Testa contadores de uso, overflow e timeout do pool"""
+    metrics = PoolMetrics().instrument(pooled_engine)
+
+    connections = [pooled_engine.connect() for _ in range(3)]
+    snapshot = metrics.snapshot(pooled_engine)
+    assert snapshot["em_uso"] == 3
+    assert snapshot["overflow"] == 1
+    assert snapshot["max_em_uso"] == 3
+    assert snapshot["checkouts_em_overflow"] == 1
+
+    with pytest.raises(PoolTimeoutError):
+        pooled_engine.connect()
+
+    for connection in connections:
+        connection.close()
+
+    snapshot = metrics.snapshot(pooled_engine)
+    assert snapshot["em_uso"] == 0
+    assert snapshot["checkouts"] == 3
+    assert snapshot["checkins"] == 3
+    assert snapshot["timeouts"] == 1
+    assert snapshot["espera_max_ms"] >= 100
+
+def test_pool_health_endpoint(client):
+    """Testa o endpoint de métricas do pool"""
+    response = client.get("/health/pool")
+    assert response.status_code == 200
+    data = response.json()["sync"]
+    assert {"checkouts", "espera_media_ms", "timeouts", "pool"} <= set(data)
@@ -0,0 +1,128 @@
+import io
+import json
+from ..models import Product
+from ..services import import_products, iter_import_rows
+
+def _upload(client, headers, filename, content):
+    return client.post(
+        "/produtos/importar",
+        files={"arquivo": (filename, content if isinstance(content, bytes) else content.encode("utf-8"),
+                           "application/octet-stream")},
+        headers=headers
+    )
+
+def test_import_csv(client, db_session, manager_headers, make_product):
+    """Testa importação CSV com inserção, atualização e erros por linha"""
+    make_product(nome="Antigo", codigo_barras="100", preco=1.0, estoque=1.0)
+    content = (
+        "nome,codigo_barras,preco,estoque\n"
+        "Arroz 5kg,100,25.90,40\n"
+        "Feijão 1kg,200,8.50,\n"
+        "Sem preço,300,,10\n"
+        "Repetido,200,9.00,1\n"
+        "Granel,,4.20,12.5\n"
+        "Açúcar,400,4.20,12.5\n"
+    )
+
+    response = _upload(client, manager_headers, "catalogo.csv", content)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total_linhas"] == 6
+    assert data["inseridos"] == 2
+    assert data["atualizados"] == 1
+    assert data["linhas_com_erro"] == 3
+    assert [e["linha"] for e in data["erros"]] == [4, 5, 6]
+    assert "preco" in data["erros"][0]["erro"]
+    assert "repetido" in data["erros"][1]["erro"]
+    assert data["erros"][2]["erro"].startswith("codigo_barras: obrigatório")
+
+    updated = db_session.query(Product).filter(Product.codigo_barras == "100").one()
+    db_session.refresh(updated)
+    assert (updated.nome, updated.preco, updated.estoque) == ("Arroz 5kg", 25.90, 40.0)
+    assert db_session.query(Product).filter(Product.nome == "Açúcar").one().estoque == 12.5
+    assert db_session.query(Product).filter(Product.nome == "Granel").count() == 0
+
+def test_import_ndjson(client, db_session, manager_headers):
+    """Testa importação NDJSON com linha inválida"""
+    lines = [
+        json.dumps({"nome": "Café", "codigo_barras": "900", "preco": 15.0, "estoque": 5}),
+        "{isso não é json",
+        "",
+        json.dumps({"nome": "Chá", "codigo_barras": "901", "preco": 7.0})
+    ]
+
+    response = _upload(client, manager_headers, "catalogo.ndjson", "\n".join(lines))
+
+    data = response.json()
+    assert data["inseridos"] == 2
+    assert data["linhas_com_erro"] == 1
+    assert data["erros"][0]["linha"] == 2
+    assert data["linhas_por_segundo"] > 0
+
+def test_reimport_updates_only_given_columns(client, db_session, manager_headers, make_product):
+    """Testa que reimportar sem a coluna estoque não zera o estoque nem reativa produto desativado"""
+    make_product(nome="Arroz", codigo_barras="100", preco=20.0, estoque=50.0)
+    make_product(nome="Fora de linha", codigo_barras="200", preco=5.0, estoque=3.0, ativo=False)
+
+    response = _upload(client, manager_headers, "catalogo.csv", "nome,codigo_barras,preco\nArroz 5kg,100,25.9\nFora,200,6\n")
+
+    assert response.json()["atualizados"] == 2
+    products = {p.codigo_barras: p for p in db_session.query(Product).populate_existing()}
+    assert (products["100"].nome, products["100"].preco, products["100"].estoque) == ("Arroz 5kg", 25.9, 50.0)
+    assert (products["200"].preco, products["200"].estoque, products["200"].ativo) == (6.0, 3.0, False)
+
+def test_reimport_does_not_duplicate_products(client, db_session, manager_headers):
+    """Testa que reimportar o mesmo arquivo (ex.: após falha parcial) atualiza em vez de duplicar"""
+    content = "nome,codigo_barras,preco,estoque\nArroz,100,20,5\nGranel,,4.2,10\n"
+
+    first = _upload(client, manager_headers, "catalogo.csv", content).json()
+    second = _upload(client, manager_headers, "catalogo.csv", content).json()
+
+    assert (first["inseridos"], first["atualizados"], first["linhas_com_erro"]) == (1, 0, 1)
+    assert (second["inseridos"], second["atualizados"], second["linhas_com_erro"]) == (0, 1, 1)
+    assert second["erros"] == [{"linha": 3, "erro": first["erros"][0]["erro"]}]
+    assert [p.nome for p in db_session.query(Product).all()] == ["Arroz"]
+
+def test_import_reports_unreadable_rows(client, db_session, manager_headers):
+    """Testa que linhas fora do UTF-8 e CSV malformado viram erro da linha, sem abortar a importação"""
+    content = (
+        "nome,codigo_barras,preco\n".encode() + "Pão,1,3.5\n".encode("latin-1") + b"Arroz,2,20\n"
+        + b'"' + b"x" * 200_000 + b'",3,1\n' + "Feijão,4,8\n".encode()
+    )
+
+    response = _upload(client, manager_headers, "catalogo.csv", content)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["inseridos"] == 2
+    assert [(e["linha"], e["erro"][:10]) for e in data["erros"]] == [(2, "Texto fora"), (4, "CSV inváli")]
+
+    ndjson = b'{"nome": "Ch\xe1", "codigo_barras": "5", "preco": 7}\n{"nome": "Mate", "codigo_barras": "6", "preco": 9}\n'
+    data = _upload(client, manager_headers, "catalogo.ndjson", ndjson).json()
+    assert (data["inseridos"], data["erros"][0]["linha"]) == (1, 1)
+
+def test_import_rejects_header_outside_utf8(client, db_session, manager_headers):
+    """Testa que cabeçalho ilegível (ex.: CSV Latin-1 do Excel) é recusado antes de gravar"""
+    content = "descrição,preco\nPão,3.5\n".encode("latin-1")
+
+    response = _upload(client, manager_headers, "catalogo.csv", content)
+
+    assert response.status_code == 400
+    assert "UTF-8" in response.json()["detail"]
+    assert db_session.query(Product).count() == 0
+
+def test_import_requires_manager(client, seller_headers):
+    """Testa que apenas gerente importa catálogo"""
+    response = _upload(client, seller_headers, "catalogo.csv", "nome,preco\nX,1\n")
+    assert response.status_code == 403
+
+def test_import_in_chunks(db_session):
+    """Testa gravação em vários lotes"""
+    content = "nome,codigo_barras,preco\n" + "".join(f"Produto {i},{i:06d},1.5\n" for i in range(25))
+    rows = iter_import_rows(io.BytesIO(content.encode()), "csv")
+
+    result = import_products(db_session, rows, chunk_size=10)
+
+    assert result.inseridos == 25
+    assert db_session.query(Product).filter(Product.codigo_barras.isnot(None)).count() == 25
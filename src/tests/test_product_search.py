@@ -0,0 +1,68 @@
+import io
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex
+from ..models import Product
+
+def _names(response):
+    assert response.status_code == 200
+    return [p["nome"] for p in response.json()]
+
+def test_search_is_accent_insensitive_and_ranked(client, seller_headers, make_product):
+    """Testa busca sem acentos, com nome exato, prefixo e palavra antes de substring"""
+    for nome in ["Descafeinado Pilão", "Café com Leite", "Café", "Pão de Queijo", "Biscoito de Café"]:
+        make_product(nome=nome)
+
+    assert _names(client.get("/produtos/busca?q=cafe", headers=seller_headers)) == [
+        "Café", "Café com Leite", "Biscoito de Café", "Descafeinado Pilão"
+    ]
+    assert _names(client.get("/produtos/busca?q=PAO", headers=seller_headers)) == ["Pão de Queijo"]
+    assert _names(client.get("/produtos/busca?q=cafe&limit=2", headers=seller_headers)) == ["Café", "Café com Leite"]
+
+def test_search_requires_every_term(client, seller_headers, make_product):
+    """Testa busca com vários termos em qualquer ordem"""
+    make_product(nome="Arroz Integral Tipo 1")
+    make_product(nome="Arroz Branco Tipo 1")
+
+    assert _names(client.get("/produtos/busca?q=tipo integral", headers=seller_headers)) == ["Arroz Integral Tipo 1"]
+
+def test_search_skips_inactive_and_escapes_wildcards(client, db_session, seller_headers, make_product):
+    """Testa que produtos inativos não aparecem e que % e _ são literais"""
+    make_product(nome="Desconto 10%")
+    make_product(nome="Desconto 100")
+    make_product(nome="Desconto antigo", ativo=False)
+
+    assert _names(client.get("/produtos/busca?q=10%25", headers=seller_headers)) == ["Desconto 10%"]
+    assert _names(client.get("/produtos/busca?q=_", headers=seller_headers)) == []
+    assert len(_names(client.get("/produtos/busca?q=desconto", headers=seller_headers))) == 2
+
+def test_search_follows_updates_and_imports(client, manager_headers, make_product):
+    """Testa que alterações e importações mantêm o nome de busca em dia"""
+    product = make_product(nome="Sabão")
+    client.put(f"/produtos/{product.id}", json={"nome": "Detergente Líquido"}, headers=manager_headers)
+    client.post(
+        "/produtos/importar",
+        files={"arquivo": ("p.csv", io.BytesIO("nome,codigo_barras,preco\nAçúcar Refinado,789,4.5\n".encode()))},
+        headers=manager_headers
+    )
+
+    assert _names(client.get("/produtos/busca?q=sabao", headers=manager_headers)) == []
+    assert _names(client.get("/produtos/busca?q=liquido", headers=manager_headers)) == ["Detergente Líquido"]
+    assert _names(client.get("/produtos/busca?q=acucar", headers=manager_headers)) == ["Açúcar Refinado"]
+
+def test_search_index_uses_trigrams_on_postgres():
+    """Testa o DDL do índice de busca no PostgreSQL"""
+    (index,) = [i for i in Product.__table__.indexes if i.name == "ix_produtos_nome_busca_trgm"]
+    ddl = str(CreateIndex(index).compile(dialect=postgresql.dialect()))
+    assert "USING gin (nome_busca gin_trgm_ops)" in ddl
+
+def test_reindex_fills_products_created_before_search(client, db_session, seller_headers):
+    """Testa o preenchimento do nome de busca de produtos antigos"""
+    from sqlalchemy import insert
+    from ..services import reindex_product_search
+
+    db_session.execute(insert(Product), [{"nome": "Feijão Preto", "preco": 8.0, "ativo": True}])
+    db_session.commit()
+    assert _names(client.get("/produtos/busca?q=feijao", headers=seller_headers)) == []
+
+    assert reindex_product_search(db_session, batch_size=1) == 1
+    assert _names(client.get("/produtos/busca?q=feijao", headers=seller_headers)) == ["Feijão Preto"]
@@ -0,0 +1,87 @@
+import logging
+import pytest
+from sqlalchemy import select
+from ..metrics import request_metrics
+from ..models import Product
+from ..query_counter import QueryBudgetExceeded, capture_queries, statement_shape
+from ..services import create_sale
+from ..schemas import SaleCreate
+
+def _sell(db, user_id, products):
+    return create_sale(db, SaleCreate(
+        itens=[{"produto_id": p.id, "quantidade": 1} for p in products],
+        metodo_pagamento="pix"
+    ), user_id)
+
+def test_statement_shape_ignores_values_and_list_sizes():
+    """Testa que a forma do comando não depende de valores nem do tamanho do IN"""
+    assert statement_shape("SELECT * FROM produtos WHERE id = 7") == statement_shape(
+        "SELECT *\n  FROM produtos WHERE id = ?"
+    )
+    assert statement_shape("SELECT * FROM produtos WHERE nome = 'Arroz' AND id IN (?, ?, ?)") == (
+        "SELECT * FROM produtos WHERE nome = ? AND id IN (?)"
+    )
+    assert statement_shape("INSERT INTO t (a, b) VALUES (%(a_m0)s, %(b_m0)s), (%(a_m1)s, %(b_m1)s)") == (
+        "INSERT INTO t (a, b) VALUES (?)"
+    )
+
+def test_query_budget_reports_statements_when_exceeded(db_session, query_budget, make_product):
+    """Testa a mensagem do orçamento estourado, com os comandos repetidos"""
+    ids = [make_product(nome=f"Item {i}").id for i in range(3)]
+    db_session.expire_all()
+
+    with pytest.raises(QueryBudgetExceeded) as excinfo:
+        with query_budget(2):
+            for product_id in ids:
+                db_session.get(Product, product_id)
+
+    message = str(excinfo.value)
+    assert "3 comandos SQL, orçamento de 2" in message
+    assert "3x SELECT" in message
+
+@pytest.mark.parametrize("products_count", [1, 25])
+def test_reports_budget(client, db_session, query_budget, seller, manager_headers, make_product, products_count):
+    """Relatórios: usuário autenticado + 3 consultas agregadas, sem depender do volume"""
+    products = [make_product(nome=f"Item {i}", preco=1.0) for i in range(products_count)]
+    day = [_sell(db_session, seller.id, [product]) for product in products][-1].data_hora.date()
+    db_session.expire_all()
+
+    with query_budget(4):
+        daily = client.get(f"/relatorios/vendas-dia?report_date={day}", headers=manager_headers)
+    with query_budget(4):
+        period = client.get(
+            f"/relatorios/vendas-periodo?start_date={day}&end_date={day}", headers=manager_headers
+        )
+    assert daily.json()["total_vendas"] == period.json()["total_vendas"] == products_count
+
+def test_debug_mode_warns_on_repeated_statements(db_session, engine, make_product, monkeypatch, caplog):
+    """Testa o aviso de N+1 quando a mesma consulta se repete numa requisição"""
+    request_metrics.instrument(engine)
+    monkeypatch.setattr(request_metrics, "n_plus_one_threshold", 5)
+    ids = [make_product(nome=f"Item {i}").id for i in range(6)]
+    db_session.expire_all()
+
+    with caplog.at_level(logging.WARNING, logger="src.metrics"):
+        usage = request_metrics.start()
+        for product_id in ids:
+            db_session.execute(select(Product).where(Product.id == product_id)).scalar_one()
+        request_metrics.finish(usage, "GET", "/teste", 200, 0.01)
+
+    warnings = [r.getMessage() for r in caplog.records if "N+1" in r.getMessage()]
+    assert len(warnings) == 1
+    assert warnings[0].startswith("Possível N+1 em GET /teste: 6x SELECT")
+
+def test_debug_mode_is_quiet_for_batched_endpoints(client, db_session, engine, seller, manager_headers,
+                                                   make_product, monkeypatch, caplog):
+    """Testa que a listagem de vendas não dispara o aviso de N+1"""
+    request_metrics.instrument(engine)
+    monkeypatch.setattr(request_metrics, "n_plus_one_threshold", 3)
+    product = make_product(preco=1.0)
+    for _ in range(10):
+        _sell(db_session, seller.id, [product])
+
+    with caplog.at_level(logging.WARNING, logger="src.metrics"), capture_queries(engine) as log:
+        client.get("/vendas/?limit=1000", headers=manager_headers)
+
+    assert not log.repeated(threshold=3)
+    assert not [r for r in caplog.records if "N+1" in r.getMessage()]
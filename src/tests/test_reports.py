@@ -0,0 +1,220 @@
+import time
+from datetime import datetime, timedelta
+from ..models import DailySalesRollup, DailyProductRollup, Sale, SaleItem
+from ..services import create_sale, get_daily_sales_report, get_period_sales_report, rebuild_rollups
+from ..schemas import SaleCreate
+from ..services.report_cache import REPORT_CACHE_TTL_SECONDS
+
+def _sell(db, user_id, itens, metodo="pix"):
+    return create_sale(db, SaleCreate(
+        itens=[{"produto_id": p.id, "quantidade": q} for p, q in itens],
+        metodo_pagamento=metodo
+    ), user_id)
+
+def test_daily_report(client, db_session, manager, manager_headers, seller, make_product):
+    """Testa relatório do dia com vendas de dois vendedores"""
+    arroz = make_product(nome="Arroz", preco=20.0)
+    feijao = make_product(nome="Feijão", preco=8.0)
+
+    sale = _sell(db_session, seller.id, [(arroz, 2), (feijao, 1)], "pix")
+    _sell(db_session, seller.id, [(feijao, 5)], "dinheiro")
+    _sell(db_session, manager.id, [(arroz, 1)], "pix")
+
+    response = client.get(
+        f"/relatorios/vendas-dia?report_date={sale.data_hora.date()}",
+        headers=manager_headers
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total_vendas"] == 3
+    assert data["valor_total"] == 48.0 + 40.0 + 20.0
+    assert data["vendas_por_metodo"] == {"pix": 68.0, "dinheiro": 40.0}
+    assert sorted(data["vendas_por_vendedor"], key=lambda v: v["vendedor"]) == [
+        {"vendedor": "Gerente Teste", "total": 20.0, "vendas": 1},
+        {"vendedor": "Vendedor Teste", "total": 88.0, "vendas": 2}
+    ]
+    assert data["produtos_mais_vendidos"] == [
+        {"produto": "Feijão", "quantidade": 6.0},
+        {"produto": "Arroz", "quantidade": 3.0}
+    ]
+
+def test_period_report(client, db_session, manager_headers, seller, make_product):
+    """Testa relatório por período"""
+    product = make_product(nome="Café", preco=15.0)
+    sale = _sell(db_session, seller.id, [(product, 2)])
+    day = sale.data_hora.date()
+
+    response = client.get(
+        f"/relatorios/vendas-periodo?start_date={day - timedelta(days=7)}&end_date={day}",
+        headers=manager_headers
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total_vendas"] == 1
+    assert data["valor_total"] == 30.0
+    assert data["data_fim"] == str(day)
+
+def test_report_ignores_cancelled_sales(client, db_session, manager_headers, seller, make_product):
+    """Testa que vendas canceladas ficam fora do relatório"""
+    product = make_product(nome="Leite", preco=5.0)
+    sale = _sell(db_session, seller.id, [(product, 1)])
+    cancelled = _sell(db_session, seller.id, [(product, 3)])
+    cancelled.status = "cancelada"
+    db_session.commit()
+    rebuild_rollups(db_session, sale.data_hora.date(), sale.data_hora.date())
+
+    response = client.get(
+        f"/relatorios/vendas-dia?report_date={sale.data_hora.date()}",
+        headers=manager_headers
+    )
+    data = response.json()
+    assert data["total_vendas"] == 1
+    assert data["produtos_mais_vendidos"] == [{"produto": "Leite", "quantidade": 1.0}]
+
+def test_report_query_count_is_flat(db_session, query_counter, seller, make_product):
+    """Testa que o relatório usa o mesmo número de consultas com muitas vendas"""
+    products = [make_product(nome=f"Produto {i}", preco=1.0) for i in range(15)]
+    sale = None
+    for product in products:
+        sale = _sell(db_session, seller.id, [(product, 1)])
+    day = sale.data_hora.date()
+
+    with query_counter() as log:
+        report = get_daily_sales_report(db_session, day)
+
+    assert report.total_vendas == 15
+    assert len(report.produtos_mais_vendidos) == 10
+    assert len([s for s in log.queries if s.startswith("SELECT")]) == 3
+
+def test_rollups_match_rebuild(db_session, manager, seller, make_product):
+    """Testa que os resumos incrementais batem com a reconstrução completa"""
+    arroz = make_product(nome="Arroz", preco=20.0)
+    feijao = make_product(nome="Feijão", preco=8.0)
+    _sell(db_session, seller.id, [(arroz, 2), (feijao, 1)], "pix")
+    _sell(db_session, seller.id, [(feijao, 5)], "pix")
+    _sell(db_session, manager.id, [(arroz, 1)], "dinheiro")
+
+    def snapshot():
+        sales = db_session.query(
+            DailySalesRollup.dia, DailySalesRollup.metodo_pagamento, DailySalesRollup.usuario_id,
+            DailySalesRollup.vendas, DailySalesRollup.total
+        ).order_by(DailySalesRollup.metodo_pagamento, DailySalesRollup.usuario_id).all()
+        products = db_session.query(
+            DailyProductRollup.dia, DailyProductRollup.produto_id, DailyProductRollup.quantidade
+        ).order_by(DailyProductRollup.produto_id).all()
+        return sales, products
+
+    incremental = snapshot()
+    assert len(incremental[0]) == 2
+    assert rebuild_rollups(db_session) == 1
+    assert snapshot() == incremental
+
+def test_rebuild_backfills_existing_sales(db_session, seller, make_product):
+    """Testa a carga inicial dos resumos para vendas antigas"""
+    product = make_product(nome="Açúcar", preco=4.0)
+    old_sale = Sale(
+        usuario_id=seller.id, total=8.0, metodo_pagamento="cartao",
+        data_hora=datetime(2024, 3, 10, 15, 30)
+    )
+    db_session.add(old_sale)
+    db_session.flush()
+    db_session.add(SaleItem(
+        venda_id=old_sale.id, produto_id=product.id, quantidade=2, preco_unitario=4.0, subtotal=8.0
+    ))
+    db_session.commit()
+
+    assert get_daily_sales_report(db_session, old_sale.data_hora.date()).total_vendas == 0
+
+    rebuild_rollups(db_session)
+
+    report = get_daily_sales_report(db_session, old_sale.data_hora.date())
+    assert report.total_vendas == 1
+    assert report.vendas_por_metodo == {"cartao": 8.0}
+    assert report.produtos_mais_vendidos == [{"produto": "Açúcar", "quantidade": 2.0}]
+
+def _sell_on(client, headers, id_cliente, data_hora, itens, metodo="pix"):
+    response = client.post("/vendas/lote", json={"vendas": [{
+        "id_cliente": id_cliente, "data_hora": data_hora, "metodo_pagamento": metodo,
+        "itens": [{"produto_id": p.id, "quantidade": q} for p, q in itens]
+    }]}, headers=headers)
+    assert response.json()["criadas"] == 1
+
+def _selects(log):
+    return [s for s in log.queries if s.startswith("SELECT")]
+
+def test_closed_day_report_is_cached_until_a_sale_lands(client, db_session, query_counter, seller_headers, make_product):
+    """Testa que o relatório de dia encerrado é servido do cache e invalidado por nova venda"""
+    product = make_product(nome="Café", preco=10.0)
+    _sell_on(client, seller_headers, "c1", "2024-03-05T10:00:00", [(product, 1)])
+
+    with query_counter() as log:
+        first = get_daily_sales_report(db_session, datetime(2024, 3, 5).date())
+        second = get_daily_sales_report(db_session, datetime(2024, 3, 5).date())
+    assert first == second
+    assert len(_selects(log)) == 3
+
+    # Venda sincronizada depois para o mesmo dia
+    _sell_on(client, seller_headers, "c2", "2024-03-05T18:00:00", [(product, 2)])
+    report = get_daily_sales_report(db_session, datetime(2024, 3, 5).date())
+    assert (report.total_vendas, report.valor_total) == (2, 30.0)
+
+def test_closed_day_changed_elsewhere_expires(db_session, seller, make_product, monkeypatch):
+    """Testa que dia alterado fora deste worker (rebuild-rollups, outro worker) é relido após o TTL"""
+    product = make_product(nome="Café", preco=10.0)
+    sale = _sell(db_session, seller.id, [(product, 1)])
+    day = datetime(2024, 3, 5).date()
+    assert get_daily_sales_report(db_session, day).total_vendas == 0
+
+    # Backfill feito por outro processo: nada é invalidado aqui
+    db_session.query(Sale).filter(Sale.id == sale.id).update({"data_hora": datetime(2024, 3, 5, 10, 0)})
+    db_session.query(DailySalesRollup).update({"dia": day})
+    db_session.query(DailyProductRollup).update({"dia": day})
+    db_session.commit()
+    assert get_daily_sales_report(db_session, day).total_vendas == 0
+
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + REPORT_CACHE_TTL_SECONDS + 1)
+    assert get_daily_sales_report(db_session, day).total_vendas == 1
+
+def test_period_report_reuses_cached_days(client, db_session, query_counter, seller_headers, make_product):
+    """Testa que o relatório por período só consulta os dias fora do cache"""
+    arroz = make_product(nome="Arroz", preco=5.0)
+    feijao = make_product(nome="Feijão", preco=8.0)
+    _sell_on(client, seller_headers, "p1", "2024-04-01T09:00:00", [(arroz, 5), (feijao, 3)])
+    _sell_on(client, seller_headers, "p2", "2024-04-02T09:00:00", [(feijao, 3)], "dinheiro")
+    start, end = datetime(2024, 4, 1).date(), datetime(2024, 4, 2).date()
+
+    get_daily_sales_report(db_session, start)
+    with query_counter() as log:
+        report = get_period_sales_report(db_session, start, end)
+        again = get_period_sales_report(db_session, start, end)
+
+    # Só 02/04 precisou do banco, e uma única vez
+    assert len(_selects(log)) == 3
+    assert report == again
+    assert report.total_vendas == 2
+    assert report.vendas_por_metodo == {"pix": 49.0, "dinheiro": 24.0}
+    assert report.produtos_mais_vendidos == [
+        {"produto": "Feijão", "quantidade": 6.0},
+        {"produto": "Arroz", "quantidade": 5.0}
+    ]
+
+def test_today_is_never_cached(db_session, query_counter, seller, make_product):
+    """Testa que o dia corrente é sempre lido do banco"""
+    product = make_product(nome="Pão", preco=1.0)
+    day = _sell(db_session, seller.id, [(product, 1)]).data_hora.date()
+
+    with query_counter() as log:
+        get_daily_sales_report(db_session, day)
+        get_daily_sales_report(db_session, day)
+    assert len(_selects(log)) == 6
+
+def test_product_rename_refreshes_cached_reports(client, db_session, manager_headers, seller_headers, make_product):
+    """Testa que renomear produto descarta os relatórios em cache"""
+    product = make_product(nome="Refri", preco=6.0)
+    _sell_on(client, seller_headers, "r1", "2024-05-10T12:00:00", [(product, 1)])
+    day = datetime(2024, 5, 10).date()
+    assert get_daily_sales_report(db_session, day).produtos_mais_vendidos[0]["produto"] == "Refri"
+
+    client.put(f"/produtos/{product.id}", json={"nome": "Refrigerante"}, headers=manager_headers)
+    assert get_daily_sales_report(db_session, day).produtos_mais_vendidos[0]["produto"] == "Refrigerante"
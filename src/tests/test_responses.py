@@ -0,0 +1,45 @@
+from typing import List
+from pydantic import TypeAdapter
+from ..models import Product, Sale
+from ..schemas import ProductResponse, SaleCreate, SaleSummary
+from ..services import create_sale
+
+def test_product_listing_matches_validated_models(client, db_session, seller_headers, make_product):
+    """Testa que a listagem sem revalidação gera o mesmo JSON do response_model"""
+    for i in range(3):
+        make_product(nome=f"Produto {i}", codigo_barras=f"789{i}" if i else None, preco=2.5 + i)
+
+    response = client.get("/produtos/?limit=2", headers=seller_headers)
+
+    products = db_session.query(Product).order_by(Product.id).limit(2).all()
+    expected = TypeAdapter(List[ProductResponse]).dump_python(
+        [ProductResponse.model_validate(p) for p in products], mode="json"
+    )
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == expected
+    assert "X-Next-Cursor" in response.headers
+
+def test_sale_listing_matches_validated_models(client, db_session, seller, seller_headers, make_product):
+    """Testa os resumos de venda montados sem validação contra o SaleSummary"""
+    product = make_product(nome="Café", preco=12.0)
+    create_sale(db_session, SaleCreate(
+        itens=[{"produto_id": product.id, "quantidade": 2}], metodo_pagamento="pix"
+    ), seller.id)
+
+    response = client.get("/vendas/", headers=seller_headers)
+
+    sale = db_session.query(Sale).one()
+    expected = SaleSummary(
+        id=sale.id, data_hora=sale.data_hora, usuario_nome=seller.nome, total=sale.total,
+        metodo_pagamento=sale.metodo_pagamento, status=sale.status
+    ).model_dump(mode="json")
+    assert response.json() == [expected]
+
+def test_fast_routes_keep_documented_response_models(client):
+    """Testa que o OpenAPI continua descrevendo as respostas das rotas rápidas"""
+    paths = client.get("/openapi.json").json()["paths"]
+
+    listing = paths["/produtos/"]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+    detail = paths["/vendas/{sale_id}"]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+    assert listing["items"]["$ref"].endswith("/ProductResponse")
+    assert detail["$ref"].endswith("/SaleResponse")
@@ -0,0 +1,214 @@
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from ..database import Base
+from ..models import Product, SaleItem
+from ..services import create_sale, create_user
+from ..schemas import SaleCreate, UserCreate
+
+def test_create_sale(client, seller_headers, make_product):
+    """Testa criação de venda pela API"""
+    product = make_product(nome="Arroz", preco=20.0, estoque=10.0)
+
+    response = client.post("/vendas/", json={
+        "itens": [{"produto_id": product.id, "quantidade": 2}],
+        "metodo_pagamento": "pix"
+    }, headers=seller_headers)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 40.0
+    assert data["usuario_nome"] == "Vendedor Teste"
+    assert len(data["itens"]) == 1
+    assert data["itens"][0]["produto_nome"] == "Arroz"
+
+def test_create_sale_merges_duplicate_lines(db_session, seller, make_product):
+    """Testa que linhas repetidas do mesmo produto viram um único item"""
+    product = make_product(nome="Feijão", preco=8.0, estoque=10.0)
+
+    sale = create_sale(db_session, SaleCreate(
+        itens=[
+            {"produto_id": product.id, "quantidade": 1},
+            {"produto_id": product.id, "quantidade": 2}
+        ],
+        metodo_pagamento="dinheiro"
+    ), seller.id)
+
+    assert len(sale.itens) == 1
+    assert sale.itens[0].quantidade == 3
+    assert sale.total == 24.0
+    db_session.refresh(product)
+    assert product.estoque == 7.0
+
+def test_create_sale_insufficient_stock(client, seller_headers, make_product):
+    """Testa venda com estoque insuficiente (somando linhas repetidas)"""
+    product = make_product(nome="Café", preco=15.0, estoque=3.0)
+
+    response = client.post("/vendas/", json={
+        "itens": [
+            {"produto_id": product.id, "quantidade": 2},
+            {"produto_id": product.id, "quantidade": 2}
+        ],
+        "metodo_pagamento": "cartao"
+    }, headers=seller_headers)
+
+    assert response.status_code == 400
+    assert "Estoque insuficiente para Café" in response.json()["detail"]
+
+def test_create_sale_unknown_and_inactive_product(client, seller_headers, make_product):
+    """Testa venda com produto inexistente ou inativo"""
+    inactive = make_product(nome="Antigo", ativo=False)
+
+    response = client.post("/vendas/", json={
+        "itens": [{"produto_id": 99999, "quantidade": 1}],
+        "metodo_pagamento": "pix"
+    }, headers=seller_headers)
+    assert response.status_code == 400
+    assert "Produto 99999 não encontrado" in response.json()["detail"]
+
+    response = client.post("/vendas/", json={
+        "itens": [{"produto_id": inactive.id, "quantidade": 1}],
+        "metodo_pagamento": "pix"
+    }, headers=seller_headers)
+    assert response.status_code == 400
+    assert "Produto Antigo está inativo" in response.json()["detail"]
+
+@pytest.mark.parametrize("cart_size", [1, 40])
+def test_create_sale_round_trips_do_not_grow_with_cart(db_session, query_counter, seller, make_product, cart_size):
+    """Testa que o número de comandos SQL do checkout não depende do tamanho do carrinho"""
+    products = [make_product(nome=f"Item {i}", preco=1.0, estoque=10.0) for i in range(40)]
+    sale_data = SaleCreate(
+        itens=[{"produto_id": p.id, "quantidade": 1} for p in products[:cart_size]],
+        metodo_pagamento="pix"
+    )
+    user_id = seller.id
+    db_session.expire_all()
+
+    with query_counter() as log:
+        create_sale(db_session, sale_data, user_id)
+
+    # SELECT ... FOR UPDATE em ordem de id, UPDATE estoque ... RETURNING, INSERT venda,
+    # INSERT itens, 2 upserts de resumo, venda + itens carregados
+    assert len(log) == 8
+    assert db_session.query(SaleItem).count() == cart_size
+
+def test_concurrent_sales_never_oversell(tmp_path):
+    """Testa vários caixas vendendo o mesmo produto ao mesmo tempo"""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'concorrencia.db'}",
+        connect_args={"check_same_thread": False, "timeout": 30}
+    )
+
+    # Cada transação pede o lock de escrita logo no início (comportamento próximo ao do Postgres)
+    @event.listens_for(engine, "connect")
+    def do_connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def do_begin(conn):
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    with Session() as db:
+        user = create_user(db, UserCreate(nome="Caixa", email="caixa@test.com", perfil="vendedor", senha="123456"))
+        product = Product(nome="Pão", preco=1.0, estoque=50.0)
+        db.add(product)
+        db.commit()
+        user_id, product_id = user.id, product.id
+
+    def sell(_):
+        with Session() as db:
+            try:
+                create_sale(db, SaleCreate(
+                    itens=[{"produto_id": product_id, "quantidade": 1}],
+                    metodo_pagamento="dinheiro"
+                ), user_id)
+                return True
+            except ValueError as e:
+                assert "Estoque insuficiente" in str(e)
+                return False
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(sell, range(120)))
+
+    with Session() as db:
+        assert sum(results) == 50
+        assert db.get(Product, product_id).estoque == 0.0
+        assert db.query(SaleItem).count() == 50
+
+    engine.dispose()
+
+@pytest.mark.parametrize("sales_count", [2, 30])
+def test_list_sales_query_count(client, db_session, query_budget, seller, seller_headers, manager_headers, make_product, sales_count):
+    """Testa que a listagem de vendas usa um número fixo de consultas"""
+    product = make_product(preco=1.0)
+    for _ in range(sales_count):
+        create_sale(db_session, SaleCreate(
+            itens=[{"produto_id": product.id, "quantidade": 1}],
+            metodo_pagamento="pix"
+        ), seller.id)
+    db_session.expire_all()
+
+    # Usuário autenticado + vendas com JOIN no vendedor
+    with query_budget(2):
+        response = client.get("/vendas/?limit=1000", headers=manager_headers)
+
+    assert response.status_code == 200
+    assert len(response.json()) == sales_count
+
+@pytest.mark.parametrize("cart_size", [1, 20])
+def test_sale_detail_query_count(client, db_session, query_budget, seller, seller_headers, make_product, cart_size):
+    """Testa que o detalhe da venda usa um número fixo de consultas"""
+    products = [make_product(nome=f"Item {i}", preco=1.0) for i in range(cart_size)]
+    sale = create_sale(db_session, SaleCreate(
+        itens=[{"produto_id": p.id, "quantidade": 1} for p in products],
+        metodo_pagamento="pix"
+    ), seller.id)
+    sale_id = sale.id
+    db_session.expire_all()
+
+    # Usuário autenticado + venda com vendedor + itens com produtos
+    with query_budget(3):
+        response = client.get(f"/vendas/{sale_id}", headers=seller_headers)
+
+    assert response.status_code == 200
+    assert len(response.json()["itens"]) == cart_size
+
+@pytest.mark.parametrize("cart_size", [1, 20])
+def test_create_sale_endpoint_query_count(client, db_session, query_budget, seller_headers, make_product, cart_size):
+    """Testa que o checkout pela API usa um número fixo de consultas"""
+    products = [make_product(nome=f"Item {i}", preco=1.0) for i in range(cart_size)]
+    payload = {
+        "itens": [{"produto_id": p.id, "quantidade": 1} for p in products],
+        "metodo_pagamento": "pix"
+    }
+    db_session.expire_all()
+
+    # Usuário autenticado, trava dos produtos, UPDATE estoque, INSERT venda, INSERT itens,
+    # 2 upserts de resumo, venda + itens para a resposta
+    with query_budget(9):
+        response = client.post("/vendas/", json=payload, headers=seller_headers)
+
+    assert response.status_code == 200
+    assert len(response.json()["itens"]) == cart_size
+
+def test_create_sale_locks_products_in_id_order(db_session, query_counter, seller, make_product):
+    """Testa que o checkout trava os produtos em ordem de id antes da baixa (sem deadlock entre carrinhos)"""
+    arroz = make_product(nome="Arroz", preco=20.0)
+    feijao = make_product(nome="Feijão", preco=8.0)
+    sale_data = SaleCreate(
+        itens=[{"produto_id": feijao.id, "quantidade": 1}, {"produto_id": arroz.id, "quantidade": 1}],
+        metodo_pagamento="pix"
+    )
+    user_id = seller.id
+    db_session.expire_all()
+
+    with query_counter() as log:
+        create_sale(db_session, sale_data, user_id)
+
+    lock, update = log.queries[:2]
+    assert lock.startswith("SELECT produtos.id") and lock.endswith("ORDER BY produtos.id")
+    assert update.startswith("UPDATE produtos")
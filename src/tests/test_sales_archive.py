@@ -0,0 +1,153 @@
+import csv
+import io
+import json
+import pytest
+from datetime import date, datetime, timedelta, timezone
+from sqlalchemy.exc import OperationalError
+from ..models import IdempotencyKey, Sale, SaleItem
+from ..services import archive_sales, rebuild_rollups, report_cache, sales_archive
+from ..services.archive_service import ArchivedItem, ArchivedSale, decode_month, encode_month
+
+def _sell_on(client, headers, id_cliente, data_hora, itens, metodo="pix"):
+    response = client.post("/vendas/lote", json={"vendas": [{
+        "id_cliente": id_cliente, "data_hora": data_hora, "metodo_pagamento": metodo,
+        "itens": [{"produto_id": p.id, "quantidade": q} for p, q in itens]
+    }]}, headers=headers)
+    assert response.json()["criadas"] == 1
+
+def _export(client, headers, formato):
+    response = client.get(
+        f"/relatorios/vendas/export?inicio=2024-01-01&fim=2024-06-30&formato={formato}", headers=headers
+    )
+    assert response.status_code == 200
+    return response.text
+
+def _period_report(client, headers):
+    report_cache.clear()
+    response = client.get(
+        "/relatorios/vendas-periodo?start_date=2024-01-20&end_date=2024-03-20", headers=headers
+    )
+    assert response.status_code == 200
+    return response.json()
+
+def _store(client, seller_headers, make_product):
+    """Vendas de janeiro a junho de 2024, incluindo uma cancelada"""
+    arroz = make_product(nome="Arroz", preco=20.0)
+    cafe = make_product(nome="Café", preco=15.0)
+    _sell_on(client, seller_headers, "jan-1", "2024-01-15T10:00:00", [(arroz, 2), (cafe, 1)])
+    _sell_on(client, seller_headers, "jan-2", "2024-01-31T23:30:00", [(cafe, 3)], "dinheiro")
+    _sell_on(client, seller_headers, "fev-1", "2024-02-10T09:15:00", [(arroz, 1)], "cartao")
+    _sell_on(client, seller_headers, "mar-1", "2024-03-05T12:00:00", [(cafe, 2)])
+    _sell_on(client, seller_headers, "mai-1", "2024-05-02T08:00:00", [(arroz, 4)])
+    _sell_on(client, seller_headers, "jun-1", "2024-06-10T18:45:00", [(cafe, 1)], "dinheiro")
+
+def test_archive_moves_old_months_to_monthly_files(client, db_session, seller_headers, make_product, archive_dir):
+    """Testa que só os meses antes do horizonte saem das tabelas, um arquivo por mês"""
+    _store(client, seller_headers, make_product)
+    db_session.add(IdempotencyKey(
+        usuario_id=db_session.query(Sale).first().usuario_id, chave="antiga", hash_requisicao="x",
+        venda_id=db_session.query(Sale).first().id
+    ))
+    db_session.commit()
+
+    archived = archive_sales(db_session, months_to_keep=2, today=date(2024, 6, 15))
+
+    assert archived == {date(2024, 1, 1): 2, date(2024, 2, 1): 1, date(2024, 3, 1): 1}
+    assert sorted(path.name for path in archive_dir.iterdir()) == [
+        "vendas-2024-01.json.gz", "vendas-2024-02.json.gz", "vendas-2024-03.json.gz"
+    ]
+    assert db_session.query(Sale).filter(Sale.data_hora < datetime(2024, 4, 1)).count() == 0
+    assert db_session.query(Sale).count() == 2
+    assert db_session.query(SaleItem).count() == 2
+    assert db_session.query(IdempotencyKey).count() == 0
+
+    sales, items = sales_archive.read(date(2024, 1, 1))
+    assert [sale.id_cliente for sale in sales] == ["jan-1", "jan-2"]
+    assert [(item.venda_id, item.quantidade) for item in items] == [
+        (sales[0].id, 2.0), (sales[0].id, 1.0), (sales[1].id, 3.0)
+    ]
+
+    # Nada mais a arquivar
+    assert archive_sales(db_session, months_to_keep=2, today=date(2024, 6, 15)) == {}
+
+def test_reports_and_export_read_across_archive(client, db_session, manager_headers, seller_headers, make_product):
+    """Testa que relatórios (inclusive após recálculo) e exportação não mudam com o arquivamento"""
+    _store(client, seller_headers, make_product)
+    db_session.query(Sale).filter(Sale.id_cliente == "fev-1").update({"status": "cancelada"})
+    db_session.commit()
+    rebuild_rollups(db_session)
+    report = _period_report(client, manager_headers)
+    exports = {formato: _export(client, manager_headers, formato) for formato in ("csv", "ndjson")}
+
+    archive_sales(db_session, months_to_keep=2, today=date(2024, 6, 15))
+
+    assert _period_report(client, manager_headers) == report
+    rebuild_rollups(db_session)
+    assert _period_report(client, manager_headers) == report
+    assert report["total_vendas"] == 2
+    for formato, content in exports.items():
+        assert _export(client, manager_headers, formato) == content
+
+    rows = list(csv.DictReader(io.StringIO(exports["csv"])))
+    assert [row["produto"] for row in rows] == ["Arroz", "Café", "Café", "Arroz", "Café", "Arroz", "Café"]
+    assert [json.loads(line)["status"] for line in exports["ndjson"].splitlines()][2] == "cancelada"
+
+def test_late_sale_is_merged_into_archived_month(client, db_session, manager_headers, seller_headers, make_product):
+    """Testa que venda atrasada de mês já arquivado entra no mesmo arquivo, sem duplicar"""
+    _store(client, seller_headers, make_product)
+    archive_sales(db_session, months_to_keep=2, today=date(2024, 6, 15))
+    product = make_product(nome="Feijão", preco=8.0)
+    _sell_on(client, seller_headers, "jan-3", "2024-01-20T14:00:00", [(product, 1)])
+
+    # Antes de arquivar de novo, a exportação intercala tabela e arquivo
+    lines = _export(client, manager_headers, "ndjson").splitlines()
+    assert [json.loads(line)["data_hora"][:10] for line in lines[:3]] == ["2024-01-15", "2024-01-20", "2024-01-31"]
+
+    assert archive_sales(db_session, months_to_keep=2, today=date(2024, 6, 15)) == {date(2024, 1, 1): 1}
+    sales, _ = sales_archive.read(date(2024, 1, 1))
+    assert [sale.id_cliente for sale in sales] == ["jan-1", "jan-3", "jan-2"]
+    assert _export(client, manager_headers, "ndjson").splitlines() == lines
+
+def test_failed_commit_leaves_no_duplicates(client, db_session, manager_headers, seller_headers, make_product,
+                                            monkeypatch):
+    """Testa que, se o DELETE não for confirmado depois de gravar o arquivo, leitores não duplicam vendas"""
+    _store(client, seller_headers, make_product)
+    rebuild_rollups(db_session)
+    report = _period_report(client, manager_headers)
+    exports = {formato: _export(client, manager_headers, formato) for formato in ("csv", "ndjson")}
+
+    def fail():
+        db_session.rollback()
+        raise OperationalError("COMMIT", {}, Exception("conexão perdida"))
+
+    with monkeypatch.context() as patch, pytest.raises(OperationalError):
+        patch.setattr(db_session, "commit", fail)
+        archive_sales(db_session, months_to_keep=2, today=date(2024, 6, 15))
+
+    # Janeiro está no arquivo e nas tabelas
+    assert [sale.id_cliente for sale in sales_archive.read(date(2024, 1, 1))[0]] == ["jan-1", "jan-2"]
+    assert db_session.query(Sale).count() == 6
+    for formato, content in exports.items():
+        assert _export(client, manager_headers, formato) == content
+    rebuild_rollups(db_session)
+    assert _period_report(client, manager_headers) == report
+
+    # A próxima execução conclui o arquivamento
+    assert archive_sales(db_session, months_to_keep=2, today=date(2024, 6, 15)) == {
+        date(2024, 1, 1): 2, date(2024, 2, 1): 1, date(2024, 3, 1): 1
+    }
+    assert [sale.id_cliente for sale in sales_archive.read(date(2024, 1, 1))[0]] == ["jan-1", "jan-2"]
+    for formato, content in exports.items():
+        assert _export(client, manager_headers, formato) == content
+
+def test_archive_columns_round_trip():
+    """Testa que o arquivo colunar preserva valores, fusos e vendas sem itens"""
+    utc_minus_3 = timezone(timedelta(hours=-3))
+    sales = [
+        ArchivedSale(7, datetime(2024, 1, 3, 9, 0, 0, 120, tzinfo=utc_minus_3), 1, 10.5, "pix", "finalizada", None),
+        ArchivedSale(3, datetime(2024, 1, 5, 23, 59, tzinfo=timezone.utc), 2, 0.1 + 0.2, "dinheiro", "cancelada", "c-1"),
+    ]
+    items = [ArchivedItem(11, 7, 4, 1.5, 7.0, 10.5)]
+
+    assert decode_month(encode_month(sales, items)) == (sales, items)
+    assert decode_month(encode_month([], [])) == ([], [])
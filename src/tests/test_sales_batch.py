@@ -0,0 +1,140 @@
+import pytest
+from sqlalchemy.exc import OperationalError
+from ..models import DailySalesRollup, Product, Sale
+from ..services import sale_batch_service
+
+def _venda(id_cliente, itens, data_hora="2024-03-05T10:15:00", metodo="dinheiro"):
+    return {
+        "id_cliente": id_cliente,
+        "data_hora": data_hora,
+        "metodo_pagamento": metodo,
+        "itens": [{"produto_id": p.id, "quantidade": q} for p, q in itens]
+    }
+
+def test_batch_reports_result_per_sale(client, db_session, seller, seller_headers, make_product):
+    """Testa lote com vendas válidas, estoque esgotado e produto inexistente"""
+    arroz = make_product(nome="Arroz", preco=20.0, estoque=5.0)
+    feijao = make_product(nome="Feijão", preco=8.0, estoque=10.0)
+
+    response = client.post("/vendas/lote", json={"vendas": [
+        _venda("a", [(arroz, 3), (feijao, 1)]),
+        _venda("b", [(arroz, 3)]),
+        {**_venda("c", [(feijao, 2)]), "itens": [{"produto_id": 99999, "quantidade": 1}]},
+        _venda("d", [(arroz, 2), (feijao, 2)], metodo="pix"),
+        _venda("a", [(feijao, 1)])
+    ]}, headers=seller_headers)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["criadas"], data["duplicadas"], data["com_erro"]) == (2, 0, 3)
+    resultados = data["resultados"]
+    assert [r["status"] for r in resultados] == ["criada", "erro", "erro", "criada", "erro"]
+    assert resultados[1]["erro"] == "Estoque insuficiente para Arroz. Disponível: 2.0"
+    assert resultados[2]["erro"] == "Produto 99999 não encontrado"
+    assert resultados[4]["erro"] == "Venda a repetida no lote"
+
+    db_session.expire_all()
+    assert db_session.get(Product, arroz.id).estoque == 0.0
+    assert db_session.get(Product, feijao.id).estoque == 7.0
+
+    sale = db_session.get(Sale, resultados[0]["venda_id"])
+    assert sale.id_cliente == "a"
+    assert sale.usuario_id == seller.id
+    assert sale.total == 68.0
+    assert sale.data_hora.date().isoformat() == "2024-03-05"
+    assert {(i.produto_id, i.subtotal) for i in sale.itens} == {(arroz.id, 60.0), (feijao.id, 8.0)}
+
+    rollups = {r.metodo_pagamento: (r.vendas, r.total) for r in db_session.query(DailySalesRollup).all()}
+    assert rollups == {"dinheiro": (1, 68.0), "pix": (1, 56.0)}
+
+def test_batch_replay_is_idempotent(client, db_session, seller_headers, make_product):
+    """Testa que reenviar o lote não duplica vendas nem baixa estoque de novo"""
+    product = make_product(nome="Café", preco=15.0, estoque=10.0)
+    payload = {"vendas": [_venda("x1", [(product, 2)]), _venda("x2", [(product, 1)])]}
+
+    first = client.post("/vendas/lote", json=payload, headers=seller_headers).json()
+    second = client.post("/vendas/lote", json=payload, headers=seller_headers).json()
+
+    assert second["duplicadas"] == 2
+    assert [r["venda_id"] for r in second["resultados"]] == [r["venda_id"] for r in first["resultados"]]
+    db_session.expire_all()
+    assert db_session.get(Product, product.id).estoque == 7.0
+    assert db_session.query(Sale).count() == 2
+
+def test_batch_query_count_is_flat(client, db_session, query_counter, seller_headers, make_product):
+    """Testa que o número de comandos não cresce com o tamanho do lote"""
+    products = [make_product(nome=f"Item {i}", preco=1.0, estoque=100.0) for i in range(5)]
+    payload = {"vendas": [
+        _venda(f"v{n}", [(products[n % 5], 1), (products[(n + 1) % 5], 2)]) for n in range(150)
+    ]}
+    db_session.expire_all()
+
+    with query_counter() as log:
+        response = client.post("/vendas/lote", json=payload, headers=seller_headers)
+
+    assert response.status_code == 200
+    assert response.json()["criadas"] == 150
+    # Usuário, vendas já gravadas, produtos, baixa, vendas, itens e dois resumos
+    assert len(log) == 8
+
+def test_same_client_id_from_two_sellers(client, db_session, seller, manager, seller_headers, manager_headers,
+                                         make_product):
+    """Testa que caixas de vendedores diferentes podem usar o mesmo id local"""
+    product = make_product(nome="Café", preco=15.0, estoque=10.0)
+
+    first = client.post("/vendas/lote", json={"vendas": [_venda("1", [(product, 1)])]}, headers=seller_headers).json()
+    second = client.post("/vendas/lote", json={"vendas": [_venda("1", [(product, 2)])]}, headers=manager_headers).json()
+
+    assert first["criadas"] == second["criadas"] == 1
+    assert first["resultados"][0]["venda_id"] != second["resultados"][0]["venda_id"]
+    db_session.expire_all()
+    sales = db_session.query(Sale).filter(Sale.id_cliente == "1").order_by(Sale.id).all()
+    assert [(sale.usuario_id, sale.total) for sale in sales] == [(seller.id, 15.0), (manager.id, 30.0)]
+    assert db_session.get(Product, product.id).estoque == 7.0
+
+    # Reenvio continua idempotente para cada vendedor
+    again = client.post("/vendas/lote", json={"vendas": [_venda("1", [(product, 2)])]}, headers=manager_headers).json()
+    assert again["resultados"][0] == {**second["resultados"][0], "status": "duplicada"}
+
+class _Deadlock(Exception):
+    pgcode = "40P01"
+
+def test_batch_retries_after_deadlock(client, db_session, query_counter, seller_headers, make_product, monkeypatch):
+    """Testa que o bloco desfeito por deadlock é refeito e que os produtos são travados em ordem de id"""
+    arroz = make_product(nome="Arroz", preco=20.0, estoque=5.0)
+    feijao = make_product(nome="Feijão", preco=8.0, estoque=5.0)
+    write_chunk = sale_batch_service._write_chunk
+    calls = []
+
+    def deadlock_once(db, chunk, user_id):
+        calls.append(chunk)
+        if len(calls) == 1:
+            raise OperationalError("SELECT ... FOR UPDATE", {}, _Deadlock())
+        return write_chunk(db, chunk, user_id)
+
+    monkeypatch.setattr(sale_batch_service, "_write_chunk", deadlock_once)
+    with query_counter() as log:
+        response = client.post("/vendas/lote", json={"vendas": [
+            _venda("d1", [(feijao, 1), (arroz, 2)])
+        ]}, headers=seller_headers)
+
+    assert response.json()["criadas"] == 1
+    assert len(calls) == 2
+    locks = [s for s in log.queries if s.startswith("SELECT produtos.id, produtos.nome, produtos.preco")]
+    assert locks and all(s.endswith("ORDER BY produtos.id") for s in locks)
+    db_session.expire_all()
+    assert (db_session.get(Product, arroz.id).estoque, db_session.get(Product, feijao.id).estoque) == (3.0, 4.0)
+
+def test_batch_does_not_retry_other_database_errors(client, seller_headers, make_product, monkeypatch):
+    """Testa que erros de banco que não são de concorrência sobem na primeira tentativa"""
+    product = make_product(nome="Café", preco=15.0, estoque=10.0)
+    calls = []
+
+    def broken(db, chunk, user_id):
+        calls.append(chunk)
+        raise OperationalError("SELECT 1", {}, Exception("conexão perdida"))
+
+    monkeypatch.setattr(sale_batch_service, "_write_chunk", broken)
+    with pytest.raises(OperationalError):
+        client.post("/vendas/lote", json={"vendas": [_venda("e1", [(product, 1)])]}, headers=seller_headers)
+    assert len(calls) == 1
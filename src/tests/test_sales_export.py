@@ -0,0 +1,66 @@
+import csv
+import io
+import json
+from datetime import datetime
+from ..models import Sale
+from ..services import create_sale
+from ..schemas import SaleCreate
+
+def _sell(db, user_id, itens, metodo="pix"):
+    return create_sale(db, SaleCreate(
+        itens=[{"produto_id": p.id, "quantidade": q} for p, q in itens],
+        metodo_pagamento=metodo
+    ), user_id)
+
+def _backdate(db, sale, data_hora):
+    db.query(Sale).filter(Sale.id == sale.id).update({"data_hora": data_hora})
+    db.commit()
+
+def test_export_csv_has_one_row_per_item(client, db_session, manager_headers, seller, make_product):
+    """Testa exportação CSV com uma linha por item vendido"""
+    arroz = make_product(nome="Arroz", preco=20.0)
+    feijao = make_product(nome="Feijão", preco=8.0)
+    sale = _sell(db_session, seller.id, [(arroz, 2), (feijao, 1)], "pix")
+    day = sale.data_hora.date()
+
+    response = client.get(
+        f"/relatorios/vendas/export?inicio={day}&fim={day}&formato=csv", headers=manager_headers
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [(r["venda_id"], r["produto"], r["subtotal"]) for r in rows] == [
+        (str(sale.id), "Arroz", "40.0"), (str(sale.id), "Feijão", "8.0")
+    ]
+    assert rows[0]["vendedor"] == "Vendedor Teste"
+
+def test_export_ndjson_covers_long_periods(client, db_session, manager_headers, seller, make_product):
+    """Testa exportação NDJSON sem o limite de 90 dias, em ordem cronológica"""
+    product = make_product(nome="Café", preco=15.0)
+    old = _sell(db_session, seller.id, [(product, 1)])
+    recent = _sell(db_session, seller.id, [(product, 3)], "dinheiro")
+    _backdate(db_session, old, datetime(2023, 1, 10, 9, 0))
+    _backdate(db_session, recent, datetime(2024, 6, 1, 18, 30))
+    _backdate(db_session, _sell(db_session, seller.id, [(product, 1)]), datetime(2024, 6, 2, 8, 0))
+
+    response = client.get(
+        "/relatorios/vendas/export?inicio=2023-01-01&fim=2024-06-01&formato=ndjson",
+        headers=manager_headers
+    )
+    assert response.status_code == 200
+    sales = [json.loads(line) for line in response.text.splitlines()]
+    assert [s["id"] for s in sales] == [old.id, recent.id]
+    assert sales[1]["total"] == 45.0
+    assert sales[1]["itens"] == [{
+        "produto_id": product.id, "produto": "Café", "quantidade": 3.0,
+        "preco_unitario": 15.0, "subtotal": 45.0
+    }]
+
+def test_export_validation(client, manager_headers, seller_headers):
+    """Testa validação de período, formato e permissão"""
+    url = "/relatorios/vendas/export?inicio=2024-02-01&fim=2024-01-01"
+    assert client.get(url, headers=manager_headers).status_code == 400
+    url = "/relatorios/vendas/export?inicio=2024-01-01&fim=2024-02-01&formato=xml"
+    assert client.get(url, headers=manager_headers).status_code == 422
+    url = "/relatorios/vendas/export?inicio=2024-01-01&fim=2024-02-01"
+    assert client.get(url, headers=seller_headers).status_code == 403
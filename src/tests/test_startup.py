@@ -0,0 +1,31 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+
+STARTUP = """
+import json
+from fastapi.testclient import TestClient
+from src import database
+from src.main import create_app
+
+with TestClient(create_app()) as client:
+    status = client.get("/health").status_code
+print(json.dumps({"status": status, "engine": database._engine is not None}))
+"""
+
+def test_worker_starts_without_touching_database(tmp_path):
+    """Testa que a subida do worker não conecta ao banco (nem cria tabelas)"""
+    # Diretório inexistente: qualquer conexão falharia
+    env = dict(
+        os.environ, DATABASE_URL=f"sqlite:///{tmp_path / 'ausente' / 'pdv.db'}", DB_ASYNC="false",
+        CATALOG_WARM_ON_STARTUP="false", PASSWORD_HASH_WORKERS="0"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", STARTUP], cwd=ROOT, env=env, check=True, capture_output=True, text=True
+    ).stdout
+
+    assert json.loads(output.strip().splitlines()[-1]) == {"status": 200, "engine": False}
@@ -0,0 +1,44 @@
+from ..models import Product
+
+def test_stock_entry_merges_duplicates(client, db_session, manager_headers, make_product):
+    """Testa entrada de estoque somando linhas repetidas"""
+    arroz = make_product(nome="Arroz", estoque=10.0)
+    feijao = make_product(nome="Feijão", estoque=0.0)
+
+    response = client.post("/produtos/estoque/entrada", json=[
+        {"produto_id": arroz.id, "quantidade": 5},
+        {"produto_id": feijao.id, "quantidade": 2},
+        {"produto_id": arroz.id, "quantidade": 1.5}
+    ], headers=manager_headers)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [(p["id"], p["estoque"]) for p in data] == [(arroz.id, 16.5), (feijao.id, 2.0)]
+
+def test_stock_entry_is_atomic(client, db_session, manager_headers, make_product):
+    """Testa que a entrada falha inteira se um produto não existir"""
+    product = make_product(nome="Café", estoque=3.0)
+
+    response = client.post("/produtos/estoque/entrada", json=[
+        {"produto_id": product.id, "quantidade": 10},
+        {"produto_id": 99999, "quantidade": 1}
+    ], headers=manager_headers)
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Produto 99999 não encontrado"
+    db_session.refresh(product)
+    assert product.estoque == 3.0
+
+def test_stock_entry_query_count_is_flat(client, db_session, query_budget, manager_headers, make_product):
+    """Testa que uma nota com muitas linhas usa um único UPDATE"""
+    products = [make_product(nome=f"Item {i}", estoque=0.0) for i in range(50)]
+    payload = [{"produto_id": p.id, "quantidade": 1} for p in products]
+    db_session.expire_all()
+
+    # Usuário autenticado + UPDATE ... RETURNING
+    with query_budget(2):
+        response = client.post("/produtos/estoque/entrada", json=payload, headers=manager_headers)
+
+    assert response.status_code == 200
+    assert len(response.json()) == 50
+    assert {p.estoque for p in db_session.query(Product).all()} == {1.0}